@@ -59,6 +59,8 @@ from . import file_qua
 from . import file_tag
 from . import file_wrl
 from . import misc
+from .global_functions import export_cache, texture_loading
+from .global_functions.shader_generation import halo_2_shader
 
 modules = [
     global_ui,
@@ -72,6 +74,10 @@ modules = [
     misc
 ]
 
+def update_incremental_export(self, context):
+    if not self.incremental_export:
+        export_cache.clear_export_cache()
+
 class HaloAddonPrefs(bpy.types.AddonPreferences):
     bl_idname = __name__
     enable_debug: BoolProperty(
@@ -92,12 +98,31 @@ class HaloAddonPrefs(bpy.types.AddonPreferences):
         default = False,
     )
 
+    enable_export_timings: BoolProperty(
+        name ="Enable Export Timings",
+        description = "Record how long each stage of a JMS, JMI, ASS or JMA export takes and print a summary to the system console",
+        default = False,
+    )
+
+    dump_export_timings: BoolProperty(
+        name ="Dump Export Timings",
+        description = "Write the export timings as JSON and a cProfile trace next to the exported file",
+        default = False,
+    )
+
     enable_crash_report: BoolProperty(
         name ="Enable Crash Report",
         description = "Write crash logs to the users Windows profile",
         default = True,
     )
 
+    incremental_export: BoolProperty(
+        name ="Incremental Export",
+        description = "Reuse the geometry extracted during a previous export for objects that have not changed since",
+        default = False,
+        update = update_incremental_export,
+    )
+
     override_user_details: BoolProperty(
         name ="Override User Details",
         description = "Write the username and device name set in preferences instead of the hosts details",
@@ -125,6 +150,30 @@ class HaloAddonPrefs(bpy.types.AddonPreferences):
                ]
         )
 
+    texture_cache_path: StringProperty(
+        name="Texture Cache Path",
+        description="Directory to store textures decoded from bitmap tags in. Later imports load them from here instead of decoding the tag again. Leave empty to disable the cache",
+        subtype="DIR_PATH"
+    )
+
+    pack_cached_textures: BoolProperty(
+        name ="Pack Cached Textures",
+        description = "Pack textures loaded from the texture cache into the blend file. Disable to reference the cached files and keep blend files small",
+        default = True,
+    )
+
+    background_texture_decoding: BoolProperty(
+        name ="Background Texture Decoding",
+        description = "Decode bitmap tag textures on worker threads during import. Image nodes get a white placeholder that is filled in once the texture is ready",
+        default = False,
+    )
+
+    link_shader_resources: BoolProperty(
+        name ="Link Shader Resources",
+        description = "Link the node groups used by generated shaders from the addon resource files instead of appending a copy into the blend file",
+        default = False,
+    )
+
     halo_1_data_path: StringProperty(
         name="Halo 1 Data Path",
         description="Path to the data directory",
@@ -189,9 +238,23 @@ class HaloAddonPrefs(bpy.types.AddonPreferences):
         row.label(text='Enable Profiling:')
         row.prop(self, "enable_profiling", text='')
         row = col.row()
+        row.label(text='Enable Export Timings:')
+        row.prop(self, "enable_export_timings", text='')
+        row = col.row()
+        row.enabled = self.enable_export_timings
+        row.label(text='Dump Export Timings:')
+        row.prop(self, "dump_export_timings", text='')
+        row = col.row()
         row.label(text='Enable Crash Report:')
         row.prop(self, "enable_crash_report", text='')
 
+        box = layout.box()
+        box.label(text="Export Options:")
+        col = box.column(align=True)
+        row = col.row()
+        row.label(text='Incremental Export:')
+        row.prop(self, "incremental_export", text='')
+
         box = layout.box()
         box.label(text="User Detail Options:")
         col = box.column(align=True)
@@ -212,6 +275,19 @@ class HaloAddonPrefs(bpy.types.AddonPreferences):
         row.label(text='Shader Gen:')
         row.prop(self, "shader_gen", text='')
         row = col.row()
+        row.label(text='Texture Cache Path:')
+        row.prop(self, "texture_cache_path", text='')
+        row = col.row()
+        row.enabled = not self.texture_cache_path == ""
+        row.label(text='Pack Cached Textures:')
+        row.prop(self, "pack_cached_textures", text='')
+        row = col.row()
+        row.label(text='Background Texture Decoding:')
+        row.prop(self, "background_texture_decoding", text='')
+        row = col.row()
+        row.label(text='Link Shader Resources:')
+        row.prop(self, "link_shader_resources", text='')
+        row = col.row()
         row.label(text='Halo 1 Data Path:')
         row.prop(self, "halo_1_data_path", text='')
         row = col.row()
@@ -241,10 +317,23 @@ def register():
     for module in modules:
         module.register()
 
+    bpy.app.handlers.load_post.append(export_cache.clear_export_cache_on_load)
+    bpy.app.handlers.load_post.append(halo_2_shader.clear_compiled_templates_on_load)
+    bpy.app.handlers.load_pre.append(texture_loading.cancel_pending_textures_on_load)
+    bpy.app.handlers.save_pre.append(texture_loading.finish_pending_textures_on_save)
+
 def unregister():
     bpy.utils.unregister_class(HaloAddonPrefs)
     for module in reversed(modules):
         module.unregister()
 
+    bpy.app.handlers.load_post.remove(export_cache.clear_export_cache_on_load)
+    bpy.app.handlers.load_post.remove(halo_2_shader.clear_compiled_templates_on_load)
+    bpy.app.handlers.load_pre.remove(texture_loading.cancel_pending_textures_on_load)
+    bpy.app.handlers.save_pre.remove(texture_loading.finish_pending_textures_on_save)
+    export_cache.clear_export_cache()
+    halo_2_shader.clear_compiled_templates()
+    texture_loading.shutdown_decoding_pool()
+
 if __name__ == '__main__':
     register()
@@ -30,15 +30,19 @@ import socket
 
 from getpass import getuser
 from .process_scene import process_scene
-from ..global_functions import global_functions
+from ..global_functions import global_functions, export_formatting, export_profiler
 
 def build_asset(context, filepath, version, game_version, folder_structure, hidden_geo, nonrender_geo, apply_modifiers, triangulate_faces, loop_normals, edge_split, clean_normalize_weights, custom_scale, report):
     ASS = process_scene(context, version, game_version, hidden_geo, nonrender_geo, apply_modifiers, triangulate_faces, loop_normals, edge_split, clean_normalize_weights, custom_scale, report)
 
+    write_stage = export_profiler.begin_stage("File writing")
+
     filename = os.path.basename(filepath)
     root_directory = global_functions.get_directory(context, game_version, global_functions.ModelTypeEnum.render, folder_structure, True, False, filepath)
 
-    file = open(os.path.join(root_directory, filename), 'w', encoding='utf_8')
+    output_path = os.path.join(root_directory, filename)
+    export_profiler.set_output_path(output_path)
+    file = open(output_path, 'w', encoding='utf_8')
 
     username = bpy.context.preferences.addons["io_scene_halo"].preferences.username
     device_name = bpy.context.preferences.addons["io_scene_halo"].preferences.device_name
@@ -182,55 +186,48 @@ def build_asset(context, filepath, version, game_version, folder_structure, hidd
                 '\n%s' % (len(geometry.vertices))
             )
 
-            for vert in geometry.vertices:
-                file.write(
-                    '\n%0.10f\t%0.10f\t%0.10f' % (vert.translation[0], vert.translation[1], vert.translation[2]) +
-                    '\n%0.10f\t%0.10f\t%0.10f' % (vert.normal[0], vert.normal[1], vert.normal[2])
-                )
+            vertex_format = '\n%0.10f\t%0.10f\t%0.10f' + '\n%0.10f\t%0.10f\t%0.10f'
+            if version >= 6:
+                vertex_format += '\n%0.10f\t%0.10f\t%0.10f'
 
-                if version >= 6:
-                    file.write('\n%0.10f\t%0.10f\t%0.10f' % (vert.color[0], vert.color[1], vert.color[2]))
+            node_format = '\n%s\n%0.10f'
+            if version >= 3:
+                node_format = '\n%s\t%0.10f'
 
-                file.write('\n%s' % (len(vert.node_set)))
+            uv_format = '\n%0.10f\t%0.10f'
+            if version >= 5:
+                uv_format = '\n%0.10f\t%0.10f\t%0.10f\n'
 
-                for node in vert.node_set:
-                    node_index = node[0]
-                    node_weight = node[1]
-                    if version >= 3:
-                        file.write(
-                            '\n%s\t%0.10f' % (node_index, node_weight)
-                        )
+            row_formats = {}
+            rows = []
+            for vert in geometry.vertices:
+                format_key = (len(vert.node_set), len(vert.uv_set))
+                row_format = row_formats.get(format_key)
+                if row_format is None:
+                    row_format = vertex_format + '\n%s' + (node_format * format_key[0]) + '\n%s' + (uv_format * format_key[1])
+                    row_formats[format_key] = row_format
 
-                    else:
-                        file.write(
-                            '\n%s' % (node_index) +
-                            '\n%0.10f' % (node_weight)
-                        )
+                row_values = tuple(vert.translation) + tuple(vert.normal)
+                if version >= 6:
+                    row_values += tuple(vert.color[0:3])
 
-                file.write('\n%s' % (len(vert.uv_set)))
+                row_values += (format_key[0],) + tuple(value for node in vert.node_set for value in node[0:2])
+                row_values += (format_key[1],)
                 for uv in vert.uv_set:
-                    tex_u = uv[0]
-                    tex_v = uv[1]
-                    tex_w = 0
+                    row_values += (uv[0], uv[1])
                     if version >= 5:
-                        file.write('\n%0.10f\t%0.10f\t%0.10f\n' % (tex_u, tex_v, tex_w))
+                        row_values += (0,)
 
-                    else:
-                        file.write('\n%0.10f\t%0.10f' % (tex_u, tex_v))
+                rows.append((row_format, row_values))
+
+            export_formatting.write_rows(file, rows)
 
             file.write('\n%s' % (len(geometry.triangles)))
-            for triangle in geometry.triangles:
-                if version >= 3:
-                    file.write(
-                        '\n%s' % (triangle.material_index) +
-                        '\t\t%s\t%s\t%s' % (triangle.v0, triangle.v1, triangle.v2)
-                    )
-
-                else:
-                    file.write(
-                        '\n%s' % (triangle.material_index) +
-                        '\n%s\n%s\n%s' % (triangle.v0, triangle.v1, triangle.v2)
-                    )
+            triangle_format = '\n%s\n%s\n%s\n%s'
+            if version >= 3:
+                triangle_format = '\n%s\t\t%s\t%s\t%s'
+
+            export_formatting.write_rows(file, [(triangle_format, (triangle.material_index, triangle.v0, triangle.v1, triangle.v2)) for triangle in geometry.triangles])
 
             file.write('\n')
 
@@ -283,3 +280,4 @@ def build_asset(context, filepath, version, game_version, folder_structure, hidd
             file.write('%s\n' % node_index)
 
     file.close()
+    export_profiler.end_stage(write_stage, len(ASS.objects) + len(ASS.instances))
@@ -196,14 +196,14 @@ def build_scene(context, filepath, report):
             if game_title == "halo1":
                 shader = shader_processing.find_h1_shader_tag(ASS.filepath, ass_mat_name)
                 if not shader == None:
-                    shader_processing.generate_h1_shader(mat, shader, 0, print)
+                    mat = shader_processing.generate_h1_shader(mat, shader, 0, print)
                 else:
                     print("Halo 1 Shader tag returned as None. Something went terribly wrong")
 
             elif game_title == "halo2":
                 shader = shader_processing.find_h2_shader_tag(ASS.filepath, ass_mat_name)
                 if not shader == None:
-                    shader_processing.generate_h2_shader(mat, shader, print)
+                    mat = shader_processing.generate_h2_shader(mat, shader, print)
                 else:
                     print("Halo 2 Shader tag returned as None. Something went terribly wrong")
 
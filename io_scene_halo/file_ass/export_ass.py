@@ -27,9 +27,12 @@
 import bpy
 
 from .build_asset import build_asset
+from ..global_functions import export_profiler
 
 def write_file(context, filepath, ass_version, game_version, folder_structure, hidden_geo, nonrender_geo, apply_modifiers, triangulate_faces, loop_normals, edge_split, clean_normalize_weights, scale_value, report):
+    export_profile = export_profiler.begin_export_profile("ASS", filepath)
     build_asset(context, filepath, ass_version, game_version, folder_structure, hidden_geo, nonrender_geo, apply_modifiers, triangulate_faces, loop_normals, edge_split, clean_normalize_weights, scale_value, report)
+    export_profiler.end_export_profile(export_profile, report)
 
     report({'INFO'}, "Export completed successfully")
     return {'FINISHED'}
@@ -26,10 +26,12 @@
 
 import os
 import bpy
+import numpy as np
 
 from math import degrees
+from mathutils import Matrix
 from .format import ASSAsset
-from ..global_functions import mesh_processing, global_functions, resource_management
+from ..global_functions import mesh_processing, global_functions, resource_management, export_cache, export_profiler
 from datetime import datetime
 
 def get_material_strings(material, version):
@@ -118,22 +120,25 @@ def scale_is_uniform(obj):
 
     return is_uniform
 
-def process_scene(context, version, game_version, hidden_geo, nonrender_geo, apply_modifiers, triangulate_faces, loop_normals, edge_split, clean_normalize_weights, custom_scale, report):
-    ASS = ASSAsset()
+def get_mesh_object_key(obj, apply_modifiers):
+    # Object linked material slots and vertex group names live on the object so instances of one mesh can still differ.
+    material_signature = tuple((slot.link, getattr(slot.material, "name_full", None)) for slot in obj.material_slots)
+    vertex_group_signature = tuple(obj.vertex_groups.keys())
+    if obj.data.ass_jms.Object_Type == 'CONVEX SHAPES' and apply_modifiers:
+        return ('MESH', obj.data.name_full, material_signature, vertex_group_signature, export_cache.get_modifier_signature(obj))
 
-    layer_collection_list = []
-    object_list = []
+    return ('MESH', obj.data.name_full, material_signature, vertex_group_signature)
 
-    # Gather all scene resources that fit export criteria
-    resource_management.gather_scene_resources(context, layer_collection_list, object_list, hidden_geo, nonrender_geo)
-
-    # Store visibility for all relevant resources
-    stored_collection_visibility = resource_management.store_collection_visibility(layer_collection_list)
-    stored_object_visibility = resource_management.store_object_visibility(object_list)
-    stored_modifier_visibility = resource_management.store_modifier_visibility(object_list)
+def process_scene(context, version, game_version, hidden_geo, nonrender_geo, apply_modifiers, triangulate_faces, loop_normals, edge_split, clean_normalize_weights, custom_scale, report):
+    ASS = ASSAsset()
+    if export_cache.is_incremental_export():
+        export_cache.prune_export_cache()
 
-    # Unhide all relevant resources for exporting
-    resource_management.unhide_relevant_resources(layer_collection_list, object_list)
+    # Gather all scene resources that fit export criteria and unhide them for exporting
+    gather_stage = export_profiler.begin_stage("Scene gathering")
+    scene_snapshot = resource_management.acquire_scene_snapshot(context, hidden_geo, nonrender_geo)
+    object_list = scene_snapshot.object_list
+    export_profiler.end_stage(gather_stage, len(object_list))
 
     if not context.view_layer.objects.active == None:
         bpy.ops.object.mode_set(mode='OBJECT')
@@ -152,20 +157,21 @@ def process_scene(context, version, game_version, hidden_geo, nonrender_geo, app
     material_list = []
     armature = None
     geometry_list = []
-    linked_object_list = []
-    linked_instance_list = []
+    geometry_keys = []
+    object_indices = {}
+    object_bone_groups = {}
     instance_list = []
-    object_count = 0
 
+    modifier_stage = export_profiler.begin_stage("Modifier application")
     for obj in object_list:
         if obj.type== 'MESH':
             if clean_normalize_weights:
                 mesh_processing.vertex_group_clean_normalize(context, obj, limit_value)
 
             if apply_modifiers:
-                mesh_processing.add_modifier(context, obj, triangulate_faces, edge_split, None)
+                mesh_processing.add_modifier(context, obj, False, edge_split, None)
 
-    depsgraph = context.evaluated_depsgraph_get()
+    export_profiler.end_stage(modifier_stage, len(object_list))
 
     for obj in object_list:
         if not scale_is_uniform(obj):
@@ -174,60 +180,62 @@ def process_scene(context, version, game_version, hidden_geo, nonrender_geo, app
         if obj.type == 'ARMATURE':
             for bone in obj.data.bones:
                 instance_list.append(bone)
-                if not bone.name in linked_object_list:
-                    linked_object_list.append(bone.name)
+                object_key = ('BONE', bone.name)
+                object_indices.setdefault(object_key, len(object_indices))
 
                 geometry_list.append((bone, bone, 'BONE', obj))
-                object_count += 1
+                geometry_keys.append(object_key)
 
         elif obj.type == 'LIGHT' and version >= 3:
             instance_list.append(obj)
-            if not obj.name in linked_object_list:
-                linked_object_list.append(obj.name)
-                object_count += 1
+            object_key = ('LIGHT', obj.name)
+            object_indices.setdefault(object_key, len(object_indices))
 
             if obj.data.type == 'SPOT':
                 geometry_list.append((obj, obj, 'SPOT_LGT'))
+                geometry_keys.append(object_key)
 
             elif obj.data.type == 'AREA':
                 geometry_list.append((obj, obj, 'DIRECT_LGT'))
+                geometry_keys.append(object_key)
 
             elif obj.data.type == 'POINT':
                 geometry_list.append((obj, obj,'OMNI_LGT'))
+                geometry_keys.append(object_key)
 
             elif obj.data.type == 'SUN':
                 geometry_list.append((obj, obj, 'AMBIENT_LGT'))
+                geometry_keys.append(object_key)
 
             else:
                 print("Bad light")
 
         elif obj.type== 'MESH' and len(obj.data.polygons) > 0:
             instance_list.append(obj)
-            if not obj.data.name in linked_object_list:
-                linked_object_list.append(obj.data.name)
-                object_count += 1
+            object_key = get_mesh_object_key(obj, apply_modifiers)
+            is_unique_object = not object_key in object_indices
+            object_indices.setdefault(object_key, len(object_indices))
 
-            if obj.data.ass_jms.Object_Type == 'SPHERE':
+            # Only the first instance of a mesh object is written out so the rest never need to be evaluated.
+            evaluted_mesh = None
+            if is_unique_object and not obj.data.ass_jms.Object_Type == 'CONVEX SHAPES':
                 evaluted_mesh = obj.to_mesh(preserve_all_data_layers=True)
+
+            if obj.data.ass_jms.Object_Type == 'SPHERE':
                 geometry_list.append((evaluted_mesh, obj, 'SPHERE'))
+                geometry_keys.append(object_key)
 
             elif obj.data.ass_jms.Object_Type == 'BOX':
-                evaluted_mesh = obj.to_mesh(preserve_all_data_layers=True)
                 geometry_list.append((evaluted_mesh, obj, 'BOX'))
+                geometry_keys.append(object_key)
 
             elif obj.data.ass_jms.Object_Type == 'CAPSULES':
-                evaluted_mesh = obj.to_mesh(preserve_all_data_layers=True)
                 geometry_list.append((evaluted_mesh, obj, 'PILL'))
+                geometry_keys.append(object_key)
 
             elif obj.data.ass_jms.Object_Type == 'CONVEX SHAPES':
-                if apply_modifiers:
-                    obj_for_convert = obj.evaluated_get(depsgraph)
-                    evaluted_mesh = obj_for_convert.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
-                    geometry_list.append((evaluted_mesh, obj, 'MESH'))
-
-                else:
-                    evaluted_mesh = obj.to_mesh(preserve_all_data_layers=True)
-                    geometry_list.append((evaluted_mesh, obj, 'MESH'))
+                geometry_list.append((None, obj, 'MESH'))
+                geometry_keys.append(object_key)
 
             else:
                 print("%s has an out of bounds object_type setting" % obj.name)
@@ -243,6 +251,7 @@ def process_scene(context, version, game_version, hidden_geo, nonrender_geo, app
                 obj_mesh_data = obj.data
 
             geometry_list.append((obj_mesh_data, obj_data, 'EMPTY'))
+            geometry_keys.append(None)
             instance_list.append(obj_data)
 
 
@@ -281,6 +290,7 @@ def process_scene(context, version, game_version, hidden_geo, nonrender_geo, app
             original_geo.ass_jms.unique_id = str(generated_id)
             increment_count += 1
 
+    instance_hierarchy = global_functions.NodeHierarchy(instance_list)
     ASS.instances.append(ASS.Instance(name='Scene Root', local_transform=ASS.Transform(), pivot_transform=ASS.Transform(), bone_groups=[]))
     for idx, geometry in enumerate(geometry_list):
         verts = []
@@ -291,7 +301,6 @@ def process_scene(context, version, game_version, hidden_geo, nonrender_geo, app
         lod = None
         region = ""
         permutation = ""
-        face_set = (None, default_permutation, default_region)
 
         evaluted_mesh = geometry[0]
         original_geo = geometry[1]
@@ -301,16 +310,8 @@ def process_scene(context, version, game_version, hidden_geo, nonrender_geo, app
         if not global_functions.string_empty_check(original_geo.ass_jms.name_override):
             instance_name = original_geo.ass_jms.name_override
 
-        evaluted_mesh_name = None
-        if evaluted_mesh:
-            evaluted_mesh_name = evaluted_mesh.name
-
-        else:
-            evaluted_mesh_name = original_geo.name
-
-        object_index = -1
-        if not geo_class == 'EMPTY':
-            object_index = linked_object_list.index(evaluted_mesh_name)
+        object_key = geometry_keys[idx]
+        object_index = object_indices.get(object_key, -1)
 
         material_index = -1
         radius = 2
@@ -339,11 +340,11 @@ def process_scene(context, version, game_version, hidden_geo, nonrender_geo, app
                         parent = original_geo.parent.data.bones.get(original_geo.parent_bone)
 
         if not parent == None:
-            for instance_idx, instance in enumerate(instance_list):
-                if instance == parent:
-                    parent_id = instance_idx + 1
+            parent_idx = instance_hierarchy.get(parent)
+            if not parent_idx == -1:
+                parent_id = parent_idx + 1
 
-        geo_matrix = global_functions.get_matrix(original_geo, original_geo, True, armature, instance_list, is_bone, version, 'ASS', False, custom_scale, False)
+        geo_matrix = global_functions.get_matrix(original_geo, original_geo, True, armature, instance_hierarchy, is_bone, version, 'ASS', False, custom_scale, False)
         geo_dimensions = global_functions.get_dimensions(geo_matrix, original_geo, version, is_bone, 'ASS', custom_scale)
         rotation = (geo_dimensions.quaternion[0], geo_dimensions.quaternion[1], geo_dimensions.quaternion[2], geo_dimensions.quaternion[3])
         translation = (geo_dimensions.position[0], geo_dimensions.position[1], geo_dimensions.position[2])
@@ -351,9 +352,9 @@ def process_scene(context, version, game_version, hidden_geo, nonrender_geo, app
 
         local_transform = ASS.Transform(rotation, translation, scale)
         ASS.instances.append(ASS.Instance(instance_name, object_index, original_geo.ass_jms.unique_id, parent_id, inheritance_flag, local_transform, pivot_transform=ASS.Transform()))
-        if not evaluted_mesh_name in linked_instance_list and not object_index == -1:
-            linked_instance_list.append(evaluted_mesh_name)
-            object_matrix = global_functions.get_matrix(original_geo, original_geo, False, armature, instance_list, is_bone, version, 'ASS', False, custom_scale, False)
+        if not object_key in object_bone_groups and not object_index == -1:
+            object_bone_groups[object_key] = node_index_list
+            object_matrix = global_functions.get_matrix(original_geo, original_geo, False, armature, instance_hierarchy, is_bone, version, 'ASS', False, custom_scale, False)
             object_dimensions = global_functions.get_dimensions(object_matrix, original_geo, version, is_bone, 'ASS', custom_scale)
             if geo_class == 'SPOT_LGT' or geo_class == 'DIRECT_LGT' or geo_class == 'OMNI_LGT' or geo_class == 'AMBIENT_LGT':
                 light_properties = ASS.Light()
@@ -452,16 +453,38 @@ def process_scene(context, version, game_version, hidden_geo, nonrender_geo, app
                     xref_name = os.path.basename(xref_path).rsplit('.', 1)[0]
 
                 vertex_groups = original_geo.vertex_groups.keys()
-                if (4, 1, 0) > bpy.app.version:
-                    evaluted_mesh.calc_normals_split()
-
-                region_attribute = evaluted_mesh.get_custom_attribute()
-                region_count = len(original_geo.data.region_list)
-                for idx, face in enumerate(evaluted_mesh.polygons):
-                    if not original_geo.data.active_region == -1 and region_count > 0:
-                        region_idx = region_attribute.data[idx].value - 1
-                        if not region_idx == -1 and not region_idx >= region_count:
-                            face_set = mesh_processing.process_mesh_export_face_set(default_permutation, default_region, game_version, original_geo, region_idx)
+                mesh_matrix = Matrix.Scale(custom_scale, 4)
+                triangulate = apply_modifiers and triangulate_faces
+                fingerprint = None
+                vertex_weights = None
+                mesh_data = None
+                if export_cache.is_incremental_export():
+                    export_settings = ("ASS", version, game_version, loop_normals, triangulate, apply_modifiers, default_permutation, default_region)
+                    if export_cache.is_fingerprint_reliable(original_geo):
+                        vertex_weights = mesh_processing.get_vertex_weight_data(original_geo.data, original_geo)
+                        fingerprint = export_cache.get_object_fingerprint(original_geo, mesh_matrix, export_settings, vertex_weights)
+
+                    mesh_data = export_cache.get_cached_rows("ASS", original_geo, fingerprint)
+
+                if mesh_data is None:
+                    mesh_data = mesh_processing.get_mesh_export_rows(context, original_geo, mesh_matrix, loop_normals, triangulate, apply_modifiers, game_version, default_permutation, default_region, vertex_weights)
+                    if fingerprint:
+                        export_cache.set_cached_rows("ASS", original_geo, fingerprint, mesh_data)
+
+                for warning in mesh_data.validation_warnings:
+                    report({'WARNING'}, warning)
+
+                triangle_stage = export_profiler.begin_stage("Triangle assembly")
+                face_vertex_offsets = (np.cumsum(mesh_data.loop_totals) - mesh_data.loop_totals).tolist()
+                region_cache = {}
+                material_cache = {}
+                face_regions = []
+                for face_idx, (material_idx, region_idx) in enumerate(zip(mesh_data.material_indices.tolist(), mesh_data.region_indices.tolist())):
+                    region_index = region_cache.get(region_idx)
+                    if region_index is None:
+                        region_index = -1
+                        if not region_idx == -1:
+                            lod, permutation, region = mesh_data.face_sets[region_idx]
                             if not region in region_list:
                                 region_list.append(region)
 
@@ -470,48 +493,46 @@ def process_scene(context, version, game_version, hidden_geo, nonrender_geo, app
                                 if not permutation in permutation_list:
                                     permutation_list.append(permutation)
 
-                    permutation = face_set[1]
-                    region = face_set[2]
+                        region_cache[region_idx] = region_index
 
-                    material = global_functions.get_material(game_version, original_geo, face, evaluted_mesh, lod, region, permutation)
-                    material_index = -1
-                    if not material == -1:
-                        material_list = global_functions.gather_materials(game_version, material, material_list, "ASS")
-                        material_index = material_list.index(material)
+                    material_key = (material_idx, region_idx)
+                    material_index = material_cache.get(material_key)
+                    if material_index is None:
+                        material = mesh_data.face_materials[material_key]
+                        material_index = -1
+                        if not material == -1:
+                            material_list = global_functions.gather_materials(game_version, material, material_list, "ASS")
+                            material_index = material_list.index(material)
 
-                    v0 = (idx * 3)
-                    v1 = (idx * 3) + 1
-                    v2 = (idx * 3) + 2
+                        material_cache[material_key] = material_index
 
-                    triangles.append(ASS.Triangle(region_index, material_index, v0, v1, v2))
-                    for loop_index in face.loop_indices:
-                        point_idx = evaluted_mesh.loops[loop_index].vertex_index
-                        loop_data = evaluted_mesh.loops[loop_index]
-                        vertex_data = evaluted_mesh.vertices[loop_data.vertex_index]
+                    v0 = face_vertex_offsets[face_idx]
+                    v1 = v0 + 1
+                    v2 = v0 + 2
 
-                        region = region_index
-                        normal = evaluted_mesh.corner_normals[loop_index].vector.normalized()
-                        if not loop_normals:
-                            normal = vertex_data.normal.normalized()
+                    face_regions.append(region_index)
+                    triangles.append(ASS.Triangle(region_index, material_index, v0, v1, v2))
 
-                        if normal.length <= 0.0:
-                            normal = face.normal.normalized()
+                export_profiler.end_stage(triangle_stage, len(face_regions))
 
-                        scaled_translation = mesh_processing.process_mesh_export_vert(vertex_data, "ASS", object_matrix, custom_scale)
-                        uv_set = mesh_processing.process_mesh_export_uv(evaluted_mesh, "ASS", loop_index, version)
-                        color = mesh_processing.process_mesh_export_color(evaluted_mesh, loop_index, point_idx)
-                        node_influence_count, node_set = mesh_processing.process_mesh_export_weights(vertex_data, armature, original_geo, vertex_groups, instance_list, "ASS", node_index_list)
+                loop_vertices = mesh_data.loop_vertices.tolist()
+                weight_stage = export_profiler.begin_stage("Weight processing")
+                node_influence_counts, node_sets = mesh_processing.process_mesh_export_weights(mesh_data.vertex_weights, mesh_data.loop_vertices, armature, original_geo, vertex_groups, instance_hierarchy, "ASS", node_index_list)
+                export_profiler.end_stage(weight_stage, len(node_sets))
 
-                        verts.append(ASS.Vertex(node_influence_count, node_set, region, scaled_translation, normal, color, uv_set))
+                vertex_stage = export_profiler.begin_stage("Vertex assembly")
+                loop_regions = np.repeat(np.asarray(face_regions, dtype=np.int32), mesh_data.loop_totals).tolist()
+                for loop_vertex, region, translation, normal, color, uv_set in zip(loop_vertices, loop_regions, mesh_data.translations.tolist(), mesh_data.normals.tolist(), mesh_data.colors.tolist(), mesh_data.uvs.tolist()):
+                    verts.append(ASS.Vertex(node_influence_counts[loop_vertex], node_sets[loop_vertex], region, translation, normal, color, uv_set))
 
-                original_geo.to_mesh_clear()
+                export_profiler.end_stage(vertex_stage, len(loop_vertices))
 
             else:
                 print("Geometry file has an invalid geometry class during scene processing: ",  geo_class)
 
             ASS.objects.append(ASS.Object(geo_class, xref_path, xref_name, material_index, radius, extents, height, verts, triangles, node_index_list, light_properties))
 
-        ASS.instances[-1].bone_groups = node_index_list
+        ASS.instances[-1].bone_groups = object_bone_groups.get(object_key, node_index_list)
 
     for material in material_list:
         material_data = material[0]
@@ -535,8 +556,6 @@ def process_scene(context, version, game_version, hidden_geo, nonrender_geo, app
         ASS.materials.append(ASS.Material(material_name, material_name, texture_path, slot_index, lod, permutation, region, material_lightmap))
 
     # Restore visibility status for all resources
-    resource_management.restore_collection_visibility(stored_collection_visibility)
-    resource_management.restore_object_visibility(stored_object_visibility)
-    resource_management.restore_modifier_visibility(stored_modifier_visibility)
+    resource_management.release_scene_snapshot(scene_snapshot)
 
     return ASS
@@ -28,6 +28,7 @@ import os
 import struct
 
 from .process_scene import process_scene
+from ..global_functions import export_profiler
 from ..global_functions.global_functions import get_directory, get_true_extension, ModelTypeEnum
 
 DECIMAL_POINT = "6"
@@ -180,6 +181,7 @@ def build_asset(context, filepath, report, extension, jma_version, game_title, g
         JMA.version = jma_version
         JMA.frame_rate = frame_rate_value
 
+    write_stage = export_profiler.begin_stage("File writing")
     binary = False
     update_decimal(6)
     if jma_version >= 16395:
@@ -189,6 +191,7 @@ def build_asset(context, filepath, report, extension, jma_version, game_title, g
 
     root_directory = get_directory(context, game_title, ModelTypeEnum.animations, folder_structure, False, False, filepath)
     output_path = os.path.join(root_directory, "%s%s" % (filename, get_true_extension(filepath, extension, False)))
+    export_profiler.set_output_path(output_path)
     if binary:
         file = open(output_path + "B", 'wb')
         file.write(struct.pack('<4s', bytes("IMBF", 'utf-8')))
@@ -224,3 +227,4 @@ def build_asset(context, filepath, report, extension, jma_version, game_title, g
     if not binary:
         file.write('\n')
     file.close()
+    export_profiler.end_stage(write_stage, len(JMA.transforms))
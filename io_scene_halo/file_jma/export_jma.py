@@ -27,9 +27,12 @@
 import bpy
 
 from .build_asset import build_asset
+from ..global_functions import export_profiler
 
 def write_file(context, filepath, report, extension, jma_version, game_title, generate_checksum, folder_structure, fix_rotations, use_maya_sorting, frame_rate_value, scale_value):
+    export_profile = export_profiler.begin_export_profile("JMA", filepath)
     build_asset(context, filepath, report, extension, jma_version, game_title, generate_checksum, folder_structure, fix_rotations, use_maya_sorting, frame_rate_value, scale_value)
+    export_profiler.end_export_profile(export_profile, report)
 
     report({'INFO'}, "Export completed successfully")
 
@@ -25,11 +25,12 @@
 # ##### END MIT LICENSE BLOCK #####
 
 import bpy
+import numpy as np
 
 from math import radians
 from .format import JMAAsset
-from mathutils import Vector, Euler, Quaternion, Matrix
-from ..global_functions import mesh_processing, global_functions, resource_management
+from mathutils import Vector, Euler, Quaternion
+from ..global_functions import mesh_processing, global_functions, resource_management, animation_processing, export_profiler
 
 def find_valid_armature(context, obj):
     valid_armature = None
@@ -55,19 +56,11 @@ def process_scene(context, extension, jma_version, game_title, generate_checksum
     hidden_geo = False
     nonrender_geo = True
 
-    layer_collection_list = []
-    object_list = []
-
-    # Gather all scene resources that fit export criteria
-    resource_management.gather_scene_resources(context, layer_collection_list, object_list, hidden_geo, nonrender_geo)
-
-    # Store visibility for all relevant resources
-    stored_collection_visibility = resource_management.store_collection_visibility(layer_collection_list)
-    stored_object_visibility = resource_management.store_object_visibility(object_list)
-    stored_modifier_visibility = resource_management.store_modifier_visibility(object_list)
-
-    # Unhide all relevant resources for exporting
-    resource_management.unhide_relevant_resources(layer_collection_list, object_list)
+    # Gather all scene resources that fit export criteria and unhide them for exporting
+    gather_stage = export_profiler.begin_stage("Scene gathering")
+    scene_snapshot = resource_management.acquire_scene_snapshot(context, hidden_geo, nonrender_geo)
+    object_list = scene_snapshot.object_list
+    export_profiler.end_stage(gather_stage, len(object_list))
 
     armature = None
     node_list = []
@@ -114,9 +107,10 @@ def process_scene(context, extension, jma_version, game_title, generate_checksum
                 node_list.append(obj)
 
     JMA.node_count = len(node_list)
-    sorted_list = global_functions.sort_list(node_list, armature, game_title, jma_version, True)
-    joined_list = sorted_list[0]
-    reversed_joined_list = sorted_list[1]
+    node_stage = export_profiler.begin_stage("Node sorting")
+    node_hierarchy = global_functions.build_node_hierarchy(node_list, armature, game_title, jma_version, True, use_maya_sorting)
+    joined_list = node_hierarchy.joined_list
+    export_profiler.end_stage(node_stage, len(joined_list))
 
     local_matrices = []
     absolute_matrices = []
@@ -144,55 +138,26 @@ def process_scene(context, extension, jma_version, game_title, generate_checksum
             local_matrices.append(local_matrix)
             absolute_matrices.append(absolute_matrix)
 
-    for node in joined_list:
-        is_bone = False
-        if armature:
-            is_bone = True
-
-        find_child_node = global_functions.get_child(node, reversed_joined_list, game_title, use_maya_sorting)
-        find_sibling_node = global_functions.get_sibling(armature, node, reversed_joined_list, game_title, use_maya_sorting)
-
-        first_child_node = -1
-        first_sibling_node = -1
+    for node_idx, node in enumerate(joined_list):
         parent_node = -1
-
-        if not find_child_node == None:
-            first_child_node = joined_list.index(find_child_node)
-        if not find_sibling_node == None:
-            first_sibling_node = joined_list.index(find_sibling_node)
         if not node.parent == None and not node.parent.name.startswith('!'):
             if armature:
                 if node.parent.use_deform:
-                    parent_node = joined_list.index(node.parent)
+                    parent_node = node_hierarchy.index(node.parent)
             else:
-                parent_node = joined_list.index(node.parent)
+                parent_node = node_hierarchy.index(node.parent)
 
         name = node.name
-        child = first_child_node
-        sibling = first_sibling_node
+        child = node_hierarchy.child_indices[node_idx]
+        sibling = node_hierarchy.sibling_indices[node_idx]
         parent = parent_node
 
-        current_node_children = []
-        children = []
-        for child_node in node.children:
-            if child_node in joined_list:
-                current_node_children.append(child_node.name)
-
-        current_node_children.sort()
-
-        if is_bone:
-            for child_node in current_node_children:
-                children.append(joined_list.index(armature.data.bones[child_node]))
-
-        else:
-            for child_node in current_node_children:
-                children.append(joined_list.index(bpy.data.objects[child_node]))
-
         JMA.nodes.append(JMA.Node(name, parent, child, sibling))
 
     if generate_checksum and len(JMA.nodes) > 0:
         JMA.node_checksum = global_functions.node_hierarchy_checksum(JMA.nodes, JMA.nodes[0], JMA.node_checksum)
 
+    fcurve_dict = {}
     if armature:
         action = None
         fcurves = []
@@ -201,75 +166,50 @@ def process_scene(context, extension, jma_version, game_title, generate_checksum
         if action:
             fcurves = action.fcurves
 
-        fcurve_dict = {}
         for fc in fcurves:
             if fc.data_path.startswith('pose.bones["'):
                 bone_name = fc.data_path.split('"')[1]
                 key = ('bone', bone_name)
                 fcurve_dict.setdefault(key, []).append(fc)
 
-    temp_local_matrices = []
-    for frame in range(first_frame, last_frame):
-        frame_matrices = []
-        for node_idx, node in enumerate(joined_list):
-            local_matrix = global_functions.export_fcurve_data(action, fcurve_dict, armature, node, node_idx, frame, local_matrices)
-            frame_matrices.append(local_matrix)
-        temp_local_matrices.append(frame_matrices)
+    frame_range = range(first_frame, last_frame)
+    sampling_stage = export_profiler.begin_stage("Animation sampling")
+    frame_local_matrices = global_functions.export_fcurve_data_batch(fcurve_dict, armature, joined_list, frame_range, local_matrices)
+    export_profiler.end_stage(sampling_stage, len(frame_range))
+
+    transform_stage = export_profiler.begin_stage("Transform solving")
 
     unordered_map = global_functions.sort_by_parent(JMA.nodes)
-    absolute_matrices = []
-    for frame_matrices in temp_local_matrices:
-        abs_frame = []
-        for node_idx, node in enumerate(JMA.nodes):
-            local_matrix = frame_matrices[unordered_map[node_idx]]
-            if node.parent is not None and node.parent != -1:
-                parent_abs = abs_frame[node.parent]
-                abs_matrix = parent_abs @ local_matrix
-            else:
-                abs_matrix = local_matrix
-            abs_frame.append(abs_matrix)
-        absolute_matrices.append(abs_frame)
+    parent_indices = animation_processing.get_parent_indices(JMA.nodes)
+    absolute_matrices = animation_processing.accumulate_absolute_matrices(frame_local_matrices[:, unordered_map], parent_indices)
 
     if fix_rotations:
-        correction_rot_mat = Matrix.Rotation(radians(90.0), 4, 'Z')
-        for frame_abs in absolute_matrices:
-            for idx, abs_matrix in enumerate(frame_abs):
-                loc, rot, scale = abs_matrix.decompose()
-                rot_mat = rot.to_matrix().to_4x4()
-                corrected_rot_mat = rot_mat @ correction_rot_mat
-                corrected_matrix = Matrix.LocRotScale(loc, corrected_rot_mat.to_quaternion(), scale)
-                frame_abs[idx] = corrected_matrix
+        absolute_matrices = animation_processing.rotate_matrices_z(absolute_matrices, radians(90.0))
 
-    final_transforms = []
+    output_matrices = absolute_matrices
     if jma_version < 16394:
-        for frame_abs in absolute_matrices:
-            local_frame = []
-            for node_idx, node in enumerate(JMA.nodes):
-                if node.parent is not None and node.parent != -1:
-                    parent_matrix = frame_abs[node.parent]
-                    child_matrix = frame_abs[node_idx]
-                    local_matrix = parent_matrix.inverted() @ child_matrix
-                else:
-                    local_matrix = frame_abs[node_idx]  # root node
-
-                bone = joined_list[unordered_map[node_idx]]
-                is_bone = armature and isinstance(bone, bpy.types.Bone)
-                mesh_dimensions = global_functions.get_dimensions(local_matrix, bone, jma_version, is_bone, 'JMA', scale_value)
-                local_frame.append(JMA.Transform(mesh_dimensions.position, mesh_dimensions.quaternion, mesh_dimensions.scale[0]))
-            final_transforms.append(local_frame)
-
-    else:
-        for frame_abs in absolute_matrices:
-            local_frame = []
-            for node_idx, node in enumerate(JMA.nodes):
-                local_matrix = frame_abs[node_idx]
-                bone = joined_list[unordered_map[node_idx]]
-                is_bone = armature and isinstance(bone, bpy.types.Bone)
-                mesh_dimensions = global_functions.get_dimensions(local_matrix, bone, jma_version, is_bone, 'JMA', scale_value)
-                local_frame.append(JMA.Transform(mesh_dimensions.position, mesh_dimensions.quaternion, round(mesh_dimensions.scale[0], 2)))
-            final_transforms.append(local_frame)
+        output_matrices = animation_processing.absolute_to_local_matrices(absolute_matrices, parent_indices)
+
+    translations, rotations, scales = animation_processing.decompose_matrices(output_matrices)
+    if global_functions.invert_rotations('JMA', jma_version):
+        rotations = animation_processing.invert_quaternions(rotations)
+
+    node_scales = scales[..., 0]
+    if jma_version >= 16394:
+        node_scales = np.round(node_scales, 2)
+
+    translations = translations.tolist()
+    rotations = rotations[..., (1, 2, 3, 0)].tolist()
+    node_scales = node_scales.tolist()
+    final_transforms = []
+    for frame_idx in range(len(frame_range)):
+        frame_translations = translations[frame_idx]
+        frame_rotations = rotations[frame_idx]
+        frame_scales = node_scales[frame_idx]
+        final_transforms.append([JMA.Transform(frame_translations[node_idx], frame_rotations[node_idx], frame_scales[node_idx]) for node_idx in range(len(JMA.nodes))])
 
     JMA.transforms = final_transforms
+    export_profiler.end_stage(transform_stage, len(frame_range) * len(JMA.nodes))
 
     armature_transform = False
     if jma_version > 16394 and armature_transform:
@@ -284,8 +224,6 @@ def process_scene(context, extension, jma_version, game_title, generate_checksum
             JMA.biped_controller_transforms.append(JMA.Transform(translation, rotation, scale))
 
     # Restore visibility status for all resources
-    resource_management.restore_collection_visibility(stored_collection_visibility)
-    resource_management.restore_object_visibility(stored_object_visibility)
-    resource_management.restore_modifier_visibility(stored_modifier_visibility)
+    resource_management.release_scene_snapshot(scene_snapshot)
 
     return JMA
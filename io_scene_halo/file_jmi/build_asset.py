@@ -28,7 +28,7 @@ import os
 
 from ..file_jms import export_jms
 from .process_scene import process_scene
-from ..global_functions import resource_management
+from ..global_functions import resource_management, export_profiler
 
 from .format import JMIAsset
 
@@ -43,19 +43,12 @@ def build_asset(
     filename,
     report,
 ):
-    layer_collection_list = []
-    object_list = []
+    export_profile = export_profiler.begin_export_profile("JMI", os.path.join(root_directory, filename))
+    export_profiler.set_output_path(os.path.join(root_directory, filename))
 
-    # Gather all scene resources that fit export criteria
-    resource_management.gather_scene_resources(context, layer_collection_list, object_list, JMS_args.hidden_geo, JMS_args.nonrender_geo)
-
-    # Store visibility for all relevant resources
-    stored_collection_visibility = resource_management.store_collection_visibility(layer_collection_list)
-    stored_object_visibility = resource_management.store_object_visibility(object_list)
-    stored_modifier_visibility = resource_management.store_modifier_visibility(object_list)
-
-    # Unhide all relevant resources for exporting
-    resource_management.unhide_relevant_resources(layer_collection_list, object_list)
+    # Gather all scene resources that fit export criteria and unhide them for exporting
+    scene_snapshot = resource_management.acquire_scene_snapshot(context, JMS_args.hidden_geo, JMS_args.nonrender_geo)
+    object_list = scene_snapshot.object_list
 
     JMI = process_scene(object_list)
     if version >= 8207:
@@ -126,8 +119,8 @@ def build_asset(
         )
 
     # Restore visibility status for all resources
-    resource_management.restore_collection_visibility(stored_collection_visibility)
-    resource_management.restore_object_visibility(stored_object_visibility)
-    resource_management.restore_modifier_visibility(stored_modifier_visibility)
+    resource_management.release_scene_snapshot(scene_snapshot)
+
+    export_profiler.end_export_profile(export_profile, report)
 
     report({'INFO'}, "Export completed successfully")
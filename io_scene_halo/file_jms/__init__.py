@@ -812,6 +812,22 @@ if (4, 1, 0) <= bpy.app.version:
         OperatorFileListElement
         )
 
+class ExportJMSBatch(Operator, ImportHelper):
+    """Write several JMS files described by a JSON manifest using the scene JMS settings"""
+    bl_idname = "export_scene.jms_batch"
+    bl_label = "Batch Export JMS"
+    filename_ext = '.json'
+
+    filter_glob: StringProperty(
+        default="*.json",
+        options={'HIDDEN'},
+        )
+
+    def execute(self, context):
+        from . import export_jms
+
+        return global_functions.run_code("export_jms.write_batch(context, self.filepath, self.report)")
+
 class ImportJMS(Operator, ImportHelper):
     """Import a JMS file"""
     bl_idname = "import_scene.jms"
@@ -937,6 +953,7 @@ if (4, 1, 0) <= bpy.app.version:
 
 def menu_func_export(self, context):
     self.layout.operator(ExportJMS.bl_idname, text="Halo Jointed Model Skeleton (.jms)")
+    self.layout.operator(ExportJMSBatch.bl_idname, text="Halo Jointed Model Skeleton Batch (.json)")
 
 def menu_func_import(self, context):
     self.layout.operator(ImportJMS.bl_idname, text="Halo Jointed Model Skeleton (.jms)")
@@ -947,7 +964,8 @@ classeshalo = [
     JMS_PhysicsPropertiesGroup,
     JMS_PhysicsProps,
     ImportJMS,
-    ExportJMS
+    ExportJMS,
+    ExportJMSBatch
 ]
 
 if (4, 1, 0) <= bpy.app.version:
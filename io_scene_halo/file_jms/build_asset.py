@@ -28,7 +28,7 @@ import os
 import struct
 
 from .process_scene import process_scene
-from ..global_functions import global_functions
+from ..global_functions import global_functions, export_formatting, export_profiler
 
 DECIMAL_POINT = "6"
 DECIMAL_1 = '\n%0.{decimal_point}f'.format(decimal_point=DECIMAL_POINT)
@@ -36,6 +36,28 @@ DECIMAL_2 = '\n%0.{decimal_point}f\t%0.{decimal_point}f'.format(decimal_point=DE
 DECIMAL_3 = '\n%0.{decimal_point}f\t%0.{decimal_point}f\t%0.{decimal_point}f'.format(decimal_point=DECIMAL_POINT)
 DECIMAL_4 = '\n%0.{decimal_point}f\t%0.{decimal_point}f\t%0.{decimal_point}f\t%0.{decimal_point}f'.format(decimal_point=DECIMAL_POINT)
 
+def get_node_values(vertex, node_count):
+    node_values = ()
+    for node_idx in range(node_count):
+        node = (int(-1), float(0.0))
+        if len(vertex.node_set) > node_idx:
+            node = vertex.node_set[node_idx]
+
+        node_values += (node[0], node[1])
+
+    return node_values
+
+def get_uv_values(vertex, uv_count):
+    uv_values = (vertex.uv_set[0][0], vertex.uv_set[0][1])
+    for uv_idx in range(1, uv_count):
+        uv = (0.0, 0.0)
+        if len(vertex.uv_set) > uv_idx:
+            uv = vertex.uv_set[uv_idx]
+
+        uv_values += (uv[0], uv[1])
+
+    return uv_values
+
 def write_version(file, jms_version, version_bounds, binary, write_comments=False, write_whitespace=False):
     if binary:
         file.write(struct.pack('<i', jms_version))
@@ -683,32 +705,24 @@ def write_vertices_8197(file, JMS, binary, write_comments=False, write_whitespac
             if write_whitespace:
                 file.write('\n')
 
-        for idx, vertex in enumerate(JMS.vertices):
-            if write_comments:
-                file.write('\n;VERTEX %s' % idx)
+        row_format = '\n%s\n%s' + DECIMAL_3 + DECIMAL_3 + '\n%s' + DECIMAL_1 + DECIMAL_2
+        if write_comments:
+            row_format = '\n;VERTEX %s' + row_format
 
-            node0 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 0:
-                node0 = vertex.node_set[0]
+        if write_whitespace:
+            row_format += '\n'
 
-            node1 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 1:
-                node1 = vertex.node_set[1]
+        rows = []
+        for idx, vertex in enumerate(JMS.vertices):
+            node_values = get_node_values(vertex, 2)
+            row_values = (vertex.region, node_values[0]) + tuple(vertex.translation) + tuple(vertex.normal) + node_values[2:4] + get_uv_values(vertex, 1)
+            if write_comments:
+                row_values = (idx,) + row_values
 
-            node0_index = node0[0]
+            rows.append((row_format, row_values))
 
-            node1_index = node1[0]
-            node1_weight = node1[1]
+        export_formatting.write_rows(file, rows)
 
-            file.write('\n%s' % vertex.region)
-            file.write('\n%s' % node0_index)
-            file.write(DECIMAL_3 % (vertex.translation[0], vertex.translation[1], vertex.translation[2]))
-            file.write(DECIMAL_3 % (vertex.normal[0], vertex.normal[1], vertex.normal[2]))
-            file.write('\n%s' % node1_index)
-            file.write(DECIMAL_1 % node1_weight)
-            file.write(DECIMAL_2 % (vertex.uv_set[0][0], vertex.uv_set[0][1]))
-            if write_whitespace:
-                file.write('\n')
 
 def write_vertices_8198(file, JMS, binary, write_comments=False, write_whitespace=False):
     if binary:
@@ -751,32 +765,24 @@ def write_vertices_8198(file, JMS, binary, write_comments=False, write_whitespac
             if write_whitespace:
                 file.write('\n')
 
-        for idx, vertex in enumerate(JMS.vertices):
-            if write_comments:
-                file.write('\n;VERTEX %s' % idx)
+        row_format = '\n%s' + DECIMAL_3 + DECIMAL_3 + '\n%s' + DECIMAL_1 + DECIMAL_2 + '\n0'
+        if write_comments:
+            row_format = '\n;VERTEX %s' + row_format
 
-            node0 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 0:
-                node0 = vertex.node_set[0]
+        if write_whitespace:
+            row_format += '\n'
 
-            node1 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 1:
-                node1 = vertex.node_set[1]
+        rows = []
+        for idx, vertex in enumerate(JMS.vertices):
+            node_values = get_node_values(vertex, 2)
+            row_values = node_values[0:1] + tuple(vertex.translation) + tuple(vertex.normal) + node_values[2:4] + get_uv_values(vertex, 1)
+            if write_comments:
+                row_values = (idx,) + row_values
 
-            node0_index = node0[0]
+            rows.append((row_format, row_values))
 
-            node1_index = node1[0]
-            node1_weight = node1[1]
+        export_formatting.write_rows(file, rows)
 
-            file.write('\n%s' % node0_index)
-            file.write(DECIMAL_3 % (vertex.translation[0], vertex.translation[1], vertex.translation[2]))
-            file.write(DECIMAL_3 % (vertex.normal[0], vertex.normal[1], vertex.normal[2]))
-            file.write('\n%s' % node1_index)
-            file.write(DECIMAL_1 % node1_weight)
-            file.write(DECIMAL_2 % (vertex.uv_set[0][0], vertex.uv_set[0][1]))
-            file.write('\n%s' % 0)
-            if write_whitespace:
-                file.write('\n')
 
 def write_vertices_8199(file, JMS, binary, write_comments=False, write_whitespace=False):
     if binary:
@@ -819,32 +825,24 @@ def write_vertices_8199(file, JMS, binary, write_comments=False, write_whitespac
             if write_whitespace:
                 file.write('\n')
 
+        row_format = '\n%s' + DECIMAL_3 + DECIMAL_3 + '\n%s' + DECIMAL_1 + DECIMAL_2 + '\n0'
+        if write_comments:
+            row_format = '\n;VERTEX %s' + row_format
+
+        if write_whitespace:
+            row_format += '\n'
+
+        rows = []
         for idx, vertex in enumerate(JMS.vertices):
+            node_values = get_node_values(vertex, 2)
+            row_values = node_values[0:1] + tuple(vertex.translation) + tuple(vertex.normal) + node_values[2:4] + get_uv_values(vertex, 1)
             if write_comments:
-                file.write('\n;VERTEX %s' % idx)
+                row_values = (idx,) + row_values
 
-            node0 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 0:
-                node0 = vertex.node_set[0]
-
-            node1 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 1:
-                node1 = vertex.node_set[1]
+            rows.append((row_format, row_values))
 
-            node0_index = node0[0]
+        export_formatting.write_rows(file, rows)
 
-            node1_index = node1[0]
-            node1_weight = node1[1]
-
-            file.write('\n%s' % node0_index)
-            file.write(DECIMAL_3 % (vertex.translation[0], vertex.translation[1], vertex.translation[2]))
-            file.write(DECIMAL_3 % (vertex.normal[0], vertex.normal[1], vertex.normal[2]))
-            file.write('\n%s' % node1_index)
-            file.write(DECIMAL_1 % node1_weight)
-            file.write(DECIMAL_2 % (vertex.uv_set[0][0], vertex.uv_set[0][1]))
-            file.write('\n%s' % 0)
-            if write_whitespace:
-                file.write('\n')
 
 def write_vertices_8201(file, JMS, binary, write_comments=False, write_whitespace=False):
     if binary:
@@ -877,29 +875,18 @@ def write_vertices_8201(file, JMS, binary, write_comments=False, write_whitespac
             file.write('\n;###Vertices###')
 
         file.write('\n%s' % (len(JMS.vertices)))
-        for idx, vertex in enumerate(JMS.vertices):
-            node0 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 0:
-                node0 = vertex.node_set[0]
-
-            node1 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 1:
-                node1 = vertex.node_set[1]
+        row_format = '\n%s' + DECIMAL_3 + DECIMAL_3 + '\n%s' + DECIMAL_1 + DECIMAL_2 + '\n0'
+        if write_whitespace:
+            row_format += '\n'
 
-            node0_index = node0[0]
+        rows = []
+        for idx, vertex in enumerate(JMS.vertices):
+            node_values = get_node_values(vertex, 2)
+            row_values = node_values[0:1] + tuple(vertex.translation) + tuple(vertex.normal) + node_values[2:4] + get_uv_values(vertex, 1)
+            rows.append((row_format, row_values))
 
-            node1_index = node1[0]
-            node1_weight = node1[1]
+        export_formatting.write_rows(file, rows)
 
-            file.write('\n%s' % node0_index)
-            file.write(DECIMAL_3 % (vertex.translation[0], vertex.translation[1], vertex.translation[2]))
-            file.write(DECIMAL_3 % (vertex.normal[0], vertex.normal[1], vertex.normal[2]))
-            file.write('\n%s' % node1_index)
-            file.write(DECIMAL_1 % node1_weight)
-            file.write(DECIMAL_2 % (vertex.uv_set[0][0], vertex.uv_set[0][1]))
-            file.write('\n%s' % 0)
-            if write_whitespace:
-                file.write('\n')
 
 def write_vertices_8202(file, JMS, binary, write_comments=False, write_whitespace=False):
     if binary:
@@ -963,60 +950,18 @@ def write_vertices_8202(file, JMS, binary, write_comments=False, write_whitespac
             file.write('\n;###Vertices###')
 
         file.write('\n%s' % (len(JMS.vertices)))
-        for idx, vertex in enumerate(JMS.vertices):
-            node0 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 0:
-                node0 = vertex.node_set[0]
-
-            node1 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 1:
-                node1 = vertex.node_set[1]
-
-            node0_index = node0[0]
-
-            node1_index = node1[0]
-            node1_weight = node1[1]
-
-            uv_0 = vertex.uv_set[0]
-            tex_u_0 = uv_0[0]
-            tex_v_0 = uv_0[1]
-
-            uv_1 = None
-            tex_u_1 = 0.0
-            tex_v_1 = 0.0
-            if len(vertex.uv_set) > 1:
-                uv_1 = vertex.uv_set[1]
-                tex_u_1 = uv_1[0]
-                tex_v_1 = uv_1[1]
+        row_format = '\n%s' + DECIMAL_3 + DECIMAL_3 + '\n%s' + DECIMAL_1 + (DECIMAL_2 * 4) + '\n0'
+        if write_whitespace:
+            row_format += '\n'
 
-            uv_2 = None
-            tex_u_2 = 0.0
-            tex_v_2 = 0.0
-            if len(vertex.uv_set) > 2:
-                uv_2 = vertex.uv_set[2]
-                tex_u_2 = uv_2[0]
-                tex_v_2 = uv_2[1]
+        rows = []
+        for idx, vertex in enumerate(JMS.vertices):
+            node_values = get_node_values(vertex, 2)
+            row_values = node_values[0:1] + tuple(vertex.translation) + tuple(vertex.normal) + node_values[2:4] + get_uv_values(vertex, 4)
+            rows.append((row_format, row_values))
 
-            uv_3 = None
-            tex_u_3 = 0.0
-            tex_v_3 = 0.0
-            if len(vertex.uv_set) > 3:
-                uv_3 = vertex.uv_set[3]
-                tex_u_3 = uv_3[0]
-                tex_v_3 = uv_3[1]
+        export_formatting.write_rows(file, rows)
 
-            file.write('\n%s' % node0_index)
-            file.write(DECIMAL_3 % (vertex.translation[0], vertex.translation[1], vertex.translation[2]))
-            file.write(DECIMAL_3 % (vertex.normal[0], vertex.normal[1], vertex.normal[2]))
-            file.write('\n%s' % node1_index)
-            file.write(DECIMAL_1 % node1_weight)
-            file.write(DECIMAL_2 % (tex_u_0, tex_v_0))
-            file.write(DECIMAL_2 % (tex_u_1, tex_v_1))
-            file.write(DECIMAL_2 % (tex_u_2, tex_v_2))
-            file.write(DECIMAL_2 % (tex_u_3, tex_v_3))
-            file.write('\n%s' % 0)
-            if write_whitespace:
-                file.write('\n')
 
 def write_vertices_8204(file, JMS, binary, write_comments=False, write_whitespace=False):
     if binary:
@@ -1100,80 +1045,18 @@ def write_vertices_8204(file, JMS, binary, write_comments=False, write_whitespac
             file.write('\n;###Vertices###')
 
         file.write('\n%s' % (len(JMS.vertices)))
-        for idx, vertex in enumerate(JMS.vertices):
-            node0 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 0:
-                node0 = vertex.node_set[0]
-
-            node1 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 1:
-                node1 = vertex.node_set[1]
-
-            node2 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 2:
-                node2 = vertex.node_set[2]
-
-            node3 = (int(-1), float(0.0))
-            if len(vertex.node_set) > 3:
-                node3 = vertex.node_set[3]
-
-            node0_index = node0[0]
-            node0_weight = node0[1]
-
-            node1_index = node1[0]
-            node1_weight = node1[1]
-
-            node2_index = node2[0]
-            node2_weight = node2[1]
-
-            node3_index = node3[0]
-            node3_weight = node3[1]
+        row_format = '\n%s' + DECIMAL_1 + DECIMAL_3 + DECIMAL_3 + (('\n%s' + DECIMAL_1) * 3) + (DECIMAL_2 * 4) + '\n0'
+        if write_whitespace:
+            row_format += '\n'
 
-            uv_0 = vertex.uv_set[0]
-            tex_u_0 = uv_0[0]
-            tex_v_0 = uv_0[1]
+        rows = []
+        for idx, vertex in enumerate(JMS.vertices):
+            node_values = get_node_values(vertex, 4)
+            row_values = node_values[0:2] + tuple(vertex.translation) + tuple(vertex.normal) + node_values[2:8] + get_uv_values(vertex, 4)
+            rows.append((row_format, row_values))
 
-            uv_1 = None
-            tex_u_1 = 0.0
-            tex_v_1 = 0.0
-            if len(vertex.uv_set) > 1:
-                uv_1 = vertex.uv_set[1]
-                tex_u_1 = uv_1[0]
-                tex_v_1 = uv_1[1]
+        export_formatting.write_rows(file, rows)
 
-            uv_2 = None
-            tex_u_2 = 0.0
-            tex_v_2 = 0.0
-            if len(vertex.uv_set) > 2:
-                uv_2 = vertex.uv_set[2]
-                tex_u_2 = uv_2[0]
-                tex_v_2 = uv_2[1]
-
-            uv_3 = None
-            tex_u_3 = 0.0
-            tex_v_3 = 0.0
-            if len(vertex.uv_set) > 3:
-                uv_3 = vertex.uv_set[3]
-                tex_u_3 = uv_3[0]
-                tex_v_3 = uv_3[1]
-
-            file.write('\n%s' % node0_index)
-            file.write(DECIMAL_1 % node0_weight)
-            file.write(DECIMAL_3 % (vertex.translation[0], vertex.translation[1], vertex.translation[2]))
-            file.write(DECIMAL_3 % (vertex.normal[0], vertex.normal[1], vertex.normal[2]))
-            file.write('\n%s' % node1_index)
-            file.write(DECIMAL_1 % node1_weight)
-            file.write('\n%s' % node2_index)
-            file.write(DECIMAL_1 % node2_weight)
-            file.write('\n%s' % node3_index)
-            file.write(DECIMAL_1 % node3_weight)
-            file.write(DECIMAL_2 % (tex_u_0, tex_v_0))
-            file.write(DECIMAL_2 % (tex_u_1, tex_v_1))
-            file.write(DECIMAL_2 % (tex_u_2, tex_v_2))
-            file.write(DECIMAL_2 % (tex_u_3, tex_v_3))
-            file.write('\n%s' % 0)
-            if write_whitespace:
-                file.write('\n')
 
 def write_vertices_8205(file, JMS, binary, write_comments=False, write_whitespace=False):
     if binary:
@@ -1209,25 +1092,29 @@ def write_vertices_8205(file, JMS, binary, write_comments=False, write_whitespac
             if write_whitespace:
                 file.write('\n')
 
+        row_formats = {}
+        rows = []
         for idx, vertex in enumerate(JMS.vertices):
+            format_key = (len(vertex.node_set), len(vertex.uv_set))
+            row_format = row_formats.get(format_key)
+            if row_format is None:
+                row_format = DECIMAL_3 + DECIMAL_3 + '\n%s' + (('\n%s' + DECIMAL_1) * format_key[0]) + '\n%s' + (DECIMAL_2 * format_key[1])
+                if write_comments:
+                    row_format = '\n;VERTEX %s' + row_format
+
+                if write_whitespace:
+                    row_format += '\n'
+
+                row_formats[format_key] = row_format
+
+            row_values = tuple(vertex.translation) + tuple(vertex.normal) + (format_key[0],) + tuple(value for node in vertex.node_set for value in node) + (format_key[1],) + tuple(value for uv in vertex.uv_set for value in uv)
             if write_comments:
-                file.write('\n;VERTEX %s' % idx)
-            
-            file.write(DECIMAL_3 % (vertex.translation[0], vertex.translation[1], vertex.translation[2]))
-            file.write(DECIMAL_3 % (vertex.normal[0], vertex.normal[1], vertex.normal[2]))
-            file.write('\n%s' % len(vertex.node_set))
-            for node in vertex.node_set:
-                node_index, node_weight = node
-                file.write('\n%s' % (node_index))
-                file.write(DECIMAL_1 % (node_weight))
+                row_values = (idx,) + row_values
 
-            file.write('\n%s' % len(vertex.uv_set))
-            for uv in vertex.uv_set:
-                uv_0, uv_1 = uv
-                file.write(DECIMAL_2 % (uv_0, uv_1))
+            rows.append((row_format, row_values))
+
+        export_formatting.write_rows(file, rows)
 
-            if write_whitespace:
-                file.write('\n')
 
 def write_vertices_8211(file, JMS, binary, write_comments=False, write_whitespace=False):
     if binary:
@@ -1265,26 +1152,29 @@ def write_vertices_8211(file, JMS, binary, write_comments=False, write_whitespac
             if write_whitespace:
                 file.write('\n')
 
+        row_formats = {}
+        rows = []
         for idx, vertex in enumerate(JMS.vertices):
+            format_key = (len(vertex.node_set), len(vertex.uv_set))
+            row_format = row_formats.get(format_key)
+            if row_format is None:
+                row_format = DECIMAL_3 + DECIMAL_3 + '\n%s' + (('\n%s' + DECIMAL_1) * format_key[0]) + '\n%s' + (DECIMAL_2 * format_key[1]) + DECIMAL_3
+                if write_comments:
+                    row_format = '\n;VERTEX %s' + row_format
+
+                if write_whitespace:
+                    row_format += '\n'
+
+                row_formats[format_key] = row_format
+
+            row_values = tuple(vertex.translation) + tuple(vertex.normal) + (format_key[0],) + tuple(value for node in vertex.node_set for value in node) + (format_key[1],) + tuple(value for uv in vertex.uv_set for value in uv) + tuple(vertex.color[0:3])
             if write_comments:
-                file.write('\n;VERTEX %s' % idx)
-            
-            file.write(DECIMAL_3 % (vertex.translation[0], vertex.translation[1], vertex.translation[2]))
-            file.write(DECIMAL_3 % (vertex.normal[0], vertex.normal[1], vertex.normal[2]))
-            file.write('\n%s' % len(vertex.node_set))
-            for node in vertex.node_set:
-                node_index, node_weight = node
-                file.write('\n%s' % (node_index))
-                file.write(DECIMAL_1 % (node_weight))
+                row_values = (idx,) + row_values
 
-            file.write('\n%s' % len(vertex.uv_set))
-            for uv in vertex.uv_set:
-                uv_0, uv_1 = uv
-                file.write(DECIMAL_2 % (uv_0, uv_1))
+            rows.append((row_format, row_values))
+
+        export_formatting.write_rows(file, rows)
 
-            file.write(DECIMAL_3 % (vertex.color[0], vertex.color[1], vertex.color[2]))
-            if write_whitespace:
-                file.write('\n')
 
 def write_triangles_8197(file, JMS, binary, write_comments=False, write_whitespace=False):
     if binary:
@@ -1304,14 +1194,23 @@ def write_triangles_8197(file, JMS, binary, write_comments=False, write_whitespa
             if write_whitespace:
                 file.write('\n')
 
+        row_format = '\n%s\n%s\t%s\t%s'
+        if write_comments:
+            row_format = '\n;TRIANGLE %s' + row_format
+
+        if write_whitespace:
+            row_format += '\n'
+
+        rows = []
         for idx, triangle in enumerate(JMS.triangles):
+            row_values = (triangle.material_index,) + (triangle.v0, triangle.v1, triangle.v2)
             if write_comments:
-                file.write('\n;TRIANGLE %s' % idx)
+                row_values = (idx,) + row_values
+
+            rows.append((row_format, row_values))
+
+        export_formatting.write_rows(file, rows)
 
-            file.write('\n%s' % triangle.material_index)
-            file.write('\n%s\t%s\t%s' % (triangle.v0, triangle.v1, triangle.v2))
-            if write_whitespace:
-                file.write('\n')
 
 def write_triangles_8198(file, JMS, binary, write_comments=False, write_whitespace=False):
     if binary:
@@ -1333,15 +1232,23 @@ def write_triangles_8198(file, JMS, binary, write_comments=False, write_whitespa
             if write_whitespace:
                 file.write('\n')
 
+        row_format = '\n%s\n%s\n%s\t%s\t%s'
+        if write_comments:
+            row_format = '\n;TRIANGLE %s' + row_format
+
+        if write_whitespace:
+            row_format += '\n'
+
+        rows = []
         for idx, triangle in enumerate(JMS.triangles):
+            row_values = (triangle.region, triangle.material_index) + (triangle.v0, triangle.v1, triangle.v2)
             if write_comments:
-                file.write('\n;TRIANGLE %s' % idx)
+                row_values = (idx,) + row_values
+
+            rows.append((row_format, row_values))
+
+        export_formatting.write_rows(file, rows)
 
-            file.write('\n%s' % triangle.region)
-            file.write('\n%s' % triangle.material_index)
-            file.write('\n%s\t%s\t%s' % (triangle.v0, triangle.v1, triangle.v2))
-            if write_whitespace:
-                file.write('\n')
 
 def write_triangles_8201(file, JMS, binary, write_comments=False, write_whitespace=False):
     if binary:
@@ -1357,12 +1264,17 @@ def write_triangles_8201(file, JMS, binary, write_comments=False, write_whitespa
             file.write('\n;###Faces###')
 
         file.write('\n%s' % (len(JMS.triangles)))
+        row_format = '\n%s\n%s\n%s\t%s\t%s'
+        if write_whitespace:
+            row_format += '\n'
+
+        rows = []
         for idx, triangle in enumerate(JMS.triangles):
-            file.write('\n%s' % triangle.region)
-            file.write('\n%s' % triangle.material_index)
-            file.write('\n%s\t%s\t%s' % (triangle.v0, triangle.v1, triangle.v2))
-            if write_whitespace:
-                file.write('\n')
+            row_values = (triangle.region, triangle.material_index) + (triangle.v0, triangle.v1, triangle.v2)
+            rows.append((row_format, row_values))
+
+        export_formatting.write_rows(file, rows)
+
 
 def write_triangles_8205(file, JMS, binary, write_comments=False, write_whitespace=False):
     if binary:
@@ -1382,14 +1294,23 @@ def write_triangles_8205(file, JMS, binary, write_comments=False, write_whitespa
             if write_whitespace:
                 file.write('\n')
 
+        row_format = '\n%s\n%s\t%s\t%s'
+        if write_comments:
+            row_format = '\n;TRIANGLE %s' + row_format
+
+        if write_whitespace:
+            row_format += '\n'
+
+        rows = []
         for idx, triangle in enumerate(JMS.triangles):
+            row_values = (triangle.material_index,) + (triangle.v0, triangle.v1, triangle.v2)
             if write_comments:
-                file.write('\n;TRIANGLE %s' % idx)
+                row_values = (idx,) + row_values
+
+            rows.append((row_format, row_values))
+
+        export_formatting.write_rows(file, rows)
 
-            file.write('\n%s' % triangle.material_index)
-            file.write('\n%s\t%s\t%s' % (triangle.v0, triangle.v1, triangle.v2))
-            if write_whitespace:
-                file.write('\n')
 
 def write_spheres_8206(file, JMS, binary, write_comments=False, write_whitespace=False):
     if binary:
@@ -2137,6 +2058,8 @@ def update_decimal():
 def build_asset(context, blend_scene, filepath, jms_version, game_title, generate_checksum, fix_rotations, use_maya_sorting, folder_structure, folder_type, model_type, is_jmi, permutation_ce, level_of_detail_ce, custom_scale, loop_normals, write_textures, report):
     JMS = process_scene(context, jms_version, game_title, generate_checksum, fix_rotations, use_maya_sorting, model_type, blend_scene, custom_scale, loop_normals, write_textures)
 
+    write_stage = export_profiler.begin_stage("File writing")
+
     binary = False
 
     version_bounds = '8197-8200'
@@ -2148,6 +2071,7 @@ def build_asset(context, blend_scene, filepath, jms_version, game_title, generat
     filename = global_functions.get_filename(game_title, permutation_ce, level_of_detail_ce, folder_structure, model_type, False, filepath)
     root_directory = global_functions.get_directory(context, game_title, model_type, folder_structure, folder_type, is_jmi, filepath)
     output_path = os.path.join(root_directory, filename)
+    export_profiler.set_output_path(output_path)
     if binary:
         file = open(output_path + "B", 'wb')
         file.write(struct.pack('<4s', bytes("IMBF", 'utf-8')))
@@ -2450,3 +2374,4 @@ def build_asset(context, blend_scene, filepath, jms_version, game_title, generat
 
     report({'INFO'}, "Export completed successfully")
     file.close()
+    export_profiler.end_stage(write_stage, len(JMS.vertices) + len(JMS.triangles))
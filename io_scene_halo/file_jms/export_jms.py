@@ -26,9 +26,10 @@
 
 import os
 import bpy
+import json
 
 from .build_asset import build_asset
-from ..global_functions import mesh_processing, global_functions, resource_management, scene_validation
+from ..global_functions import mesh_processing, global_functions, resource_management, scene_validation, export_profiler
 from ..global_functions.global_functions import ModelTypeEnum
 
 def write_file(context,
@@ -56,22 +57,16 @@ def write_file(context,
                scale_value,
                report):
 
-    layer_collection_list = []
-    object_list = []
+    export_profile = export_profiler.begin_export_profile("JMS", filepath)
 
     if not context.view_layer.objects.active == None:
         bpy.ops.object.mode_set(mode='OBJECT')
 
-    # Gather all scene resources that fit export criteria
-    resource_management.gather_scene_resources(context, layer_collection_list, object_list, hidden_geo, nonrender_geo)
-
-    # Store visibility for all relevant resources
-    stored_collection_visibility = resource_management.store_collection_visibility(layer_collection_list)
-    stored_object_visibility = resource_management.store_object_visibility(object_list)
-    stored_modifier_visibility = resource_management.store_modifier_visibility(object_list)
-
-    # Unhide all relevant resources for exporting
-    resource_management.unhide_relevant_resources(layer_collection_list, object_list)
+    # Gather all scene resources that fit export criteria and unhide them for exporting
+    gather_stage = export_profiler.begin_stage("Scene gathering")
+    scene_snapshot = resource_management.acquire_scene_snapshot(context, hidden_geo, nonrender_geo)
+    object_list = scene_snapshot.object_list
+    export_profiler.end_stage(gather_stage, len(object_list))
 
     # Execute export
     export_result = command_queue(False,
@@ -102,12 +97,139 @@ def write_file(context,
                                   report)
 
     # Restore visibility status for all resources
-    resource_management.restore_collection_visibility(stored_collection_visibility)
-    resource_management.restore_object_visibility(stored_object_visibility)
-    resource_management.restore_modifier_visibility(stored_modifier_visibility)
+    resource_management.release_scene_snapshot(scene_snapshot)
+
+    export_profiler.end_export_profile(export_profile, report)
 
     return export_result
 
+class BatchExportCache():
+    def __init__(self):
+        self.prepared_objects = set()
+        self.node_hierarchies = {}
+        self.mesh_export_caches = {}
+        self.reported_meshes = set()
+
+MODEL_TYPES = {'render': 'export_render', 'collision': 'export_collision', 'physics': 'export_physics'}
+
+def get_batch_entry_objects(object_list, collection_names):
+    object_set = set(object_list)
+    collections = set()
+    for collection_name in collection_names:
+        collection = bpy.data.collections.get(collection_name)
+        if collection is None:
+            raise global_functions.ParseError("Batch manifest references collection %s which does not exist." % collection_name)
+
+        collections.add(collection)
+        collections.update(collection.children_recursive)
+
+    entry_objects = []
+    entry_object_set = set()
+    for obj in object_list:
+        if not collections.isdisjoint(obj.users_collection):
+            # Nodes usually live in their own collection so pull in every exportable ancestor as well.
+            current = obj
+            while current and current in object_set and not current in entry_object_set:
+                entry_object_set.add(current)
+                current = current.parent
+
+    for obj in object_list:
+        if obj in entry_object_set:
+            entry_objects.append(obj)
+
+    return entry_objects
+
+def read_batch_manifest(manifest_path):
+    ''' {"entries": [{"collections": [...], "filepath": "...", "model_types": ["render", "collision", "physics"], "permutation": "...", "lod": "0"}]} '''
+
+    try:
+        with open(manifest_path, 'r', encoding='utf_8') as manifest_file:
+            manifest = json.load(manifest_file)
+
+    except (OSError, ValueError) as error:
+        raise global_functions.ParseError("Could not read batch manifest: %s" % error)
+
+    entries = manifest.get("entries") if isinstance(manifest, dict) else None
+    if not entries:
+        raise global_functions.ParseError("Batch manifest has no entries.")
+
+    manifest_directory = os.path.dirname(manifest_path)
+    batch_entries = []
+    for entry_idx, entry in enumerate(entries):
+        collection_names = entry.get("collections", [])
+        filepath = entry.get("filepath")
+        if not collection_names or not filepath:
+            raise global_functions.ParseError("Batch manifest entry %s needs a collections list and a filepath." % entry_idx)
+
+        model_types = entry.get("model_types", list(MODEL_TYPES.keys()))
+        for model_type in model_types:
+            if not model_type in MODEL_TYPES:
+                raise global_functions.ParseError("Batch manifest entry %s has an unknown model type %s. Choose from render, collision or physics." % (entry_idx, model_type))
+
+        batch_entries.append((collection_names,
+                              os.path.join(manifest_directory, filepath),
+                              model_types,
+                              entry.get("permutation", ""),
+                              str(entry.get("lod", "0"))))
+
+    return batch_entries
+
+def write_batch(context, manifest_path, report):
+    scene_jms = context.scene.jms
+    game_title = scene_jms.game_title
+    jms_version = int(scene_jms.jms_version)
+    folder_type = bool(int(scene_jms.folder_type))
+    scale_value = global_functions.set_scale(scene_jms.scale_enum, scene_jms.scale_float)
+    edge_split = global_functions.EdgeSplit(scene_jms.edge_split, scene_jms.use_edge_angle, scene_jms.split_angle, scene_jms.use_edge_sharp)
+
+    batch_entries = read_batch_manifest(manifest_path)
+
+    export_profile = export_profiler.begin_export_profile("JMS batch", manifest_path)
+
+    if not context.view_layer.objects.active == None:
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    # Every entry shares one scene snapshot and one set of evaluated meshes
+    scene_snapshot = resource_management.acquire_scene_snapshot(context, scene_jms.hidden_geo, scene_jms.nonrender_geo)
+    batch_cache = BatchExportCache()
+    for collection_names, filepath, model_types, permutation_ce, level_of_detail_ce in batch_entries:
+        object_set = get_batch_entry_objects(scene_snapshot.object_list, collection_names)
+        command_queue(False,
+                      context,
+                      object_set,
+                      filepath,
+                      game_title,
+                      jms_version,
+                      permutation_ce,
+                      level_of_detail_ce,
+                      scene_jms.generate_checksum,
+                      scene_jms.folder_structure,
+                      scene_jms.write_textures,
+                      scene_jms.hidden_geo,
+                      scene_jms.nonrender_geo,
+                      'render' in model_types,
+                      'collision' in model_types,
+                      'physics' in model_types,
+                      scene_jms.apply_modifiers,
+                      scene_jms.triangulate_faces,
+                      scene_jms.loop_normals,
+                      scene_jms.clean_normalize_weights,
+                      edge_split,
+                      scene_jms.fix_rotations,
+                      scene_jms.use_maya_sorting,
+                      folder_type,
+                      scale_value,
+                      report,
+                      batch_cache)
+
+    resource_management.release_scene_snapshot(scene_snapshot)
+
+    export_profiler.end_export_profile(export_profile, report)
+
+    report({'INFO'}, "Batch export of %s entries completed successfully" % len(batch_entries))
+
+    return {'FINISHED'}
+
 def command_queue(is_jmi,
                   context,
                   object_set,
@@ -133,7 +255,8 @@ def command_queue(is_jmi,
                   use_maya_sorting,
                   folder_type,
                   scale_value,
-                  report):
+                  report,
+                  batch_cache=None):
 
     node_prefix_tuple = ('b ', 'b_', 'bone', 'frame', 'bip01')
     limit_value = 0.00000000009
@@ -168,13 +291,22 @@ def command_queue(is_jmi,
 
     level_of_detail_ce = mesh_processing.get_lod(level_of_detail_ce, game_title)
 
+    modifier_stage = export_profiler.begin_stage("Modifier application")
     for obj in object_set:
+        if batch_cache is not None:
+            if obj in batch_cache.prepared_objects:
+                continue
+
+            batch_cache.prepared_objects.add(obj)
+
         if obj.type== 'MESH':
             if clean_normalize_weights:
                 mesh_processing.vertex_group_clean_normalize(context, obj, limit_value)
 
             if apply_modifiers:
-                mesh_processing.add_modifier(context, obj, triangulate_faces, edge_split, None)
+                mesh_processing.add_modifier(context, obj, False, edge_split, None)
+
+    export_profiler.end_stage(modifier_stage, len(object_set))
 
     depsgraph = context.evaluated_depsgraph_get()
     for obj in object_set:
@@ -225,14 +357,7 @@ def command_queue(is_jmi,
             if export_collision:
                 if obj.parent and (obj.parent.type == 'ARMATURE' or parent_name.startswith(node_prefix_tuple)):
                     collision_count += 1
-                    if apply_modifiers:
-                        obj_for_convert = obj.evaluated_get(depsgraph)
-                        evaluted_mesh = obj_for_convert.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
-
-                    else:
-                        evaluted_mesh = obj.to_mesh(preserve_all_data_layers=True)
-
-                    collision_geometry_list.append((evaluted_mesh, obj))
+                    collision_geometry_list.append((None, obj))
 
         elif name[0:1] == '$' and not game_title == "halo1" and jms_version > 8205:
             if export_physics:
@@ -291,18 +416,30 @@ def command_queue(is_jmi,
                 elif len(obj.data.polygons) > 0:
                     if obj.parent and (obj.parent.type == 'ARMATURE' or parent_name.startswith(node_prefix_tuple)):
                         render_count += 1
-                        if apply_modifiers:
-                            obj_for_convert = obj.evaluated_get(depsgraph)
-                            evaluted_mesh = obj_for_convert.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
+                        render_geometry_list.append((None, obj))
 
-                        else:
-                            evaluted_mesh = obj.to_mesh(preserve_all_data_layers=True)
+    blend_scene = global_functions.BlendScene(world_node_count, armature_count, mesh_frame_count, render_count, collision_count, physics_count, armature, node_list, render_marker_list, collision_marker_list, physics_marker_list, marker_list, xref_instances, instance_markers, render_geometry_list, collision_geometry_list, sphere_list, box_list, capsule_list, convex_shape_list, ragdoll_list, hinge_list, car_wheel_list, point_to_point_list, prismatic_list, bounding_sphere_list, skylight_list, None, apply_modifiers and triangulate_faces, apply_modifiers)
 
-                        render_geometry_list.append((evaluted_mesh, obj))
+    validation_stage = export_profiler.begin_stage("Scene validation")
+    scene_validation.validate_halo_jms_scene(game_title, jms_version, blend_scene, object_set, is_jmi)
+    export_profiler.end_stage(validation_stage, len(object_set))
 
-    blend_scene = global_functions.BlendScene(world_node_count, armature_count, mesh_frame_count, render_count, collision_count, physics_count, armature, node_list, render_marker_list, collision_marker_list, physics_marker_list, marker_list, xref_instances, instance_markers, render_geometry_list, collision_geometry_list, sphere_list, box_list, capsule_list, convex_shape_list, ragdoll_list, hinge_list, car_wheel_list, point_to_point_list, prismatic_list, bounding_sphere_list, skylight_list)
+    # Node order only depends on the scene so every model type shares the same hierarchy index.
+    node_stage = export_profiler.begin_stage("Node sorting")
+    if batch_cache is None:
+        blend_scene.node_hierarchy = global_functions.build_node_hierarchy(node_list, armature, game_title, jms_version, False, use_maya_sorting)
 
-    scene_validation.validate_halo_jms_scene(game_title, jms_version, blend_scene, object_set, is_jmi)
+    else:
+        # Extracted geometry is only valid for the node hierarchy its matrices were built against.
+        hierarchy_key = (armature, tuple(node_list))
+        blend_scene.node_hierarchy = batch_cache.node_hierarchies.get(hierarchy_key)
+        if blend_scene.node_hierarchy is None:
+            blend_scene.node_hierarchy = global_functions.build_node_hierarchy(node_list, armature, game_title, jms_version, False, use_maya_sorting)
+            batch_cache.node_hierarchies[hierarchy_key] = blend_scene.node_hierarchy
+
+        blend_scene.mesh_export_cache = batch_cache.mesh_export_caches.setdefault(hierarchy_key, {})
+
+    export_profiler.end_stage(node_stage, len(node_list))
 
     if export_render and blend_scene.render_count > 0:
         model_type = ModelTypeEnum.render
@@ -319,6 +456,30 @@ def command_queue(is_jmi,
 
         build_asset(context, blend_scene, filepath, jms_version, game_title, generate_checksum, fix_rotations, use_maya_sorting, folder_structure, folder_type, model_type, is_jmi, permutation_ce, level_of_detail_ce, scale_value, loop_normals, write_textures, report)
 
+    max_influences = scene_validation.get_max_vertex_influences(jms_version)
+    for evaluted_mesh, obj in render_geometry_list + collision_geometry_list:
+        mesh_data = blend_scene.mesh_export_cache.get(obj)
+        if mesh_data:
+            if batch_cache is not None:
+                # Entries that share a node hierarchy reuse the same mesh data, so its warnings are only reported once per batch.
+                if mesh_data in batch_cache.reported_meshes:
+                    continue
+
+                batch_cache.reported_meshes.add(mesh_data)
+
+            for warning in mesh_data.validation_warnings:
+                report({'WARNING'}, warning)
+
+            if max_influences:
+                vertex_group_table = blend_scene.node_hierarchy.get_vertex_group_table(obj, obj.vertex_groups.keys(), blend_scene.armature)
+                influence_warning = scene_validation.get_vertex_influence_warning(mesh_data, vertex_group_table, max_influences, obj.name)
+                if influence_warning:
+                    report({'WARNING'}, influence_warning)
+
+    # Render and collision meshes are evaluated on demand by process_scene and released once their rows are extracted.
+    for evaluted_mesh, obj in convex_shape_list:
+        obj.to_mesh_clear()
+
     return {'FINISHED'}
 
 if __name__ == '__main__':
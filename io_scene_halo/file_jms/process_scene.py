@@ -26,16 +26,19 @@
 
 import os
 import bpy
+import numpy as np
 
 from math import degrees
 from .format import JMSAsset
 from random import seed, randint
 from mathutils import Vector, Matrix
-from ..global_functions import mesh_processing, global_functions
+from ..global_functions import mesh_processing, global_functions, export_cache, export_profiler
 
 def process_scene(context, version, game_version, generate_checksum, fix_rotations, use_maya_sorting, model_type, blend_scene, custom_scale, loop_normals, write_textures):
     JMS = JMSAsset()
     JMS.node_checksum = 0
+    if export_cache.is_incremental_export():
+        export_cache.prune_export_cache()
 
     default_region = mesh_processing.get_default_region_permutation_name(game_version)
     default_permutation = mesh_processing.get_default_region_permutation_name(game_version)
@@ -44,52 +47,29 @@ def process_scene(context, version, game_version, generate_checksum, fix_rotatio
     permutation_list = []
     material_list = []
 
-    sorted_list = global_functions.sort_list(blend_scene.node_list, blend_scene.armature, game_version, version, False)
-    joined_list = sorted_list[0]
-    reversed_joined_list = sorted_list[1]
+    node_hierarchy = blend_scene.node_hierarchy
+    if node_hierarchy is None:
+        node_hierarchy = global_functions.build_node_hierarchy(blend_scene.node_list, blend_scene.armature, game_version, version, False, use_maya_sorting)
 
-    for node in joined_list:
+    joined_list = node_hierarchy
+
+    for node_idx, node in enumerate(node_hierarchy.joined_list):
         is_bone = False
         if blend_scene.armature:
             is_bone = True
 
-        find_child_node = global_functions.get_child(node, reversed_joined_list, game_version, use_maya_sorting)
-        find_sibling_node = global_functions.get_sibling(blend_scene.armature, node, reversed_joined_list, game_version, use_maya_sorting)
-
-        first_child_node = -1
-        first_sibling_node = -1
         parent_node = -1
-
-        if not find_child_node == None:
-            first_child_node = joined_list.index(find_child_node)
-        if not find_sibling_node == None:
-            first_sibling_node = joined_list.index(find_sibling_node)
         if not node.parent == None and not node.parent.name.startswith('!'):
-            parent_node = joined_list.index(node.parent)
+            parent_node = node_hierarchy.index(node.parent)
 
         bone_matrix = global_functions.get_matrix(node, node, True, blend_scene.armature, joined_list, True, version, 'JMS', False, custom_scale, fix_rotations)
         mesh_dimensions = global_functions.get_dimensions(bone_matrix, node, version, is_bone, 'JMS', custom_scale)
 
         name = node.name
-        child = first_child_node
-        sibling = first_sibling_node
+        child = node_hierarchy.child_indices[node_idx]
+        sibling = node_hierarchy.sibling_indices[node_idx]
         parent = parent_node
-
-        current_node_children = []
-        children = []
-        for child_node in node.children:
-            if child_node in joined_list:
-                current_node_children.append(child_node.name)
-
-        current_node_children.sort()
-
-        if is_bone:
-            for child_node in current_node_children:
-                children.append(joined_list.index(blend_scene.armature.data.bones[child_node]))
-
-        else:
-            for child_node in current_node_children:
-                children.append(joined_list.index(bpy.data.objects[child_node]))
+        children = list(node_hierarchy.children[node_idx])
 
         rotation = (mesh_dimensions.quaternion[0], mesh_dimensions.quaternion[1], mesh_dimensions.quaternion[2], mesh_dimensions.quaternion[3])
         translation = (mesh_dimensions.position[0], mesh_dimensions.position[1], mesh_dimensions.position[2])
@@ -205,30 +185,45 @@ def process_scene(context, version, game_version, generate_checksum, fix_rotatio
             geometry_list = blend_scene.collision_geometry_list
 
         for idx, geometry in enumerate(geometry_list):
-            evaluted_mesh = geometry[0]
             original_geo = geometry[1]
-            if (4, 1, 0) > bpy.app.version:
-                evaluted_mesh.calc_normals_split()
 
             vertex_groups = original_geo.vertex_groups.keys()
             original_geo_matrix = global_functions.get_matrix(original_geo, original_geo, False, blend_scene.armature, joined_list, False, version, "JMS", False, custom_scale, fix_rotations)
-            region_count = len(original_geo.data.region_list)
-            for idx, face in enumerate(evaluted_mesh.polygons):
-                face_set = (None, default_permutation, default_region)
-                region_index = -1
-                if game_version == "halo1":
-                    region_index = region_list.index(default_region)
-
-                lod = face_set[0]
-                permutation = face_set[1]
-                region = face_set[2]
-                if not original_geo.data.active_region == -1 and region_count > 0:
-                    region_idx = evaluted_mesh.get_custom_attribute().data[idx].value - 1
-                    if not region_idx == -1 and not region_idx >= region_count:
-                        face_set = mesh_processing.process_mesh_export_face_set(default_permutation, default_region, game_version, original_geo, region_idx)
-                        lod = face_set[0]
-                        permutation = face_set[1]
-                        region = face_set[2]
+            mesh_data = blend_scene.mesh_export_cache.get(original_geo)
+            if mesh_data is None:
+                fingerprint = None
+                vertex_weights = None
+                if export_cache.is_incremental_export():
+                    export_settings = ("JMS", version, game_version, loop_normals, blend_scene.triangulate_faces, blend_scene.apply_modifiers, default_permutation, default_region)
+                    if export_cache.is_fingerprint_reliable(original_geo):
+                        vertex_weights = mesh_processing.get_vertex_weight_data(original_geo.data, original_geo)
+                        fingerprint = export_cache.get_object_fingerprint(original_geo, original_geo_matrix, export_settings, vertex_weights)
+
+                    mesh_data = export_cache.get_cached_rows("JMS", original_geo, fingerprint)
+
+                if mesh_data is None:
+                    mesh_data = mesh_processing.get_mesh_export_rows(context, original_geo, original_geo_matrix, loop_normals, blend_scene.triangulate_faces, blend_scene.apply_modifiers, game_version, default_permutation, default_region, vertex_weights)
+                    if fingerprint:
+                        export_cache.set_cached_rows("JMS", original_geo, fingerprint, mesh_data)
+
+                blend_scene.mesh_export_cache[original_geo] = mesh_data
+
+            triangle_stage = export_profiler.begin_stage("Triangle assembly")
+            vertex_offset = len(JMS.vertices)
+            face_vertex_offsets = (vertex_offset + np.cumsum(mesh_data.loop_totals) - mesh_data.loop_totals).tolist()
+            flip_winding = original_geo_matrix.determinant() < 0.0
+            region_cache = {}
+            material_cache = {}
+            face_regions = []
+            for face_idx, (material_idx, region_idx) in enumerate(zip(mesh_data.material_indices.tolist(), mesh_data.region_indices.tolist())):
+                region_index = region_cache.get(region_idx)
+                if region_index is None:
+                    region_index = -1
+                    if game_version == "halo1":
+                        region_index = region_list.index(default_region)
+
+                    if not region_idx == -1:
+                        lod, permutation, region = mesh_data.face_sets[region_idx]
                         if not region in region_list:
                             region_list.append(region)
 
@@ -237,43 +232,52 @@ def process_scene(context, version, game_version, generate_checksum, fix_rotatio
                             if not permutation in permutation_list:
                                 permutation_list.append(permutation)
 
-                material = global_functions.get_material(game_version, original_geo, face, evaluted_mesh, lod, region, permutation)
-                material_index = -1
-                if not material == -1:
-                    material_list = global_functions.gather_materials(game_version, material, material_list, "JMS")
-                    material_index = material_list.index(material)
+                    region_cache[region_idx] = region_index
+
+                material_key = (material_idx, region_idx)
+                material_index = material_cache.get(material_key)
+                if material_index is None:
+                    material = mesh_data.face_materials[material_key]
+                    material_index = -1
+                    if not material == -1:
+                        material_list = global_functions.gather_materials(game_version, material, material_list, "JMS")
+                        material_index = material_list.index(material)
 
-                vert_count = len(JMS.vertices)
+                    material_cache[material_key] = material_index
+
+                vert_count = face_vertex_offsets[face_idx]
                 v0 = vert_count
                 v1 = vert_count + 1
                 v2 = vert_count + 2
-                if original_geo_matrix.determinant() < 0.0:
+                if flip_winding:
                     v0 = vert_count + 2
                     v1 = vert_count + 1
                     v2 = vert_count
 
+                face_regions.append(region_index)
                 JMS.triangles.append(JMSAsset.Triangle(region_index, material_index, v0, v1, v2))
-                for loop_index in face.loop_indices:
-                    point_idx = evaluted_mesh.loops[loop_index].vertex_index
-                    loop_data = evaluted_mesh.loops[loop_index]
-                    vertex_data = evaluted_mesh.vertices[loop_data.vertex_index]
 
-                    region = region_index
-                    normal = (original_geo_matrix.to_3x3() @ evaluted_mesh.corner_normals[loop_index].vector).normalized()
-                    if not loop_normals:
-                        normal = (original_geo_matrix.to_3x3() @ vertex_data.normal).normalized()
+            export_profiler.end_stage(triangle_stage, len(face_regions))
+
+            loop_vertices = mesh_data.loop_vertices.tolist()
+            weight_stage = export_profiler.begin_stage("Weight processing")
+            node_influence_counts, node_sets = mesh_processing.process_mesh_export_weights(mesh_data.vertex_weights, mesh_data.loop_vertices, blend_scene.armature, original_geo, vertex_groups, joined_list, "JMS")
+            export_profiler.end_stage(weight_stage, len(node_sets))
 
-                    if normal.length <= 0.0:
-                        normal = (original_geo_matrix.to_3x3() @ face.normal).normalized()
+            vertex_stage = export_profiler.begin_stage("Vertex assembly")
+            loop_regions = np.repeat(np.asarray(face_regions, dtype=np.int32), mesh_data.loop_totals).tolist()
+            uv_sets = mesh_data.uvs.tolist()
+            empty_uv_set = []
+            if version <= 8204:
+                empty_uv_set = [(0.0, 0.0)]
 
-                    scaled_translation = mesh_processing.process_mesh_export_vert(vertex_data, "JMS", original_geo_matrix, custom_scale)
-                    uv_set = mesh_processing.process_mesh_export_uv(evaluted_mesh, "JMS", loop_index, version)
-                    color = mesh_processing.process_mesh_export_color(evaluted_mesh, loop_index, point_idx)
-                    node_influence_count, node_set = mesh_processing.process_mesh_export_weights(vertex_data, blend_scene.armature, original_geo, vertex_groups, joined_list, "JMS")
+            for loop_vertex, region, translation, normal, color, uv_set in zip(loop_vertices, loop_regions, mesh_data.translations.tolist(), mesh_data.normals.tolist(), mesh_data.colors.tolist(), uv_sets):
+                if not uv_set:
+                    uv_set = empty_uv_set
 
-                    JMS.vertices.append(JMSAsset.Vertex(node_influence_count, node_set, region, scaled_translation, normal, color, uv_set))
+                JMS.vertices.append(JMSAsset.Vertex(node_influence_counts[loop_vertex], node_sets[loop_vertex], region, translation, normal, color, uv_set))
 
-            original_geo.to_mesh_clear()
+            export_profiler.end_stage(vertex_stage, len(loop_vertices))
 
     if model_type == global_functions.ModelTypeEnum.physics:
         for spheres in blend_scene.sphere_list:
@@ -433,7 +437,6 @@ def process_scene(context, version, game_version, generate_checksum, fix_rotatio
                 verts.append(JMSAsset.Vertex(None, None, None, vert_translation, None, None, None))
 
             JMS.convex_shapes.append(JMSAsset.Convex_Shape(name, parent_index[0], material_index, rotation, translation, verts))
-            original_geo.to_mesh_clear()
 
         for ragdoll in blend_scene.ragdoll_list:
             body_a_obj = ragdoll.rigid_body_constraint.object1
@@ -77,22 +77,12 @@ def process_scene(context, game_title, qua_version, qua_type, qua_revision, stri
     QUA.shots = []
     QUA.extra_cameras = []
 
-    layer_collection_list = []
-    object_list = []
-
     if not context.view_layer.objects.active == None:
         bpy.ops.object.mode_set(mode='OBJECT')
 
-    # Gather all scene resources that fit export criteria
-    resource_management.gather_scene_resources(context, layer_collection_list, object_list, hidden_geo, nonrender_geo)
-
-    # Store visibility for all relevant resources
-    stored_collection_visibility = resource_management.store_collection_visibility(layer_collection_list)
-    stored_object_visibility = resource_management.store_object_visibility(object_list)
-    stored_modifier_visibility = resource_management.store_modifier_visibility(object_list)
-
-    # Unhide all relevant resources for exporting
-    resource_management.unhide_relevant_resources(layer_collection_list, object_list)
+    # Gather all scene resources that fit export criteria and unhide them for exporting
+    scene_snapshot = resource_management.acquire_scene_snapshot(context, hidden_geo, nonrender_geo)
+    object_list = scene_snapshot.object_list
 
     data_key = "data%s" % os.sep
     tags_key = "tags%s" % os.sep
@@ -339,8 +329,6 @@ def process_scene(context, game_title, qua_version, qua_type, qua_revision, stri
     else:
         raise global_functions.ParseError("No uber camera in your scene. Create a camera and give it & as the prefix for the object name")
     
-    resource_management.restore_collection_visibility(stored_collection_visibility)
-    resource_management.restore_object_visibility(stored_object_visibility)
-    resource_management.restore_modifier_visibility(stored_modifier_visibility)
+    resource_management.release_scene_snapshot(scene_snapshot)
 
     return QUA
@@ -290,63 +290,40 @@ def build_scene(context, LEVEL, game_version, game_title, file_version, fix_rota
                             triangles.append([surfaces[surface_idx].v2, surfaces[surface_idx].v1, surfaces[surface_idx].v0]) # Reversed order to fix facing normals
 
                         mesh.from_pydata(vertices, [], triangles)
-                        for tri_idx, poly in enumerate(mesh.polygons):
-                            poly.use_smooth = True
+                        mesh.polygons.foreach_set("use_smooth", [True] * len(triangles))
 
                         mesh.normals_split_custom_set_from_vertices(normals)
-                        for triangle_idx, triangle in enumerate(triangles):
-                            if material.shader_tag_ref.name_length > 0:
-                                permutation_index = ""
-                                if not material.shader_permutation == 0:
-                                    permutation_index = "%s" % material.shader_permutation
-
-                                material_name = "%s%s" % (os.path.basename(material.shader_tag_ref.name), permutation_index)
-
-                            else:
-                                material_name = "invalid_material_%s" % material_idx
-
-                            mat = bpy.data.materials.get(material_name)
-                            if mat is None:
-                                mat = bpy.data.materials.new(name=material_name)
-                                if material.shader_tag_ref.name_length > 0:
-                                    shader_processing.generate_h1_shader(mat, material.shader_tag_ref, material.shader_permutation, report)
-
-                            if not material_name in object_mesh.data.materials.keys():
-                                object_mesh.data.materials.append(mat)
-
-                            mat.diffuse_color = random_color_gen.next()
-                            material_index = object_mesh.data.materials.keys().index(material_name)
-                            mesh.polygons[triangle_idx].material_index = material_index
+                        if material.shader_tag_ref.name_length > 0:
+                            permutation_index = ""
+                            if not material.shader_permutation == 0:
+                                permutation_index = "%s" % material.shader_permutation
 
-                            uv_name = 'UVMap_Render'
-                            uv_lightmap_name = 'UVMap_Lightmap'
+                            material_name = "%s%s" % (os.path.basename(material.shader_tag_ref.name), permutation_index)
 
-                            layer_uv = mesh.uv_layers.get(uv_name)
-                            if layer_uv is None:
-                                layer_uv = mesh.uv_layers.new(name=uv_name)
-
-                            layer_uv_lightmap = mesh.uv_layers.get(uv_lightmap_name)
-                            if layer_uv_lightmap is None:
-                                layer_uv_lightmap = mesh.uv_layers.new(name=uv_lightmap_name)
-
-                            render_vertex_list = [material.uncompressed_render_vertices[triangle[0]], material.uncompressed_render_vertices[triangle[1]], material.uncompressed_render_vertices[triangle[2]]]
-                            for vertex_idx, vertex in enumerate(render_vertex_list):
-                                loop_index = (3 * triangle_idx) + vertex_idx
+                        else:
+                            material_name = "invalid_material_%s" % material_idx
 
-                                U = vertex.UV[0]
-                                V = vertex.UV[1]
+                        mat = bpy.data.materials.get(material_name)
+                        if mat is None:
+                            mat = bpy.data.materials.new(name=material_name)
+                            if material.shader_tag_ref.name_length > 0:
+                                mat = shader_processing.generate_h1_shader(mat, material.shader_tag_ref, material.shader_permutation, report)
 
-                                layer_uv.data[loop_index].uv = (U, 1 - V)
+                        if not material_name in object_mesh.data.materials.keys():
+                            object_mesh.data.materials.append(mat)
 
-                            if has_lightmap:
-                                lightmap_vertex_list = [material.uncompressed_lightmap_vertices[triangle[0]], material.uncompressed_lightmap_vertices[triangle[1]], material.uncompressed_lightmap_vertices[triangle[2]]]
-                                for vertex_idx, vertex in enumerate(lightmap_vertex_list):
-                                    loop_index = (3 * triangle_idx) + vertex_idx
+                        mat.diffuse_color = random_color_gen.next()
+                        material_index = object_mesh.data.materials.keys().index(material_name)
+                        mesh.polygons.foreach_set("material_index", [material_index] * len(triangles))
 
-                                    U_L = vertex.UV[0]
-                                    V_L = vertex.UV[1]
+                        render_uvs = [vertex.UV for vertex in material.uncompressed_render_vertices]
+                        mesh_processing.set_uv_layer_from_vertices(mesh, 'UVMap_Render', render_uvs, triangles, True)
+                        if has_lightmap:
+                            lightmap_uvs = [vertex.UV for vertex in material.uncompressed_lightmap_vertices]
+                            mesh_processing.set_uv_layer_from_vertices(mesh, 'UVMap_Lightmap', lightmap_uvs, triangles)
 
-                                    layer_uv_lightmap.data[loop_index].uv = (U_L, V_L)
+                        else:
+                            mesh_processing.set_uv_layer_from_vertices(mesh, 'UVMap_Lightmap', [], [])
 
                         bm.from_mesh(mesh)
                         bpy.data.meshes.remove(mesh)
@@ -551,7 +528,7 @@ def build_scene(context, LEVEL, game_version, game_title, file_version, fix_rota
                     material_name += " ds:%s" % property_value
 
             mat = bpy.data.materials.new(name=material_name)
-            shader_processing.generate_h2_shader(mat, material.shader, report)
+            mat = shader_processing.generate_h2_shader(mat, material.shader, report)
 
             materials.append(mat)
 
@@ -30,7 +30,7 @@ import bpy
 from mathutils import Matrix
 from ..h2.file_scenario_structure_bsp.format import ClusterPortalFlags as H2ClusterPortalFlags, SurfaceFlags as H2SurfaceFlags, PartFlags, PropertyTypeEnum
 from ..h2.file_scenario_structure_lightmap.format import PartTypeEnum
-from ...global_functions import global_functions
+from ...global_functions import global_functions, mesh_processing
 
 def process_mesh(SBSP_ASSET, random_color_gen, tag_block, poop_name, material_count, shader_collection_dic):
     mesh = None
@@ -50,44 +50,18 @@ def process_mesh(SBSP_ASSET, random_color_gen, tag_block, poop_name, material_co
         if len(vertices) > 0:
             mesh = bpy.data.meshes.new(poop_name)
             mesh.from_pydata(vertices, [], triangles)
-            for poly in mesh.polygons:
-                poly.use_smooth = True
+            mesh.polygons.foreach_set("use_smooth", [True] * len(triangles))
 
             mesh.normals_split_custom_set_from_vertices(normals)
-            uv_name_render = 'UVMap_Render'
-            uv_name_lightmap = 'UVMap_Lightmap'
-            render_layer_uv = mesh.uv_layers.get(uv_name_render)
-            if render_layer_uv is None:
-                render_layer_uv = mesh.uv_layers.new(name=uv_name_render)
-
-            lightmap_layer_uv = mesh.uv_layers.get(uv_name_lightmap)
-            if lightmap_layer_uv is None:
-                lightmap_layer_uv = mesh.uv_layers.new(name=uv_name_lightmap)
+            render_uvs = [raw_vertex.texcoord for raw_vertex in render_data.raw_vertices]
+            lightmap_uvs = [raw_vertex.primary_lightmap_texcoord for raw_vertex in render_data.raw_vertices]
+            mesh_processing.set_uv_layer_from_vertices(mesh, 'UVMap_Render', render_uvs, triangles, True)
+            mesh_processing.set_uv_layer_from_vertices(mesh, 'UVMap_Lightmap', lightmap_uvs, triangles)
 
+            polygon_material_indices = [0] * len(triangles)
             triangle_start = 0
             for part in render_data.parts:
-                strip_length = part.strip_length
-                strip_start = part.strip_start_index
-
-                triangle_indices = render_data.strip_indices[strip_start : (strip_start + strip_length)]
-                triangle_length = int(len(triangle_indices) / 3)
-                for idx in range(triangle_length):
-                    triangle_index = (idx * 3)
-                    v0 = triangle_indices[triangle_index]
-                    v1 = triangle_indices[triangle_index + 1]
-                    v2 = triangle_indices[triangle_index + 2]
-
-                    vertex_list = [render_data.raw_vertices[v0], render_data.raw_vertices[v1], render_data.raw_vertices[v2]]
-                    for vertex_idx, vertex in enumerate(vertex_list):
-                        loop_index = (triangle_start * 3) + triangle_index + vertex_idx
-
-                        U0 = vertex.texcoord[0]
-                        V0 = vertex.texcoord[1]
-                        U1 = vertex.primary_lightmap_texcoord[0]
-                        V1 = vertex.primary_lightmap_texcoord[1]
-
-                        render_layer_uv.data[loop_index].uv = (U0, 1 - V0)
-                        lightmap_layer_uv.data[loop_index].uv = (U1, V1)
+                triangle_length = int(part.strip_length / 3)
 
                 material = None
                 if not part.material_index == -1 and material_count > 0 and part.material_index < material_count:
@@ -131,11 +105,12 @@ def process_mesh(SBSP_ASSET, random_color_gen, tag_block, poop_name, material_co
 
                     mat.diffuse_color = random_color_gen.next()
                     material_index = mesh.materials.values().index(mat)
-                    for triangle_idx in range(triangle_length):
-                        mesh.polygons[triangle_start + triangle_idx].material_index = material_index
+                    polygon_material_indices[triangle_start:triangle_start + triangle_length] = [material_index] * triangle_length
 
                 triangle_start += triangle_length
 
+            mesh.polygons.foreach_set("material_index", polygon_material_indices)
+
     return mesh
 
 def build_clusters(lightmap_group, SBSP_ASSET, level_root, random_color_gen, collection, shader_collection_dic):
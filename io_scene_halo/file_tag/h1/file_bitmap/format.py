@@ -111,7 +111,10 @@ class BitmapAsset():
     def __init__(self, header=None, sequences=None, bitmaps=None, bitmap_type=0, bitmap_format=0, usage=0, flags=0, detail_fade_factor=0.0, sharpen_amount=0.0, 
                  bump_height=0.0, sprite_budget_size=0, sprite_budget_count=0, color_plate_width=0, color_plate_height=0, compressed_color_plate_data=None, 
                  compressed_color_plate=None, processed_pixel_data=None, processed_pixels=None, blur_filter_size=0.0, alpha_bias=0.0, mipmap_count=0, sprite_usage=0, 
-                 sprite_spacing=0, sequences_tag_block=None, bitmaps_tag_block=None):
+                 sprite_spacing=0, sequences_tag_block=None, bitmaps_tag_block=None, source_path=None, color_plate_offset=None, processed_pixels_offset=None):
+        self.source_path = source_path
+        self.color_plate_offset = color_plate_offset
+        self.processed_pixels_offset = processed_pixels_offset
         self.header = header
         self.sequences = sequences
         self.bitmaps = bitmaps
@@ -138,6 +141,33 @@ class BitmapAsset():
         self.sequences_tag_block = sequences_tag_block
         self.bitmaps_tag_block = bitmaps_tag_block
 
+    def read_payload(self, offset, length):
+        with open(self.source_path, 'rb') as input_stream:
+            input_stream.seek(offset)
+            return input_stream.read(length)
+
+    @property
+    def compressed_color_plate(self):
+        if self._compressed_color_plate is None and self.color_plate_offset is not None:
+            self._compressed_color_plate = self.read_payload(self.color_plate_offset, max(0, self.compressed_color_plate_data.size - 4))
+
+        return self._compressed_color_plate
+
+    @compressed_color_plate.setter
+    def compressed_color_plate(self, value):
+        self._compressed_color_plate = value
+
+    @property
+    def processed_pixels(self):
+        if self._processed_pixels is None and self.processed_pixels_offset is not None:
+            self._processed_pixels = self.read_payload(self.processed_pixels_offset, self.processed_pixel_data.size)
+
+        return self._processed_pixels
+
+    @processed_pixels.setter
+    def processed_pixels(self, value):
+        self._processed_pixels = value
+
     class Sequence:
         def __init__(self, name="", first_bitmap_index=0, bitmap_count=0, sprites_tag_block=None, sprites=None):
             self.name = name
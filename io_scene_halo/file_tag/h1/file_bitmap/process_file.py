@@ -41,7 +41,7 @@ from ....global_functions import tag_format
 
 XML_OUTPUT = False
 
-def process_file(input_stream, report):
+def process_file(input_stream, report, header_only=False):
     TAG = tag_format.TagAsset()
     BITMAP = BitmapAsset()
     TAG.is_legacy = False
@@ -77,15 +77,26 @@ def process_file(input_stream, report):
     BITMAP.sequences_tag_block = TAG.TagBlock().read(input_stream, TAG, tag_format.XMLData(tag_node, "sequences"))
     BITMAP.bitmaps_tag_block = TAG.TagBlock().read(input_stream, TAG, tag_format.XMLData(tag_node, "bitmaps"))
 
-    if BITMAP.compressed_color_plate_data.size > 0:
-        size = input_stream.read(4) # Padding
-        color_plate_length = BITMAP.compressed_color_plate_data.size - 4
-        if color_plate_length < 0:
-            color_plate_length = 0
+    if header_only:
+        # Leave the color plate and pixel data on disk. They are read from these offsets the first time they are accessed.
+        BITMAP.source_path = input_stream.name
+        if BITMAP.compressed_color_plate_data.size > 0:
+            BITMAP.color_plate_offset = input_stream.tell() + 4
+            input_stream.seek(4 + max(0, BITMAP.compressed_color_plate_data.size - 4), 1)
 
-        BITMAP.compressed_color_plate = input_stream.read(color_plate_length)
+        BITMAP.processed_pixels_offset = input_stream.tell()
+        input_stream.seek(BITMAP.processed_pixel_data.size, 1)
 
-    BITMAP.processed_pixels = input_stream.read(BITMAP.processed_pixel_data.size)
+    else:
+        if BITMAP.compressed_color_plate_data.size > 0:
+            size = input_stream.read(4) # Padding
+            color_plate_length = BITMAP.compressed_color_plate_data.size - 4
+            if color_plate_length < 0:
+                color_plate_length = 0
+
+            BITMAP.compressed_color_plate = input_stream.read(color_plate_length)
+
+        BITMAP.processed_pixels = input_stream.read(BITMAP.processed_pixel_data.size)
 
     BITMAP.sequences = []
     sequence_node = tag_format.get_xml_node(XML_OUTPUT, BITMAP.sequences_tag_block.count, tag_node, "name", "sequences")
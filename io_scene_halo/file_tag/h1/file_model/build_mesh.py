@@ -239,7 +239,7 @@ def get_geometry_layout(context, collection, import_file, armature, game_version
 
         material_name = "%s%s" % (os.path.basename(shader.tag_ref.name), permutation_index)
         mat = bpy.data.materials.new(name=material_name)
-        shader_processing.generate_h1_shader(mat, shader.tag_ref, shader.permutation_index, report)
+        mat = shader_processing.generate_h1_shader(mat, shader.tag_ref, shader.permutation_index, report)
 
         materials.append(mat)
 
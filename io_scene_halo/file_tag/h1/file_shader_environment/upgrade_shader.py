@@ -64,10 +64,10 @@ def generate_base_map_parameters(H1_ASSET, TAG, SHADER, template, permutation_in
     return TAG.TagBlock(parameter_count)
 
 def generate_detail_map_parameters(H1_ASSET, TAG, SHADER, template, permutation_index):
-    base_bitmap = parse_tag(H1_ASSET.base_map, print, "halo1", "retail")
-    primary_detail_bitmap = parse_tag(H1_ASSET.primary_detail_map, print, "halo1", "retail")
-    secondary_detail_bitmap = parse_tag(H1_ASSET.secondary_detail_map, print, "halo1", "retail")
-    micro_detail_bitmap = parse_tag(H1_ASSET.micro_detail_map, print, "halo1", "retail")
+    base_bitmap = parse_tag(H1_ASSET.base_map, print, "halo1", "retail", header_only=True)
+    primary_detail_bitmap = parse_tag(H1_ASSET.primary_detail_map, print, "halo1", "retail", header_only=True)
+    secondary_detail_bitmap = parse_tag(H1_ASSET.secondary_detail_map, print, "halo1", "retail", header_only=True)
+    micro_detail_bitmap = parse_tag(H1_ASSET.micro_detail_map, print, "halo1", "retail", header_only=True)
 
     base_bitmap_count = 0
     primary_detail_bitmap_count = 0
@@ -187,8 +187,8 @@ def generate_detail_map_parameters(H1_ASSET, TAG, SHADER, template, permutation_
         SHADER.parameters.append(parameter)
 
 def generate_bump_parameters(H1_ASSET, TAG, SHADER, template, permutation_index):
-    base_bitmap = parse_tag(H1_ASSET.base_map, print, "halo1", "retail")
-    bump_bitmap = parse_tag(H1_ASSET.bump_map, print, "halo1", "retail")
+    base_bitmap = parse_tag(H1_ASSET.base_map, print, "halo1", "retail", header_only=True)
+    bump_bitmap = parse_tag(H1_ASSET.bump_map, print, "halo1", "retail", header_only=True)
 
     base_bitmap_count = 0
     bump_bitmap_count = 0
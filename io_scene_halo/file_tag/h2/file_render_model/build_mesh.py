@@ -293,7 +293,7 @@ def get_geometry_layout(context, collection, import_file, armature, report):
                 material_name += " ds:%s" % property_value
 
         mat = bpy.data.materials.new(name=material_name)
-        shader_processing.generate_h2_shader(mat, material.shader, report)
+        mat = shader_processing.generate_h2_shader(mat, material.shader, report)
 
         materials.append(mat)
 
@@ -187,7 +187,7 @@ def get_object(collection, import_file, game_version, object_name, random_color_
                 material_name += " ds:%s" % property_value
 
         mat = bpy.data.materials.new(name=material_name)
-        shader_processing.generate_h2_shader(mat, material.shader, report)
+        mat = shader_processing.generate_h2_shader(mat, material.shader, report)
 
         materials.append(mat)
 
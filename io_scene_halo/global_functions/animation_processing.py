@@ -0,0 +1,254 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+#
+# MIT License
+#
+# Copyright (c) 2023 Steven Garcia
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# ##### END MIT LICENSE BLOCK #####
+
+import numpy as np
+
+# Transform kernel for whole animations. Everything here works on arrays shaped
+# (frames, nodes, ...) with quaternions stored as (w, x, y, z) like mathutils and
+# matrices stored row major like iterating a mathutils Matrix.
+
+def get_parent_indices(nodes):
+    node_indices = {node: node_idx for node_idx, node in enumerate(nodes)}
+    parent_indices = []
+    for node in nodes:
+        parent = node.parent
+        if parent is None:
+            parent_indices.append(-1)
+        elif isinstance(parent, int):
+            parent_indices.append(parent)
+        else:
+            parent_indices.append(node_indices.get(parent, -1))
+
+    return np.array(parent_indices, dtype=np.int64)
+
+def get_topological_order(parent_indices):
+    order = []
+    visited = set()
+    for node_idx in range(len(parent_indices)):
+        chain = []
+        current_idx = node_idx
+        while current_idx != -1 and current_idx not in visited:
+            chain.append(current_idx)
+            visited.add(current_idx)
+            current_idx = int(parent_indices[current_idx])
+
+        order.extend(reversed(chain))
+
+    return order
+
+def identity_matrices(shape):
+    matrices = np.zeros(tuple(shape) + (4, 4), dtype=np.float64)
+    matrices[..., 0, 0] = 1.0
+    matrices[..., 1, 1] = 1.0
+    matrices[..., 2, 2] = 1.0
+    matrices[..., 3, 3] = 1.0
+
+    return matrices
+
+def invert_quaternions(quaternions):
+    inverted = quaternions * np.array((1.0, -1.0, -1.0, -1.0))
+    length_squared = np.sum(quaternions * quaternions, axis=-1, keepdims=True)
+
+    return inverted / np.where(length_squared == 0.0, 1.0, length_squared)
+
+def quaternions_to_matrices(quaternions):
+    w = quaternions[..., 0]
+    x = quaternions[..., 1]
+    y = quaternions[..., 2]
+    z = quaternions[..., 3]
+
+    matrices = np.empty(quaternions.shape[:-1] + (3, 3), dtype=np.float64)
+    matrices[..., 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+    matrices[..., 0, 1] = 2.0 * (x * y - w * z)
+    matrices[..., 0, 2] = 2.0 * (x * z + w * y)
+    matrices[..., 1, 0] = 2.0 * (x * y + w * z)
+    matrices[..., 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+    matrices[..., 1, 2] = 2.0 * (y * z - w * x)
+    matrices[..., 2, 0] = 2.0 * (x * z - w * y)
+    matrices[..., 2, 1] = 2.0 * (y * z + w * x)
+    matrices[..., 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+
+    return matrices
+
+def matrices_to_quaternions(matrices):
+    m00 = matrices[..., 0, 0]
+    m11 = matrices[..., 1, 1]
+    m22 = matrices[..., 2, 2]
+    trace = m00 + m11 + m22
+
+    quaternions = np.empty(matrices.shape[:-2] + (4,), dtype=np.float64)
+    use_w = trace > 0.0
+    use_x = ~use_w & (m00 >= m11) & (m00 >= m22)
+    use_y = ~use_w & ~use_x & (m11 >= m22)
+    use_z = ~use_w & ~use_x & ~use_y
+
+    s = np.sqrt(np.maximum(1.0 + trace, 0.0)) * 2.0
+    s = np.where(use_w, s, 1.0)
+    quaternions[..., 0] = np.where(use_w, 0.25 * s, 0.0)
+    quaternions[..., 1] = np.where(use_w, (matrices[..., 2, 1] - matrices[..., 1, 2]) / s, 0.0)
+    quaternions[..., 2] = np.where(use_w, (matrices[..., 0, 2] - matrices[..., 2, 0]) / s, 0.0)
+    quaternions[..., 3] = np.where(use_w, (matrices[..., 1, 0] - matrices[..., 0, 1]) / s, 0.0)
+
+    s = np.sqrt(np.maximum(1.0 + m00 - m11 - m22, 0.0)) * 2.0
+    s = np.where(use_x, s, 1.0)
+    quaternions[..., 0] = np.where(use_x, (matrices[..., 2, 1] - matrices[..., 1, 2]) / s, quaternions[..., 0])
+    quaternions[..., 1] = np.where(use_x, 0.25 * s, quaternions[..., 1])
+    quaternions[..., 2] = np.where(use_x, (matrices[..., 0, 1] + matrices[..., 1, 0]) / s, quaternions[..., 2])
+    quaternions[..., 3] = np.where(use_x, (matrices[..., 0, 2] + matrices[..., 2, 0]) / s, quaternions[..., 3])
+
+    s = np.sqrt(np.maximum(1.0 + m11 - m00 - m22, 0.0)) * 2.0
+    s = np.where(use_y, s, 1.0)
+    quaternions[..., 0] = np.where(use_y, (matrices[..., 0, 2] - matrices[..., 2, 0]) / s, quaternions[..., 0])
+    quaternions[..., 1] = np.where(use_y, (matrices[..., 0, 1] + matrices[..., 1, 0]) / s, quaternions[..., 1])
+    quaternions[..., 2] = np.where(use_y, 0.25 * s, quaternions[..., 2])
+    quaternions[..., 3] = np.where(use_y, (matrices[..., 1, 2] + matrices[..., 2, 1]) / s, quaternions[..., 3])
+
+    s = np.sqrt(np.maximum(1.0 + m22 - m00 - m11, 0.0)) * 2.0
+    s = np.where(use_z, s, 1.0)
+    quaternions[..., 0] = np.where(use_z, (matrices[..., 1, 0] - matrices[..., 0, 1]) / s, quaternions[..., 0])
+    quaternions[..., 1] = np.where(use_z, (matrices[..., 0, 2] + matrices[..., 2, 0]) / s, quaternions[..., 1])
+    quaternions[..., 2] = np.where(use_z, (matrices[..., 1, 2] + matrices[..., 2, 1]) / s, quaternions[..., 2])
+    quaternions[..., 3] = np.where(use_z, 0.25 * s, quaternions[..., 3])
+
+    # Match mathutils by keeping W positive and the result unit length.
+    quaternions *= np.where(quaternions[..., 0:1] < 0.0, -1.0, 1.0)
+    length = np.linalg.norm(quaternions, axis=-1, keepdims=True)
+
+    return quaternions / np.where(length == 0.0, 1.0, length)
+
+def matrices_to_eulers_xyz(matrices):
+    cy = np.hypot(matrices[..., 0, 0], matrices[..., 1, 0])
+    is_stable = cy > 16.0 * np.finfo(np.float32).eps
+
+    euler_a = np.empty(matrices.shape[:-2] + (3,), dtype=np.float64)
+    euler_a[..., 0] = np.where(is_stable, np.arctan2(matrices[..., 2, 1], matrices[..., 2, 2]), np.arctan2(-matrices[..., 1, 2], matrices[..., 1, 1]))
+    euler_a[..., 1] = np.arctan2(-matrices[..., 2, 0], cy)
+    euler_a[..., 2] = np.where(is_stable, np.arctan2(matrices[..., 1, 0], matrices[..., 0, 0]), 0.0)
+
+    euler_b = np.empty_like(euler_a)
+    euler_b[..., 0] = np.arctan2(-matrices[..., 2, 1], -matrices[..., 2, 2])
+    euler_b[..., 1] = np.arctan2(-matrices[..., 2, 0], -cy)
+    euler_b[..., 2] = np.arctan2(-matrices[..., 1, 0], -matrices[..., 0, 0])
+    euler_b = np.where(is_stable[..., None], euler_b, euler_a)
+
+    # Blender picks whichever of the two equivalent solutions has the smallest rotation sum.
+    use_b = np.sum(np.abs(euler_a), axis=-1) > np.sum(np.abs(euler_b), axis=-1)
+
+    return np.where(use_b[..., None], euler_b, euler_a)
+
+def quaternions_to_eulers_xyz(quaternions):
+    length = np.linalg.norm(quaternions, axis=-1, keepdims=True)
+
+    return matrices_to_eulers_xyz(quaternions_to_matrices(quaternions / np.where(length == 0.0, 1.0, length)))
+
+def compose_matrices(translations, rotations, scales):
+    scales = np.asarray(scales, dtype=np.float64)
+    if scales.ndim == translations.ndim - 1:
+        scales = np.repeat(scales[..., None], 3, axis=-1)
+
+    matrices = identity_matrices(translations.shape[:-1])
+    matrices[..., :3, :3] = quaternions_to_matrices(rotations) * scales[..., None, :]
+    matrices[..., :3, 3] = translations
+
+    return matrices
+
+def decompose_matrices(matrices):
+    translations = matrices[..., :3, 3].copy()
+    basis = matrices[..., :3, :3]
+    scales = np.linalg.norm(basis, axis=-2)
+    rotation_matrices = basis / np.where(scales == 0.0, 1.0, scales)[..., None, :]
+
+    is_negative = np.linalg.det(basis) < 0.0
+    sign = np.where(is_negative, -1.0, 1.0)
+    rotation_matrices = rotation_matrices * sign[..., None, None]
+    scales = scales * sign[..., None]
+
+    return translations, matrices_to_quaternions(rotation_matrices), scales
+
+def accumulate_absolute_matrices(local_matrices, parent_indices):
+    absolute_matrices = np.empty_like(local_matrices)
+    for node_idx in get_topological_order(parent_indices):
+        parent_idx = parent_indices[node_idx]
+        if parent_idx == -1:
+            absolute_matrices[:, node_idx] = local_matrices[:, node_idx]
+        else:
+            absolute_matrices[:, node_idx] = absolute_matrices[:, parent_idx] @ local_matrices[:, node_idx]
+
+    return absolute_matrices
+
+def absolute_to_local_matrices(absolute_matrices, parent_indices):
+    parent_matrices = identity_matrices(absolute_matrices.shape[:-2])
+    has_parent = parent_indices != -1
+    parent_matrices[:, has_parent] = absolute_matrices[:, parent_indices[has_parent]]
+
+    return np.linalg.inv(parent_matrices) @ absolute_matrices
+
+def rotate_matrices_z(matrices, angle):
+    translations, rotations, scales = decompose_matrices(matrices)
+    cos_angle = np.cos(angle)
+    sin_angle = np.sin(angle)
+    correction_matrix = np.array(((cos_angle, -sin_angle, 0.0), (sin_angle, cos_angle, 0.0), (0.0, 0.0, 1.0)))
+    corrected_rotations = matrices_to_quaternions(quaternions_to_matrices(rotations) @ correction_matrix)
+
+    return compose_matrices(translations, corrected_rotations, scales)
+
+def axis_rotation_matrices(angles, axis):
+    cos_angles = np.cos(angles)
+    sin_angles = np.sin(angles)
+    matrices = np.zeros(angles.shape + (3, 3), dtype=np.float64)
+    axis_a, axis_b = {'X': (1, 2), 'Y': (2, 0), 'Z': (0, 1)}[axis]
+    axis_c = 3 - axis_a - axis_b
+    matrices[..., axis_c, axis_c] = 1.0
+    matrices[..., axis_a, axis_a] = cos_angles
+    matrices[..., axis_a, axis_b] = -sin_angles
+    matrices[..., axis_b, axis_a] = sin_angles
+    matrices[..., axis_b, axis_b] = cos_angles
+
+    return matrices
+
+def eulers_to_matrices(eulers, order='XYZ'):
+    matrices = None
+    for axis in order:
+        axis_matrices = axis_rotation_matrices(eulers[..., 'XYZ'.index(axis)], axis)
+        if matrices is None:
+            matrices = axis_matrices
+        else:
+            matrices = axis_matrices @ matrices
+
+    return matrices
+
+def sample_fcurve(fcurve, frames):
+    keyframe_count = len(fcurve.keyframe_points)
+    if keyframe_count >= len(frames) and len(fcurve.modifiers) == 0:
+        # Baked curves already hold a key on every frame so we can read them straight out.
+        keyframe_co = np.empty(keyframe_count * 2, dtype=np.float32)
+        fcurve.keyframe_points.foreach_get("co", keyframe_co)
+        keyframe_frames = keyframe_co[0::2].astype(np.float64)
+        key_indices = np.clip(np.searchsorted(keyframe_frames, frames), 0, keyframe_count - 1)
+        if np.array_equal(keyframe_frames[key_indices], frames):
+            return keyframe_co[1::2][key_indices].astype(np.float64)
+
+    return np.fromiter((fcurve.evaluate(frame) for frame in frames), dtype=np.float64, count=len(frames))
@@ -0,0 +1,303 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+#
+# MIT License
+#
+# Copyright (c) 2023 Steven Garcia & Jadeon Sheppard
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# ##### END MIT LICENSE BLOCK #####
+
+import zlib
+import numpy as np
+
+from ..file_tag.h1.file_bitmap.format import BitmapTypeEnum, BitmapFlags
+
+# Halo 1 and Halo 2 share these bitmap format values. Anything past p8_bump differs between the games and is not decoded.
+FORMAT_NAMES = {
+    0: "a8",
+    1: "y8",
+    2: "ay8",
+    3: "a8y8",
+    6: "r5g6b5",
+    8: "a1r5g5b5",
+    9: "a4r4g4b4",
+    10: "x8r8g8b8",
+    11: "a8r8g8b8",
+    14: "dxt1",
+    15: "dxt3",
+    16: "dxt5",
+}
+
+PIXEL_SIZES = {
+    "a8": 1,
+    "y8": 1,
+    "ay8": 1,
+    "a8y8": 2,
+    "r5g6b5": 2,
+    "a1r5g5b5": 2,
+    "a4r4g4b4": 2,
+    "x8r8g8b8": 4,
+    "a8r8g8b8": 4,
+}
+
+BLOCK_SIZES = {
+    "dxt1": 8,
+    "dxt3": 16,
+    "dxt5": 16,
+}
+
+def get_format_name(bitmap_format):
+    return FORMAT_NAMES.get(bitmap_format)
+
+def get_surface_size(format_name, width, height):
+    block_size = BLOCK_SIZES.get(format_name)
+    if block_size:
+        return ((width + 3) // 4) * ((height + 3) // 4) * block_size
+
+    return width * height * PIXEL_SIZES[format_name]
+
+def get_morton_indices(width, height):
+    # Xbox swizzling interleaves the x and y bits up to the smaller dimension and stacks the leftover bits of the larger one on top.
+    x_values = np.arange(width, dtype=np.int64)
+    y_values = np.arange(height, dtype=np.int64)
+    x_offsets = np.zeros(width, dtype=np.int64)
+    y_offsets = np.zeros(height, dtype=np.int64)
+
+    output_bit = 0
+    input_bit = 0
+    while (1 << input_bit) < width or (1 << input_bit) < height:
+        if (1 << input_bit) < width:
+            x_offsets |= ((x_values >> input_bit) & 1) << output_bit
+            output_bit += 1
+
+        if (1 << input_bit) < height:
+            y_offsets |= ((y_values >> input_bit) & 1) << output_bit
+            output_bit += 1
+
+        input_bit += 1
+
+    return (y_offsets[:, None] | x_offsets[None, :]).ravel()
+
+def expand_bits(values, bit_count):
+    return (values.astype(np.float32) / float((1 << bit_count) - 1))
+
+def decode_565(colors):
+    rgb = np.empty(colors.shape + (3,), dtype=np.float32)
+    rgb[..., 0] = expand_bits((colors >> 11) & 31, 5)
+    rgb[..., 1] = expand_bits((colors >> 5) & 63, 6)
+    rgb[..., 2] = expand_bits(colors & 31, 5)
+
+    return rgb
+
+def decode_color_blocks(color_blocks, force_four_colors):
+    color_0 = color_blocks[:, 0:2].copy().view('<u2')[:, 0].astype(np.int32)
+    color_1 = color_blocks[:, 2:4].copy().view('<u2')[:, 0].astype(np.int32)
+    color_indices = color_blocks[:, 4:8].copy().view('<u4')[:, 0].astype(np.int64)
+
+    palette = np.empty((len(color_blocks), 4, 4), dtype=np.float32)
+    rgb_0 = decode_565(color_0)
+    rgb_1 = decode_565(color_1)
+    palette[:, 0, :3] = rgb_0
+    palette[:, 1, :3] = rgb_1
+    palette[:, :, 3] = 1.0
+
+    four_colors = np.ones(len(color_blocks), dtype=bool)
+    if not force_four_colors:
+        four_colors = color_0 > color_1
+
+    palette[:, 2, :3] = np.where(four_colors[:, None], (2.0 * rgb_0 + rgb_1) / 3.0, (rgb_0 + rgb_1) / 2.0)
+    palette[:, 3, :3] = np.where(four_colors[:, None], (rgb_0 + 2.0 * rgb_1) / 3.0, 0.0)
+    palette[:, 3, 3] = np.where(four_colors, 1.0, 0.0)
+
+    texel_indices = (color_indices[:, None] >> (2 * np.arange(16))) & 3
+
+    return np.take_along_axis(palette, texel_indices[:, :, None], axis=1)
+
+def decode_explicit_alpha(alpha_blocks):
+    alpha_bits = alpha_blocks.copy().view('<u8')[:, 0]
+
+    return expand_bits((alpha_bits[:, None] >> (4 * np.arange(16, dtype=np.uint64))) & np.uint64(15), 4)
+
+def decode_interpolated_alpha(alpha_blocks):
+    alpha_0 = alpha_blocks[:, 0].astype(np.float32)
+    alpha_1 = alpha_blocks[:, 1].astype(np.float32)
+    index_bytes = np.zeros((len(alpha_blocks), 8), dtype=np.uint8)
+    index_bytes[:, :6] = alpha_blocks[:, 2:8]
+    alpha_indices = (index_bytes.view('<u8')[:, 0][:, None] >> (3 * np.arange(16, dtype=np.uint64))) & np.uint64(7)
+
+    palette = np.empty((len(alpha_blocks), 8), dtype=np.float32)
+    palette[:, 0] = alpha_0
+    palette[:, 1] = alpha_1
+    for step in range(1, 7):
+        palette[:, step + 1] = ((7 - step) * alpha_0 + step * alpha_1) / 7.0
+
+    six_alphas = alpha_0 <= alpha_1
+    for step in range(1, 5):
+        palette[six_alphas, step + 1] = ((5 - step) * alpha_0[six_alphas] + step * alpha_1[six_alphas]) / 5.0
+
+    palette[six_alphas, 6] = 0.0
+    palette[six_alphas, 7] = 255.0
+
+    return np.take_along_axis(palette, alpha_indices.astype(np.int64), axis=1) / 255.0
+
+def decode_blocks(data, format_name, width, height):
+    block_width = (width + 3) // 4
+    block_height = (height + 3) // 4
+    blocks = np.frombuffer(data, dtype=np.uint8, count=block_width * block_height * BLOCK_SIZES[format_name]).reshape(block_width * block_height, -1)
+    if format_name == "dxt1":
+        texels = decode_color_blocks(blocks, False)
+
+    else:
+        texels = decode_color_blocks(blocks[:, 8:16], True)
+        if format_name == "dxt3":
+            texels[:, :, 3] = decode_explicit_alpha(blocks[:, 0:8])
+
+        else:
+            texels[:, :, 3] = decode_interpolated_alpha(blocks[:, 0:8])
+
+    texels = texels.reshape(block_height, block_width, 4, 4, 4).transpose(0, 2, 1, 3, 4).reshape(block_height * 4, block_width * 4, 4)
+
+    return texels[:height, :width]
+
+def decode_pixels(data, format_name, width, height, swizzled):
+    pixel_size = PIXEL_SIZES[format_name]
+    pixel_count = width * height
+    if pixel_size == 1:
+        values = np.frombuffer(data, dtype=np.uint8, count=pixel_count)
+
+    elif pixel_size == 2:
+        values = np.frombuffer(data, dtype='<u2', count=pixel_count)
+
+    else:
+        values = np.frombuffer(data, dtype=np.uint8, count=pixel_count * 4).reshape(pixel_count, 4)
+
+    if swizzled:
+        values = values[get_morton_indices(width, height)]
+
+    values = values.astype(np.int32)
+    pixels = np.ones((pixel_count, 4), dtype=np.float32)
+    if format_name == "a8":
+        pixels[:, 3] = expand_bits(values, 8)
+
+    elif format_name == "y8":
+        pixels[:, :3] = expand_bits(values, 8)[:, None]
+
+    elif format_name == "ay8":
+        pixels[:, :] = expand_bits(values, 8)[:, None]
+
+    elif format_name == "a8y8":
+        pixels[:, :3] = expand_bits(values & 255, 8)[:, None]
+        pixels[:, 3] = expand_bits(values >> 8, 8)
+
+    elif format_name == "r5g6b5":
+        pixels[:, :3] = decode_565(values)
+
+    elif format_name == "a1r5g5b5":
+        pixels[:, 0] = expand_bits((values >> 10) & 31, 5)
+        pixels[:, 1] = expand_bits((values >> 5) & 31, 5)
+        pixels[:, 2] = expand_bits(values & 31, 5)
+        pixels[:, 3] = (values >> 15) & 1
+
+    elif format_name == "a4r4g4b4":
+        pixels[:, 0] = expand_bits((values >> 8) & 15, 4)
+        pixels[:, 1] = expand_bits((values >> 4) & 15, 4)
+        pixels[:, 2] = expand_bits(values & 15, 4)
+        pixels[:, 3] = expand_bits((values >> 12) & 15, 4)
+
+    else:
+        pixels[:, :3] = expand_bits(values[:, 2::-1], 8)
+        if format_name == "a8r8g8b8":
+            pixels[:, 3] = expand_bits(values[:, 3], 8)
+
+    return pixels.reshape(height, width, 4)
+
+def decode_surface(data, format_name, width, height, swizzled=False):
+    ''' Decodes a single surface into a top to bottom float RGBA array '''
+
+    if format_name in BLOCK_SIZES:
+        return decode_blocks(data, format_name, width, height)
+
+    return decode_pixels(data, format_name, width, height, swizzled)
+
+def get_chain_size(format_name, width, height, depth, mipmap_count):
+    chain_size = 0
+    for mipmap_idx in range(mipmap_count + 1):
+        chain_size += get_surface_size(format_name, max(1, width >> mipmap_idx), max(1, height >> mipmap_idx)) * max(1, depth >> mipmap_idx)
+
+    return chain_size
+
+def decode_bitmap_surfaces(bitmap_element, processed_pixels):
+    ''' Returns mip 0 of every face or slice in a bitmap element. Cube map faces are stored one after another with their full mip chain '''
+
+    format_name = get_format_name(bitmap_element.bitmap_format)
+    if format_name is None or not processed_pixels:
+        return []
+
+    width = bitmap_element.width
+    height = bitmap_element.height
+    surface_size = get_surface_size(format_name, width, height)
+    swizzled = bool(bitmap_element.flags & BitmapFlags.swizzled.value)
+
+    surface_offsets = [bitmap_element.pixels_offset]
+    if bitmap_element.bitmap_type == BitmapTypeEnum._3d_texture.value:
+        surface_offsets = [bitmap_element.pixels_offset + surface_size * slice_idx for slice_idx in range(max(1, bitmap_element.depth))]
+
+    elif bitmap_element.bitmap_type == BitmapTypeEnum.cube_map.value:
+        chain_size = get_chain_size(format_name, width, height, 1, bitmap_element.mipmap_count)
+        surface_offsets = [bitmap_element.pixels_offset + chain_size * face_idx for face_idx in range(6)]
+
+    pixel_buffer = memoryview(processed_pixels)
+    surfaces = []
+    for surface_offset in surface_offsets:
+        if surface_offset < 0 or surface_offset + surface_size > len(pixel_buffer):
+            break
+
+        surfaces.append(decode_surface(pixel_buffer[surface_offset:surface_offset + surface_size], format_name, width, height, swizzled))
+
+    return surfaces
+
+def get_color_plate_pixels(data, width, height):
+    ''' Color plates are stored top to bottom as BGRA bytes '''
+
+    color_plate = np.frombuffer(data, dtype=np.uint8, count=width * height * 4).reshape(height, width, 4)
+    pixels = np.empty((height, width, 4), dtype=np.float32)
+    np.multiply(color_plate[::-1, :, (2, 1, 0, 3)], 1.0 / 255.0, out=pixels, casting='unsafe')
+
+    return pixels.ravel()
+
+def get_image_pixels(surface):
+    ''' Flips a decoded surface to Blender's bottom to top row order and flattens it for foreach_set '''
+
+    return np.ascontiguousarray(surface[::-1], dtype=np.float32).ravel()
+
+def get_bitmap_color_plate_pixels(BITMAP):
+    decompressed_data = zlib.decompress(BITMAP.compressed_color_plate)
+
+    return get_color_plate_pixels(decompressed_data, BITMAP.color_plate_width, BITMAP.color_plate_height)
+
+def get_bitmap_surface_pixels(BITMAP):
+    surfaces = []
+    if len(BITMAP.bitmaps) > 0:
+        surfaces = decode_bitmap_surfaces(BITMAP.bitmaps[0], BITMAP.processed_pixels)
+
+    if len(surfaces) == 0:
+        return None
+
+    return get_image_pixels(surfaces[0])
@@ -0,0 +1,247 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+#
+# MIT License
+#
+# Copyright (c) 2023 Steven Garcia & Jadeon Sheppard
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# ##### END MIT LICENSE BLOCK #####
+
+import bpy
+import hashlib
+import numpy as np
+
+from bpy.app.handlers import persistent
+
+ATTRIBUTE_LAYOUTS = {
+    'FLOAT': ('value', 1, np.float32),
+    'INT': ('value', 1, np.int32),
+    'INT8': ('value', 1, np.int32),
+    'BOOLEAN': ('value', 1, np.bool_),
+    'FLOAT2': ('vector', 2, np.float32),
+    'INT32_2D': ('value', 2, np.int32),
+    'FLOAT_VECTOR': ('vector', 3, np.float32),
+    'FLOAT_COLOR': ('color', 4, np.float32),
+    'BYTE_COLOR': ('color', 4, np.float32),
+    'QUATERNION': ('value', 4, np.float32),
+    'FLOAT4X4': ('value', 16, np.float32),
+}
+
+# Entries hold every array extracted for an object so the cache is capped by size, dropping the least recently used first.
+EXPORT_CACHE_BYTE_LIMIT = 512 * 1024 * 1024
+
+export_cache = {}
+
+def is_incremental_export():
+    return bpy.context.preferences.addons["io_scene_halo"].preferences.incremental_export
+
+def clear_export_cache():
+    export_cache.clear()
+
+@persistent
+def clear_export_cache_on_load(dummy):
+    clear_export_cache()
+
+def prune_export_cache():
+    for cache_key in list(export_cache.keys()):
+        if bpy.data.objects.get(cache_key[1]) is None:
+            del export_cache[cache_key]
+
+def hash_collection(fingerprint, collection, attribute, width, dtype):
+    array = np.empty(len(collection) * width, dtype=dtype)
+    if len(array) > 0:
+        collection.foreach_get(attribute, array)
+
+    fingerprint.update(array.tobytes())
+
+def get_armature_signature(armature):
+    signature = [armature.name, tuple(np.array(armature.matrix_world, dtype=np.float64).ravel())]
+    for bone in armature.data.bones:
+        signature.append(tuple(np.array(bone.matrix_local, dtype=np.float64).ravel()))
+
+    if armature.pose:
+        for pose_bone in armature.pose.bones:
+            signature.append(tuple(np.array(pose_bone.matrix, dtype=np.float64).ravel()))
+
+    return tuple(signature)
+
+def get_property_signature(value):
+    if isinstance(value, bpy.types.Object) and value.type == 'ARMATURE':
+        return get_armature_signature(value)
+
+    if isinstance(value, bpy.types.Object):
+        return (value.name_full, tuple(np.array(value.matrix_world, dtype=np.float64).ravel()))
+
+    if isinstance(value, bpy.types.ID):
+        return value.name_full
+
+    if isinstance(value, set):
+        return tuple(sorted(value))
+
+    if hasattr(value, "__len__") and not isinstance(value, str):
+        return tuple(value)
+
+    return value
+
+def has_animated_modifiers(id_data):
+    animation_data = getattr(id_data, "animation_data", None)
+    if animation_data is None:
+        return False
+
+    if len(animation_data.drivers) > 0:
+        return True
+
+    action = animation_data.action
+    if action is None:
+        return False
+
+    fcurves = getattr(action, "fcurves", None)
+    if fcurves is None:
+        # Layered actions keep their curves in slots. Assume anything could be animated.
+        return True
+
+    for fcurve in fcurves:
+        if fcurve.data_path.startswith("modifiers"):
+            return True
+
+    return False
+
+def is_fingerprint_reliable(obj):
+    ''' Modifiers that read other datablocks or are driven can change the evaluated mesh without touching anything hashed here '''
+
+    for id_data in (obj, obj.data, obj.data.shape_keys):
+        if id_data and has_animated_modifiers(id_data):
+            return False
+
+    for modifier in obj.modifiers:
+        for modifier_property in modifier.bl_rna.properties:
+            if not modifier_property.type == 'POINTER' or modifier_property.identifier == "rna_type":
+                continue
+
+            value = getattr(modifier, modifier_property.identifier, None)
+            if isinstance(value, bpy.types.ID) and not (modifier.type == 'ARMATURE' and isinstance(value, bpy.types.Object) and value.type == 'ARMATURE'):
+                return False
+
+    return True
+
+def get_modifier_signature(obj):
+    modifier_signature = []
+    for modifier in obj.modifiers:
+        modifier_properties = [modifier.type, modifier.name]
+        for modifier_property in modifier.bl_rna.properties:
+            if modifier_property.identifier == "rna_type" or modifier_property.type == 'COLLECTION':
+                continue
+
+            value = getattr(modifier, modifier_property.identifier, None)
+            if modifier_property.type == 'POINTER' and not isinstance(value, bpy.types.ID):
+                continue
+
+            modifier_properties.append((modifier_property.identifier, get_property_signature(value)))
+
+        for key in modifier.keys():
+            modifier_properties.append((key, get_property_signature(modifier[key])))
+
+        modifier_signature.append(tuple(modifier_properties))
+
+    return tuple(modifier_signature)
+
+def get_object_fingerprint(obj, matrix, settings, vertex_weights):
+    mesh = obj.data
+    fingerprint = hashlib.blake2b(digest_size=16)
+    fingerprint.update(repr(settings).encode())
+    fingerprint.update(np.array(matrix, dtype=np.float64).tobytes())
+    fingerprint.update(repr(get_modifier_signature(obj)).encode())
+    fingerprint.update(repr(tuple((slot.link, getattr(slot.material, "name", None)) for slot in obj.material_slots)).encode())
+    fingerprint.update(repr(tuple(mesh.materials.keys())).encode())
+    fingerprint.update(repr((tuple(region.name for region in mesh.region_list), mesh.active_region)).encode())
+    fingerprint.update(repr((getattr(obj.parent, "name", None), obj.parent_type, obj.parent_bone, tuple(obj.vertex_groups.keys()))).encode())
+
+    hash_collection(fingerprint, mesh.vertices, "co", 3, np.float32)
+    hash_collection(fingerprint, mesh.loops, "vertex_index", 1, np.int32)
+    hash_collection(fingerprint, mesh.polygons, "loop_start", 1, np.int32)
+    hash_collection(fingerprint, mesh.polygons, "loop_total", 1, np.int32)
+    hash_collection(fingerprint, mesh.polygons, "material_index", 1, np.int32)
+    hash_collection(fingerprint, mesh.polygons, "use_smooth", 1, np.bool_)
+    for attribute in mesh.attributes:
+        attribute_layout = ATTRIBUTE_LAYOUTS.get(attribute.data_type)
+        if attribute_layout and not attribute.name.startswith("."):
+            fingerprint.update(repr((attribute.name, attribute.domain, attribute.data_type)).encode())
+            hash_collection(fingerprint, attribute.data, *attribute_layout)
+
+    fingerprint.update(repr(getattr(mesh.attributes.active_color, "name", None)).encode())
+    for uv_layer in mesh.uv_layers:
+        fingerprint.update(uv_layer.name.encode())
+        hash_collection(fingerprint, uv_layer.data, "uv", 2, np.float32)
+
+    if mesh.has_custom_normals:
+        hash_collection(fingerprint, mesh.loops, "normal", 3, np.float32)
+
+    if mesh.shape_keys:
+        for key_block in mesh.shape_keys.key_blocks:
+            fingerprint.update(repr((key_block.name, key_block.value, key_block.mute)).encode())
+            hash_collection(fingerprint, key_block.data, "co", 3, np.float32)
+
+    for weight_array in vertex_weights:
+        fingerprint.update(weight_array.tobytes())
+
+    return fingerprint.digest()
+
+def get_rows_size(rows):
+    rows_size = 0
+    for value in vars(rows).values():
+        if isinstance(value, tuple):
+            rows_size += sum(array.nbytes for array in value if isinstance(array, np.ndarray))
+
+        elif isinstance(value, np.ndarray):
+            rows_size += value.nbytes
+
+    return rows_size
+
+def get_cached_rows(file_type, obj, fingerprint):
+    if fingerprint is None:
+        export_cache.pop((file_type, obj.name), None)
+        return None
+
+    cached_entry = export_cache.pop((file_type, obj.name), None)
+    if cached_entry is None or not cached_entry[0] == fingerprint:
+        return None
+
+    rows = cached_entry[1]
+    if not rows.is_valid():
+        return None
+
+    export_cache[(file_type, obj.name)] = cached_entry
+
+    return rows
+
+def set_cached_rows(file_type, obj, fingerprint, rows):
+    export_cache.pop((file_type, obj.name), None)
+    rows_size = get_rows_size(rows)
+    if rows_size > EXPORT_CACHE_BYTE_LIMIT:
+        return
+
+    cache_size = sum(cached_entry[2] for cached_entry in export_cache.values())
+    for cache_key in list(export_cache.keys()):
+        if cache_size + rows_size <= EXPORT_CACHE_BYTE_LIMIT:
+            break
+
+        cache_size -= export_cache.pop(cache_key)[2]
+
+    export_cache[(file_type, obj.name)] = (fingerprint, rows, rows_size)
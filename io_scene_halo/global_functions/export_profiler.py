@@ -0,0 +1,149 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+#
+# MIT License
+#
+# Copyright (c) 2023 Steven Garcia & Jadeon Sheppard
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# ##### END MIT LICENSE BLOCK #####
+
+import bpy
+import json
+import time
+import cProfile
+
+class ExportProfile():
+    def __init__(self, label, filepath, profiler=None):
+        self.label = label
+        self.filepath = filepath
+        self.profiler = profiler
+        self.output_path = None
+        self.start_time = time.perf_counter()
+        self.stages = {}
+
+    def add_stage(self, name, elapsed, count):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = {'time': 0.0, 'calls': 0, 'items': 0}
+
+        stage['time'] += elapsed
+        stage['calls'] += 1
+        stage['items'] += count
+
+    def get_summary(self):
+        total_time = time.perf_counter() - self.start_time
+        lines = ["%s export timings for %s" % (self.label, self.filepath),
+                 "%-32s %10s %8s %10s %7s" % ("Stage", "Time (s)", "Calls", "Items", "%")]
+
+        for name, stage in self.stages.items():
+            percentage = 0.0
+            if total_time > 0.0:
+                percentage = stage['time'] / total_time * 100
+
+            lines.append("%-32s %10.4f %8d %10d %6.1f%%" % (name, stage['time'], stage['calls'], stage['items'], percentage))
+
+        lines.append("%-32s %10.4f" % ("Total", total_time))
+
+        return "\n".join(lines), total_time
+
+active_profile = None
+
+def get_preferences():
+    return bpy.context.preferences.addons["io_scene_halo"].preferences
+
+def begin_export_profile(label, filepath):
+    global active_profile
+
+    preferences = get_preferences()
+    if not preferences.enable_export_timings or active_profile is not None:
+        return None
+
+    profiler = None
+    if preferences.dump_export_timings:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+
+        except ValueError:
+            # Another profiler is already running, most likely the one from the Enable Profiling preference.
+            profiler = None
+
+    active_profile = ExportProfile(label, filepath, profiler)
+
+    return active_profile
+
+def set_output_path(output_path):
+    # folder_structure can move the written file away from the operator path, so dumps follow the first resolved output.
+    if active_profile is not None and active_profile.output_path is None:
+        active_profile.output_path = output_path
+
+def end_export_profile(export_profile, report):
+    global active_profile
+
+    if export_profile is None:
+        return
+
+    if export_profile.profiler:
+        export_profile.profiler.disable()
+
+    active_profile = None
+
+    summary, total_time = export_profile.get_summary()
+    print(summary)
+    report({'INFO'}, "%s export took %.3f seconds, see the system console for a breakdown" % (export_profile.label, total_time))
+
+    if get_preferences().dump_export_timings:
+        dump_path = export_profile.output_path
+        if dump_path is None:
+            dump_path = export_profile.filepath
+
+        timings = {'label': export_profile.label,
+                   'filepath': dump_path,
+                   'blender_version': bpy.app.version_string,
+                   'total_time': total_time,
+                   'stages': export_profile.stages}
+
+        with open("%s.timings.json" % dump_path, 'w', encoding='utf_8') as timings_file:
+            json.dump(timings, timings_file, indent=4)
+
+        if export_profile.profiler:
+            export_profile.profiler.dump_stats("%s.prof" % dump_path)
+
+def discard_export_profile():
+    global active_profile
+
+    if active_profile and active_profile.profiler:
+        active_profile.profiler.disable()
+
+    active_profile = None
+
+def begin_stage(name):
+    if active_profile is None:
+        return None
+
+    return (name, time.perf_counter())
+
+def end_stage(stage, count=0):
+    if stage is None or active_profile is None:
+        return
+
+    name, start_time = stage
+    active_profile.add_stage(name, time.perf_counter() - start_time, count)
+
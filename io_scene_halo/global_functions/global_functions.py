@@ -31,14 +31,15 @@ import math
 import colorsys
 import re
 import operator
+import numpy as np
 
 from decimal import *
 from math import radians
 from enum import Enum, auto
 from io import TextIOWrapper
 from datetime import datetime
-from collections import defaultdict
 from ..global_functions.parse_tags import parse_tag
+from ..global_functions import animation_processing
 from mathutils import Vector, Euler, Quaternion, Matrix
 
 class ModelTypeEnum(Enum):
@@ -84,7 +85,10 @@ class BlendScene():
                  point_to_point_list,
                  prismatic_list,
                  bounding_sphere_list,
-                 skylight_list):
+                 skylight_list,
+                 node_hierarchy=None,
+                 triangulate_faces=False,
+                 apply_modifiers=True):
         self.world_node_count = world_node_count
         self.armature_count = armature_count
         self.mesh_frame_count = mesh_frame_count
@@ -112,6 +116,10 @@ class BlendScene():
         self.prismatic_list = prismatic_list
         self.bounding_sphere_list = bounding_sphere_list
         self.skylight_list = skylight_list
+        self.node_hierarchy = node_hierarchy
+        self.triangulate_faces = triangulate_faces
+        self.apply_modifiers = apply_modifiers
+        self.mesh_export_cache = {}
 
 class EdgeSplit():
     def __init__(self, is_enabled, use_edge_angle, split_angle, use_edge_sharp):
@@ -210,72 +218,66 @@ def get_sibling(armature, bone, bone_list, game_title, preexport_sorting):
     return set_sibling
 
 def sort_by_layer(node_list, armature):
-    layer_count = []
+    layer_count = 0
+    root_count = 0
+    first_layer_is_root = None
     layer_root = []
-    root_list = []
-    children_list = []
-    reversed_children_list = []
-    joined_list = []
-    reversed_joined_list = []
-    sort_list = []
-    reversed_sort_list = []
+    seen_layers = set()
+    children_by_parent = {}
     for node in node_list:
         if node.parent == None and not node.name[0:1] == '!' or node.parent.name[0:1] == '!' and node.parent.parent == None:
-            layer_count.append(None)
+            layer_count += 1
+            root_count += 1
             layer_root.append(node)
+            if first_layer_is_root is None:
+                first_layer_is_root = True
 
         else:
-            if not node.parent in layer_count:
-                layer_count.append(node.parent)
+            parent = node.parent
+            if armature:
+                parent = armature.data.bones['%s' % node.parent.name]
 
-    for layer in layer_count:
-        joined_list = root_list + children_list
-        reversed_joined_list = root_list + reversed_children_list
-        layer_index = layer_count.index(layer)
-        if layer_index == 0:
+            children_by_parent.setdefault(parent, []).append(node)
+            if not parent in seen_layers:
+                seen_layers.add(parent)
+                layer_count += 1
+                if first_layer_is_root is None:
+                    first_layer_is_root = False
+
+    root_list = []
+    children_list = []
+    reversed_children_list = []
+    if layer_count > 0:
+        # Every layer that shares the first layer's slot adds the root again, this mirrors the original list based sort.
+        root_repeat = 1
+        if first_layer_is_root:
+            root_repeat = root_count
+
+        for idx in range(root_repeat):
             if armature:
                 root_list.append(armature.data.bones[0])
 
             else:
                 root_list.append(layer_root[0])
 
-        else:
-            for node in node_list:
-                if armature:
-                    if node.parent != None:
-                        if armature.data.bones['%s' % node.parent.name] in joined_list and not node in children_list:
-                            sort_list.append(node.name)
-                            reversed_sort_list.append(node.name)
-
-                else:
-                    if node.parent != None:
-                        if node.parent in joined_list and not node in children_list:
-                            sort_list.append(node.name)
-                            reversed_sort_list.append(node.name)
-
-            sort_list.sort()
-            reversed_sort_list.sort()
-            reversed_sort_list.reverse()
-            for sort in sort_list:
-                if armature:
-                    if not armature.data.bones['%s' % sort] in children_list:
-                        children_list.append(armature.data.bones['%s' % sort])
-
-                else:
-                    if not bpy.data.objects[sort] in children_list:
-                        children_list.append(bpy.data.objects[sort])
-
-            for sort in reversed_sort_list:
-                if armature:
-                    if not armature.data.bones['%s' % sort] in reversed_children_list:
-                        reversed_children_list.append(armature.data.bones['%s' % sort])
-
-                else:
-                    if not bpy.data.objects[sort] in reversed_children_list:
-                        reversed_children_list.append(bpy.data.objects[sort])
-
-        joined_list = root_list + children_list
-        reversed_joined_list = root_list + reversed_children_list
+        # Walk the hierarchy one layer at a time, sorting each layer by name.
+        visited = set(root_list)
+        current_layer = list(dict.fromkeys(root_list))
+        while len(current_layer) > 0:
+            next_layer = []
+            for parent in current_layer:
+                for node in children_by_parent.get(parent, ()):
+                    if not node in visited:
+                        visited.add(node)
+                        next_layer.append(node)
+
+            next_layer.sort(key=operator.attrgetter('name'))
+            children_list.extend(next_layer)
+            reversed_children_list.extend(reversed(next_layer))
+            current_layer = next_layer
+
+    joined_list = root_list + children_list
+    reversed_joined_list = root_list + reversed_children_list
 
     return (joined_list, reversed_joined_list)
 
@@ -418,6 +420,148 @@ def sort_list_batch(node_list, game_version, version, animation):
 
     return sorted_list
 
+class NodeHierarchy():
+    def __init__(self, joined_list, reversed_joined_list=None, armature=None):
+        self.armature = armature
+        self.joined_list = joined_list
+        self.reversed_joined_list = reversed_joined_list
+        if reversed_joined_list is None:
+            self.reversed_joined_list = joined_list
+
+        self.node_indices = {}
+        for node_idx, node in enumerate(joined_list):
+            self.node_indices.setdefault(node, node_idx)
+
+        self.child_indices = []
+        self.sibling_indices = []
+        self.children = []
+        self.vertex_group_tables = {}
+
+    def __len__(self):
+        return len(self.joined_list)
+
+    def __iter__(self):
+        return iter(self.joined_list)
+
+    def __getitem__(self, node_idx):
+        return self.joined_list[node_idx]
+
+    def __contains__(self, node):
+        return node in self.node_indices
+
+    def index(self, node):
+        node_idx = self.node_indices.get(node)
+        if node_idx is None:
+            raise ValueError("%s is not in the node hierarchy" % node)
+
+        return node_idx
+
+    def get(self, node, default=-1):
+        return self.node_indices.get(node, default)
+
+    def build_links(self, game_title, preexport_sorting):
+        child_map = get_child_map(self.reversed_joined_list, game_title, preexport_sorting)
+        sibling_map = get_sibling_map(self.reversed_joined_list, game_title, preexport_sorting)
+
+        self.child_indices = []
+        self.sibling_indices = []
+        self.children = []
+        for node in self.joined_list:
+            child_node = child_map.get(node)
+            sibling_node = sibling_map.get(node)
+            self.child_indices.append(-1 if child_node == None else self.node_indices[child_node])
+            self.sibling_indices.append(-1 if sibling_node == None else self.node_indices[sibling_node])
+
+            current_node_children = [child_node for child_node in node.children if child_node in self.node_indices]
+            current_node_children.sort(key=operator.attrgetter('name'))
+            self.children.append([self.node_indices[child_node] for child_node in current_node_children])
+
+    def get_vertex_group_table(self, obj, vertex_groups, armature=None):
+        if armature is None:
+            armature = self.armature
+
+        key = (obj, armature)
+        vertex_group_table = self.vertex_group_tables.get(key)
+        if vertex_group_table is None:
+            vertex_group_table = []
+            for vertex_group_name in vertex_groups:
+                if armature:
+                    node = armature.data.bones.get(vertex_group_name)
+
+                else:
+                    node = bpy.data.objects.get(vertex_group_name)
+
+                node_idx = -1
+                if not node == None:
+                    node_idx = self.node_indices.get(node, -1)
+
+                vertex_group_table.append(node_idx)
+
+            self.vertex_group_tables[key] = vertex_group_table
+
+        return vertex_group_table
+
+def build_node_hierarchy(node_list, armature, game_title, version, animation, preexport_sorting):
+    joined_list, reversed_joined_list = sort_list(node_list, armature, game_title, version, animation)
+    node_hierarchy = NodeHierarchy(joined_list, reversed_joined_list, armature)
+    node_hierarchy.build_links(game_title, preexport_sorting)
+
+    return node_hierarchy
+
+def get_child_map(bone_list, game_title, preexport_sorting):
+    children_by_parent = {}
+    for node in bone_list:
+        if not node.parent == None:
+            children_by_parent.setdefault(node.parent, []).append(node)
+
+    child_map = {}
+    for bone, child_nodes in children_by_parent.items():
+        set_node = None
+        if game_title == "halo1" and preexport_sorting:
+            bone_name = bone.name.lower()
+            if 'pelvis' in bone_name:
+                thigh_list = [child for child in child_nodes if 'thigh' in child.name.lower()]
+                if len(thigh_list) > 0:
+                    set_node = max(thigh_list, key=operator.attrgetter('name'))
+
+            elif 'spine1' in bone_name:
+                clavical_list = [child for child in child_nodes if 'clavicle' in child.name.lower()]
+                if len(clavical_list) > 0:
+                    set_node = max(clavical_list, key=operator.attrgetter('name'))
+
+        if not set_node:
+            set_node = child_nodes[0]
+
+        child_map[bone] = set_node
+
+    return child_map
+
+def get_sibling_map(bone_list, game_title, preexport_sorting):
+    siblings_by_parent = {}
+    for node in bone_list:
+        siblings_by_parent.setdefault(node.parent, []).append(node)
+
+    sibling_map = {}
+    for parent, sibling_list in siblings_by_parent.items():
+        if game_title == "halo1" and preexport_sorting and parent:
+            parent_name = parent.name.lower()
+            priority_name = None
+            if 'pelvis' in parent_name:
+                priority_name = 'thigh'
+
+            elif 'spine1' in parent_name:
+                priority_name = 'clavicle'
+
+            if priority_name:
+                priority_list = [sibling for sibling in sibling_list if priority_name in sibling.name.lower()]
+                other_list = [sibling for sibling in sibling_list if not priority_name in sibling.name.lower()]
+                sibling_list = priority_list + other_list
+
+        for sibling_idx in range(len(sibling_list) - 1):
+            sibling_map.setdefault(sibling_list[sibling_idx], sibling_list[sibling_idx + 1])
+
+    return sibling_map
+
 def test_encoding(filepath):
     UTF_8_BOM = b'\xef\xbb\xbf'
     UTF_16_BE_BOM = b'\xfe\xff'
@@ -733,6 +877,13 @@ def get_face_material(original_geo, face):
 
     return assigned_material
 
+def get_used_material_indices(mesh, material_count):
+    material_indices = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", material_indices)
+    used_indices = np.unique(material_indices)
+
+    return used_indices[(used_indices >= 0) & (used_indices < material_count)].tolist()
+
 def get_material(game_version, original_geo, face, geometry, lod, region, permutation):
     object_materials = len(original_geo.material_slots)
     mat = None
@@ -1379,6 +1530,39 @@ def get_fcurve(fcurves, data_path, index):
             return fc
     return None
 
+def get_fcurve_map(fcurves):
+    return {(fc.data_path, fc.array_index): fc for fc in fcurves}
+
+def get_or_create_fcurve(action, fcurve_map, data_path, index, action_group=None):
+    fcurve = fcurve_map.get((data_path, index))
+    if fcurve is None:
+        if action_group is None:
+            fcurve = action.fcurves.new(data_path=data_path, index=index)
+        else:
+            fcurve = action.fcurves.new(data_path=data_path, index=index, action_group=action_group)
+
+        fcurve_map[(data_path, index)] = fcurve
+
+    return fcurve
+
+def set_fcurve_keyframes(fcurve, frame_numbers, values):
+    keyframe_points = fcurve.keyframe_points
+    if len(keyframe_points) > 0:
+        # Merge into an existing curve the slow way so keys on matching frames get replaced.
+        for frame_number, value in zip(frame_numbers, values):
+            keyframe_points.insert(frame_number, value, options={'FAST'})
+
+    else:
+        keyframe_count = len(values)
+        keyframe_co = np.empty(keyframe_count * 2, dtype=np.float32)
+        keyframe_co[0::2] = frame_numbers
+        keyframe_co[1::2] = values
+
+        keyframe_points.add(keyframe_count)
+        keyframe_points.foreach_set("co", keyframe_co)
+
+    fcurve.update()
+
 def export_fcurve_data(action, fcurve_dict, armature, node, node_idx, frame, local_matrices):
     if not armature:
         action = None
@@ -1448,6 +1632,59 @@ def export_fcurve_data(action, fcurve_dict, armature, node, node_idx, frame, loc
 
     return transform_matrix
 
+def export_fcurve_data_batch(fcurve_dict, armature, nodes, frames, local_matrices):
+    frames = np.asarray(frames, dtype=np.float64)
+    frame_count = len(frames)
+    rest_matrices = np.array([np.array(local_matrix, dtype=np.float64) for local_matrix in local_matrices]).reshape(len(local_matrices), 4, 4)
+    pose_matrices = np.broadcast_to(rest_matrices, (frame_count,) + rest_matrices.shape).copy()
+    for node_idx, node in enumerate(nodes):
+        is_bone = armature and isinstance(node, bpy.types.Bone)
+        if is_bone:
+            pose_bone = armature.pose.bones[node.name]
+            node_fcurves = fcurve_dict.get(('bone', node.name))
+        else:
+            pose_bone = node
+            node_fcurves = None
+            # Object nodes only carry their own action when there is no armature, otherwise they stay at rest.
+            if not armature and node.animation_data and node.animation_data.action:
+                node_fcurves = [fc for fc in node.animation_data.action.fcurves if not fc.data_path.startswith('pose.bones["')]
+
+        if not node_fcurves:
+            continue
+
+        rot_mode = pose_bone.rotation_mode
+        loc = np.zeros((frame_count, 3), dtype=np.float64)
+        scale = np.ones((frame_count, 3), dtype=np.float64)
+        rot = np.zeros((frame_count, 3), dtype=np.float64)
+        if rot_mode == 'QUATERNION':
+            rot = np.zeros((frame_count, 4), dtype=np.float64)
+            rot[:, 0] = 1.0
+
+        for fc in node_fcurves:
+            idx = fc.array_index
+            if fc.data_path.endswith("location"):
+                loc[:, idx] = animation_processing.sample_fcurve(fc, frames)
+            elif fc.data_path.endswith("scale"):
+                if len(fc.keyframe_points) > 0:
+                    scale[:, idx] = np.round(animation_processing.sample_fcurve(fc, frames), 2)
+            elif fc.data_path.endswith("rotation_quaternion") and rot_mode == 'QUATERNION':
+                rot[:, idx] = animation_processing.sample_fcurve(fc, frames)
+            elif fc.data_path.endswith("rotation_euler") and not rot_mode == 'QUATERNION':
+                rot[:, idx] = animation_processing.sample_fcurve(fc, frames)
+
+        if rot_mode == 'QUATERNION':
+            rotation_matrices = animation_processing.quaternions_to_matrices(rot)
+        else:
+            rotation_matrices = animation_processing.eulers_to_matrices(rot, rot_mode)
+
+        transform_matrices = animation_processing.identity_matrices((frame_count,))
+        transform_matrices[:, :3, :3] = rotation_matrices * scale[:, 0, None, None]
+        transform_matrices[:, :3, 3] = loc
+
+        pose_matrices[:, node_idx] = rest_matrices[node_idx] @ transform_matrices
+
+    return pose_matrices
+
 def import_fcurve_data(action, armature, nodes, frames, JMA, JMAAsset, fix_rotations, is_inverted=False):
     local_matrices = [None for node in nodes]
     for node_idx, node in enumerate(nodes):
@@ -1461,67 +1698,38 @@ def import_fcurve_data(action, armature, nodes, frames, JMA, JMAAsset, fix_rotat
 
         local_matrices[node_idx] = local_matrix
 
+    frame_count = len(frames)
+    node_count = len(JMA.nodes)
     unordered_map = sort_by_parent(nodes)
-    absolute_frames = []
+    frame_rotations = np.empty((frame_count, node_count, 4), dtype=np.float64)
+    frame_translations = np.empty((frame_count, node_count, 3), dtype=np.float64)
+    frame_scales = np.empty((frame_count, node_count), dtype=np.float64)
     for frame_idx, frame in enumerate(frames):
-        absolute_frame = [None for node in JMA.nodes]
-        for node_idx, node in enumerate(JMA.nodes):
-            unordered_index = unordered_map[node_idx]
-            rotation = frame[unordered_index].rotation
-            if is_inverted:
-                rotation = frame[unordered_index].rotation.inverted()
-
-            matrix_scale = Matrix.Scale(frame[unordered_index].scale, 4)
-            matrix_rotation = rotation.to_matrix().to_4x4()
-            matrix_translation = Matrix.Translation(frame[unordered_index].translation)
-
-            transform_matrix = matrix_translation @ matrix_rotation @ matrix_scale
-            if JMA.version < 16394 and node.parent is not None and node.parent is not -1:
-                absolute_matrix = absolute_frame[node.parent] @ transform_matrix
-            else:
-                absolute_matrix = transform_matrix
-            absolute_frame[node_idx] = absolute_matrix
-        absolute_frames.append(absolute_frame)
+        for node_idx in range(node_count):
+            transform = frame[unordered_map[node_idx]]
+            frame_rotations[frame_idx, node_idx] = transform.rotation
+            frame_translations[frame_idx, node_idx] = transform.translation
+            frame_scales[frame_idx, node_idx] = transform.scale
+
+    if is_inverted:
+        frame_rotations = animation_processing.invert_quaternions(frame_rotations)
+
+    absolute_matrices = animation_processing.compose_matrices(frame_translations, frame_rotations, frame_scales)
+    if JMA.version < 16394:
+        absolute_matrices = animation_processing.accumulate_absolute_matrices(absolute_matrices, animation_processing.get_parent_indices(JMA.nodes))
 
     if fix_rotations:
-        correction_rot_mat = Matrix.Rotation(radians(-90.0), 4, 'Z')
-        for frame_abs in absolute_frames:
-            for idx, abs_matrix in enumerate(frame_abs):
-                loc, rot, scale = abs_matrix.decompose()
-                rot_mat = rot.to_matrix().to_4x4()
-                corrected_rot_mat = rot_mat @ correction_rot_mat
-                corrected_matrix = Matrix.LocRotScale(loc, corrected_rot_mat.to_quaternion(), scale)
-                frame_abs[idx] = corrected_matrix
-
-    fcurve_map = defaultdict(lambda: defaultdict(dict))
-    data_paths = {
-        "location": 3,
-        "rotation_euler": 3,
-        "rotation_quaternion": 4,
-        "scale": 3
-    }
-
-    for bone in armature.pose.bones:
-        bone_name = bone.name
-        for path, count in data_paths.items():
-            for index in range(count):
-                fcurve_data_path = f'pose.bones["{bone_name}"].{path}'
-                fcurve = get_fcurve(action.fcurves, fcurve_data_path, index)
-                if not fcurve:
-                    fcurve = action.fcurves.new(data_path=fcurve_data_path, index=index, action_group=bone_name)
-
-                fcurve_map[bone_name][path][index] = fcurve
-
-    controller_fcurves = {
-        'location': [get_fcurve(action.fcurves, "location", i) or action.fcurves.new(data_path="location", index=i) for i in range(3)],
-        'rotation_euler': [get_fcurve(action.fcurves, "rotation_euler", i) or action.fcurves.new(data_path="rotation_euler", index=i) for i in range(3)],
-    }
+        absolute_matrices = animation_processing.rotate_matrices_z(absolute_matrices, radians(-90.0))
 
-    for frame_idx, frame in enumerate(frames):
-        absolute_frame = absolute_frames[frame_idx]
-        frame_number = frame_idx + 1
+    local_pose_matrices = animation_processing.absolute_to_local_matrices(absolute_matrices, animation_processing.get_parent_indices(nodes))
+
+    fcurve_map = get_fcurve_map(action.fcurves)
+    frame_numbers = np.arange(1, frame_count + 1, dtype=np.float32)
 
-        if JMA.biped_controller_frame_type != JMAAsset.BipedControllerFrameType.DISABLE:
+    if JMA.biped_controller_frame_type != JMAAsset.BipedControllerFrameType.DISABLE:
+        controller_location = np.empty((frame_count, 3), dtype=np.float32)
+        controller_rotation = np.empty((frame_count, 3), dtype=np.float32)
+        for frame_idx in range(frame_count):
             controller_transform = JMA.biped_controller_transforms[frame_idx]
 
             if JMA.biped_controller_frame_type & JMAAsset.BipedControllerFrameType.DX:
@@ -1532,44 +1740,41 @@ def import_fcurve_data(action, armature, nodes, frames, JMA, JMAAsset, fix_rotat
 
             if JMA.biped_controller_frame_type & JMAAsset.BipedControllerFrameType.DZ:
                 armature.location.z = controller_transform.translation[2]
-                
+
             if JMA.biped_controller_frame_type & JMAAsset.BipedControllerFrameType.DYAW:
                 armature.rotation_euler.z = controller_transform.rotation.to_euler().z
 
-            for i in range(3):
-                controller_fcurves['location'][i].keyframe_points.insert(frame_number, armature.location[i], options={'FAST'})
-                controller_fcurves['rotation_euler'][i].keyframe_points.insert(frame_number, armature.rotation_euler[i], options={'FAST'})
-
-        for node_idx, node in enumerate(nodes):
-            if local_matrices[node_idx] is None:
-                continue
+            controller_location[frame_idx] = armature.location
+            controller_rotation[frame_idx] = armature.rotation_euler
 
-            node_name = node.name
-            pose_bone = get_pose_bone(armature, node.name)
-            rotation_mode = 'QUATERNION'
-            if pose_bone is not None:
-                rotation_mode = pose_bone.rotation_mode
+        for i in range(3):
+            set_fcurve_keyframes(get_or_create_fcurve(action, fcurve_map, "location", i), frame_numbers, controller_location[:, i])
+            set_fcurve_keyframes(get_or_create_fcurve(action, fcurve_map, "rotation_euler", i), frame_numbers, controller_rotation[:, i])
 
-            transform_matrix = absolute_frame[node_idx]
-            if node.parent is not None and node.parent is not -1:
-                transform_matrix = absolute_frame[node.parent].inverted() @ transform_matrix
+    for node_idx, node in enumerate(nodes):
+        if local_matrices[node_idx] is None:
+            continue
 
-            transform_matrix = local_matrices[node_idx].inverted() @ transform_matrix
+        pose_bone = get_pose_bone(armature, node.name)
+        if pose_bone is None:
+            continue
 
-            loc, rot_quat, scl = transform_matrix.decompose()
-            if rotation_mode is not 'QUATERNION':
-                rot_euler = rot_quat.to_euler('XYZ')
+        bone_name = pose_bone.name
+        rotation_mode = pose_bone.rotation_mode
+        rotation_path = "rotation_quaternion"
+        if rotation_mode != 'QUATERNION':
+            rotation_path = "rotation_euler"
 
-            for i in range(3):
-                fcurve_map[node_name]['location'][i].keyframe_points.insert(frame_number, loc[i], options={'FAST'})
-                fcurve_map[node_name]['scale'][i].keyframe_points.insert(frame_number, scl[i], options={'FAST'})
-                if rotation_mode == 'QUATERNION':
-                    fcurve_map[node_name]['rotation_quaternion'][i].keyframe_points.insert(frame_number, rot_quat[i], options={'FAST'})
-                else:
-                    fcurve_map[node_name]['rotation_euler'][i].keyframe_points.insert(frame_number, rot_euler[i], options={'FAST'})
+        inverted_local_matrix = np.linalg.inv(np.array(local_matrices[node_idx], dtype=np.float64))
+        location_values, rotation_values, scale_values = animation_processing.decompose_matrices(inverted_local_matrix @ local_pose_matrices[:, node_idx])
+        if rotation_mode != 'QUATERNION':
+            rotation_values = animation_processing.quaternions_to_eulers_xyz(rotation_values)
 
-            if rotation_mode == 'QUATERNION':
-                fcurve_map[node_name]['rotation_quaternion'][3].keyframe_points.insert(frame_number, rot_quat[3], options={'FAST'})
+        for path, values in (("location", location_values), (rotation_path, rotation_values), ("scale", scale_values)):
+            fcurve_data_path = f'pose.bones["{bone_name}"].{path}'
+            for index in range(values.shape[1]):
+                fcurve = get_or_create_fcurve(action, fcurve_map, fcurve_data_path, index, bone_name)
+                set_fcurve_keyframes(fcurve, frame_numbers, values[:, index])
 
 #https://www.cyril-richon.com/blog/2019/1/23/python-srgb-to-linear-linear-to-srgb
 def srgb2lin(s):
@@ -1642,6 +1847,7 @@ def run_code(code_string):
 
     import inspect
     from .. import crash_report
+    from ..global_functions import resource_management, export_profiler
     frame = inspect.currentframe()
     try:
         caller_locals = frame.f_back.f_locals
@@ -1654,11 +1860,15 @@ def run_code(code_string):
         return result
 
     except ParseError as parse_error:
+        resource_management.release_all_scene_snapshots()
+        export_profiler.discard_export_profile()
         crash_report.report_crash()
         report({'ERROR'}, "Bad data: {0}".format(parse_error))
         return {'CANCELLED'}
 
     except:
+        resource_management.release_all_scene_snapshots()
+        export_profiler.discard_export_profile()
         crash_report.report_crash()
         info = sys.exc_info()
         report({'ERROR'}, "Internal error: {1}({0})".format(info[1], info[0]))
@@ -28,12 +28,15 @@ import io
 import bpy
 import bmesh
 import struct
+import numpy as np
 
 from math import radians
 from mathutils import Vector, Matrix
-from ..global_functions import global_functions, shader_processing, mesh_processing
+from ..global_functions import global_functions, shader_processing, mesh_processing, export_profiler, scene_validation
 from ..file_tag.h2.file_render_model.format import DetailLevelsFlags
 
+WEIGHT_PRESERVING_MODIFIERS = {'ARMATURE', 'TRIANGULATE'}
+
 
 class Surface:
     def __init__(self, material_index=0, surface_normal=Vector(), vertices=None):
@@ -624,14 +627,14 @@ def generate_mesh_object_retail(asset, object_vertices, object_triangles, object
                         if game_title == "halo1":
                             shader = shader_processing.find_h1_shader_tag(asset.filepath, material_name)
                             if not shader == None:
-                                shader_processing.generate_h1_shader(mat, shader, 0, print)
+                                mat = shader_processing.generate_h1_shader(mat, shader, 0, print)
                             else:
                                 print("Halo 1 Shader tag returned as None. Something went terribly wrong")
 
                         elif game_title == "halo2":
                             shader = shader_processing.find_h2_shader_tag(asset.filepath, material_name)
                             if not shader == None:
-                                shader_processing.generate_h2_shader(mat, shader, print)
+                                mat = shader_processing.generate_h2_shader(mat, shader, print)
                             else:
                                 print("Halo 2 Shader tag returned as None. Something went terribly wrong")
 
@@ -747,14 +750,14 @@ def generate_mesh_retail(context, asset, object_vertices, object_triangles, obje
                 if game_title == "halo1":
                     shader = shader_processing.find_h1_shader_tag(asset.filepath, ass_mat_name)
                     if not shader == None:
-                        shader_processing.generate_h1_shader(mat, shader, 0, print)
+                        mat = shader_processing.generate_h1_shader(mat, shader, 0, print)
                     else:
                         print("Halo 1 Shader tag returned as None. Something went terribly wrong")
 
                 elif game_title == "halo2":
                     shader = shader_processing.find_h2_shader_tag(asset.filepath, ass_mat_name)
                     if not shader == None:
-                        shader_processing.generate_h2_shader(mat, shader, print)
+                        mat = shader_processing.generate_h2_shader(mat, shader, print)
                     else:
                         print("Halo 2 Shader tag returned as None. Something went terribly wrong")
 
@@ -810,75 +813,61 @@ def generate_mesh_retail(context, asset, object_vertices, object_triangles, obje
 
     return vertex_weights_sets, region_list
 
-def process_mesh_export_weights(vert, armature, original_geo, vertex_groups, joined_list, file_type, node_index_list=None):
-    if len(vert.groups) != 0 and len(vert.groups) <= len(vertex_groups):
-        object_vert_group_list = []
-        vertex_vert_group_list = []
-        for group_index in range(len(vert.groups)):
-            vert_group = vert.groups[group_index].group
-            if not vert_group >= len(vertex_groups):
-                object_vertex_group = vertex_groups[vert_group]
-                if armature:
-                    if object_vertex_group in armature.data.bones:
-                        vertex_vert_group_list.append(group_index)
-                        if armature.data.bones[object_vertex_group] in joined_list:
-                            object_vert_group_list.append(vert_group)
-
-                else:
-                    if object_vertex_group in bpy.data.objects:
-                        vertex_vert_group_list.append(group_index)
-                        if bpy.data.objects[object_vertex_group] in joined_list:
-                            object_vert_group_list.append(vert_group)
-
-        value = len(object_vert_group_list)
-        if value > 4:
-            value = 4
-
-        node_influence_count = int(value)
-        node_set = []
-        if len(object_vert_group_list) != 0:
-            for idx, group_index in enumerate(object_vert_group_list):
-                vert_index = int(vertex_vert_group_list[idx])
-                vert_group = vert.groups[vert_index].group
-                object_vertex_group = vertex_groups[vert_group]
-                if armature:
-                    node_obj = armature.data.bones[object_vertex_group]
-
-                else:
-                    node_obj = bpy.data.objects[object_vertex_group]
+def process_mesh_export_weights(vertex_weights, loop_vertices, armature, original_geo, vertex_groups, node_hierarchy, file_type, node_index_list=None):
+    group_counts, group_indices, group_weights = vertex_weights
+    vertex_count = len(group_counts)
 
-                node_index = int(joined_list.index(node_obj))
-                if file_type == 'ASS':
-                    node_index += 1
-                    if not node_index_list == None and not node_index in node_index_list:
-                        node_index_list.append(node_index)
+    vertex_group_table = np.asarray(node_hierarchy.get_vertex_group_table(original_geo, vertex_groups, armature) + [-1], dtype=np.int32)
+    entry_vertices = np.repeat(np.arange(vertex_count), group_counts)
+    node_indices = vertex_group_table[np.minimum(group_indices, len(vertex_group_table) - 1)]
 
-                    node_index = node_index_list.index(node_index)
+    used_vertices = np.zeros(vertex_count, dtype=bool)
+    used_vertices[loop_vertices] = True
+    valid_vertices = used_vertices & (group_counts <= len(vertex_groups))
+    valid_entries = (node_indices != -1) & valid_vertices[entry_vertices]
 
-                node_weight = float(vert.groups[vert_index].weight)
-                node_set.append([node_index, node_weight])
+    entry_vertices = entry_vertices[valid_entries]
+    node_indices = node_indices[valid_entries]
+    node_weights = group_weights[valid_entries]
+    if file_type == 'ASS':
+        node_indices = node_indices + 1
+        if not node_index_list == None and len(node_indices) > 0:
+            # Local node indices are handed out in the order the loops first reach each node.
+            vertex_order = np.unique(loop_vertices, return_index=True)
+            vertex_ranks = np.zeros(vertex_count, dtype=np.int64)
+            vertex_ranks[vertex_order[0]] = np.argsort(np.argsort(vertex_order[1]))
+            ordered_nodes = node_indices[np.argsort(vertex_ranks[entry_vertices], kind='stable')]
+            unique_nodes, first_entries = np.unique(ordered_nodes, return_index=True)
+            for node_index in unique_nodes[np.argsort(first_entries)].tolist():
+                if not node_index in node_index_list:
+                    node_index_list.append(node_index)
+
+            local_indices = np.full(max(node_index_list) + 1, -1, dtype=np.int32)
+            local_indices[node_index_list] = np.arange(len(node_index_list), dtype=np.int32)
+            node_indices = local_indices[node_indices]
+
+    node_counts = np.bincount(entry_vertices, minlength=vertex_count)
+    node_slots = np.arange(len(entry_vertices)) - (np.cumsum(node_counts) - node_counts)[entry_vertices]
+    node_width = max(4, int(node_counts.max(initial=0)))
+    node_index_table = np.full((vertex_count, node_width), -1, dtype=np.int32)
+    node_weight_table = np.zeros((vertex_count, node_width), dtype=np.float32)
+    node_index_table[entry_vertices, node_slots] = node_indices
+    node_weight_table[entry_vertices, node_slots] = node_weights
+
+    node_influence_counts = np.minimum(node_counts, 4)
+    if file_type == 'JMS':
+        unweighted_vertices = node_counts == 0
+        if unweighted_vertices.any():
+            parent_index = global_functions.get_parent(armature, original_geo, node_hierarchy, 0)
+            node_index_table[unweighted_vertices, 0] = int(parent_index[0])
+            node_weight_table[unweighted_vertices, 0] = 1.0
+            node_counts[unweighted_vertices] = 1
+            node_influence_counts[unweighted_vertices] = 1
 
-        else:
-            node_set = []
-            node_influence_count = int(0)
-            if file_type == 'JMS':
-                parent_index = global_functions.get_parent(armature, original_geo, joined_list, 0)
-                node_influence_count = int(1)
-                node_index = int(parent_index[0])
-                node_weight = float(1.0000000000)
-                node_set.append([node_index, node_weight])
+    node_sets = [[[node_index, node_weight] for node_index, node_weight in zip(index_row[:node_count], weight_row[:node_count])]
+                 for index_row, weight_row, node_count in zip(node_index_table.tolist(), node_weight_table.tolist(), node_counts.tolist())]
 
-    else:
-        node_set = []
-        node_influence_count = int(0)
-        if file_type == 'JMS':
-            parent_index = global_functions.get_parent(armature, original_geo, joined_list, 0)
-            node_influence_count = int(1)
-            node_index = int(parent_index[0])
-            node_weight = float(1.0000000000)
-            node_set.append([node_index, node_weight])
-
-    return node_influence_count, node_set
+    return node_influence_counts.tolist(), node_sets
 
 def process_mesh_export_color(evaluted_mesh, loop_index, vertex_index):
     color = (0.0, 0.0, 0.0)
@@ -931,6 +920,207 @@ def process_mesh_export_face_set(default_permutation, default_region, game_versi
 
     return face_set
 
+class MeshExportData:
+    def __init__(self, loop_order=None, loop_vertices=None, translations=None, normals=None, uvs=None, colors=None, loop_totals=None, polygon_indices=None, material_indices=None, region_indices=None, vertex_weights=None, face_sets=None, face_materials=None, validation_warnings=None):
+        self.loop_order = loop_order
+        self.loop_vertices = loop_vertices
+        self.translations = translations
+        self.normals = normals
+        self.uvs = uvs
+        self.colors = colors
+        self.loop_totals = loop_totals
+        self.polygon_indices = polygon_indices
+        self.material_indices = material_indices
+        self.region_indices = region_indices
+        self.vertex_weights = vertex_weights
+        self.face_sets = face_sets
+        self.face_materials = face_materials
+        self.validation_warnings = validation_warnings
+
+    def is_valid(self):
+        try:
+            for material in self.face_materials.values():
+                if isinstance(material, list):
+                    material = material[0]
+
+                if not material == None and not material == -1:
+                    material.name
+
+        except ReferenceError:
+            return False
+
+        return True
+
+def get_collection_array(collection, attribute, count, width=1, dtype=np.float32):
+    array = np.empty(count * width, dtype=dtype)
+    if count > 0:
+        collection.foreach_get(attribute, array)
+
+    if width > 1:
+        array = array.reshape(count, width)
+
+    return array
+
+def get_normalized_vectors(vectors):
+    lengths = np.linalg.norm(vectors, axis=1)
+    valid_lengths = lengths > 0.0
+    normalized_vectors = np.zeros_like(vectors)
+    normalized_vectors[valid_lengths] = vectors[valid_lengths] / lengths[valid_lengths, None]
+
+    return normalized_vectors, valid_lengths
+
+def get_mesh_export_data(evaluated_geo, original_geo_matrix, loop_normals, use_region_attribute=False, triangulate=False):
+    vertex_count = len(evaluated_geo.vertices)
+    loop_count = len(evaluated_geo.loops)
+    polygon_count = len(evaluated_geo.polygons)
+
+    if triangulate:
+        evaluated_geo.calc_loop_triangles()
+        triangle_count = len(evaluated_geo.loop_triangles)
+        loop_order = get_collection_array(evaluated_geo.loop_triangles, "loops", triangle_count, 3, np.int32).ravel()
+        polygon_indices = get_collection_array(evaluated_geo.loop_triangles, "polygon_index", triangle_count, dtype=np.int32)
+        loop_totals = np.full(triangle_count, 3, dtype=np.int32)
+
+    else:
+        loop_starts = get_collection_array(evaluated_geo.polygons, "loop_start", polygon_count, dtype=np.int32)
+        loop_totals = get_collection_array(evaluated_geo.polygons, "loop_total", polygon_count, dtype=np.int32)
+        loop_offsets = np.cumsum(loop_totals) - loop_totals
+        loop_order = np.repeat(loop_starts - loop_offsets, loop_totals) + np.arange(int(loop_totals.sum()), dtype=np.int32)
+        polygon_indices = np.arange(polygon_count, dtype=np.int32)
+
+    loop_polygons = np.repeat(polygon_indices, loop_totals)
+
+    loop_vertices = get_collection_array(evaluated_geo.loops, "vertex_index", loop_count, dtype=np.int32)[loop_order]
+
+    matrix = np.array(original_geo_matrix, dtype=np.float64)
+    rotation_matrix = matrix[:3, :3]
+    vertex_co = get_collection_array(evaluated_geo.vertices, "co", vertex_count, 3).astype(np.float64)
+    translations = (vertex_co @ rotation_matrix.T + matrix[:3, 3])[loop_vertices]
+
+    if loop_normals:
+        if hasattr(evaluated_geo, "corner_normals"):
+            normals = get_collection_array(evaluated_geo.corner_normals, "vector", len(evaluated_geo.corner_normals), 3)[loop_order]
+
+        else:
+            normals = get_collection_array(evaluated_geo.loops, "normal", loop_count, 3)[loop_order]
+
+    else:
+        normals = get_collection_array(evaluated_geo.vertices, "normal", vertex_count, 3)[loop_vertices]
+
+    normals, valid_normals = get_normalized_vectors(normals.astype(np.float64) @ rotation_matrix.T)
+    if not valid_normals.all():
+        face_normals = get_collection_array(evaluated_geo.polygons, "normal", polygon_count, 3).astype(np.float64)
+        face_normals = get_normalized_vectors(face_normals @ rotation_matrix.T)[0]
+        normals[~valid_normals] = face_normals[loop_polygons[~valid_normals]]
+
+    uvs = np.empty((len(loop_order), len(evaluated_geo.uv_layers), 2), dtype=np.float32)
+    for uv_index, uv_layer in enumerate(evaluated_geo.uv_layers):
+        uvs[:, uv_index] = get_collection_array(uv_layer.data, "uv", loop_count, 2)[loop_order]
+
+    colors = np.zeros((len(loop_order), 3), dtype=np.float32)
+    active_color = evaluated_geo.attributes.active_color
+    if not active_color == None:
+        if active_color.domain == "POINT":
+            colors = get_collection_array(active_color.data, "color", vertex_count, 4)[loop_vertices]
+
+        else:
+            colors = get_collection_array(active_color.data, "color", loop_count, 4)[loop_order]
+
+        for color_index in np.flatnonzero((colors[:, 0] == 0.0) & (colors[:, 2] == 0.0)):
+            if "{:.2f}".format(colors[color_index, 1]) == "0.01":
+                colors[color_index] = (-65536.0000000000, -65536.0000000000, -65536.0000000000, 1.0)
+
+    material_indices = get_collection_array(evaluated_geo.polygons, "material_index", polygon_count, dtype=np.int32)[polygon_indices]
+    region_indices = np.full(len(polygon_indices), -1, dtype=np.int32)
+    if use_region_attribute:
+        region_indices = get_collection_array(evaluated_geo.get_custom_attribute().data, "value", polygon_count, dtype=np.int32)[polygon_indices] - 1
+
+    # mathutils works in single precision so the rows are rounded the same way the per-vertex path rounded them.
+    translations = translations.astype(np.float32)
+    normals = normals.astype(np.float32)
+
+    return MeshExportData(loop_order, loop_vertices, translations, normals, uvs, colors, loop_totals, polygon_indices, material_indices, region_indices)
+
+def get_vertex_weight_data(evaluated_geo, original_geo):
+    vertex_count = len(evaluated_geo.vertices)
+    if len(original_geo.vertex_groups) == 0:
+        return np.zeros(vertex_count, dtype=np.int32), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+    group_counts = np.empty(vertex_count, dtype=np.int32)
+    group_indices = []
+    group_weights = []
+    for vertex_idx, vertex in enumerate(evaluated_geo.vertices):
+        vertex_groups = vertex.groups
+        group_counts[vertex_idx] = len(vertex_groups)
+        for vertex_group in vertex_groups:
+            group_indices.append(vertex_group.group)
+            group_weights.append(vertex_group.weight)
+
+    return group_counts, np.asarray(group_indices, dtype=np.int32), np.asarray(group_weights, dtype=np.float32)
+
+def get_evaluated_mesh(context, obj, apply_modifiers):
+    if apply_modifiers:
+        depsgraph = context.evaluated_depsgraph_get()
+        obj_for_convert = obj.evaluated_get(depsgraph)
+        evaluted_mesh = obj_for_convert.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
+
+    else:
+        evaluted_mesh = obj.to_mesh(preserve_all_data_layers=True)
+
+    return evaluted_mesh
+
+def can_reuse_vertex_weights(original_geo, evaluated_geo, apply_modifiers, vertex_weights):
+    # Weights read from the original mesh only line up with the evaluated mesh when no modifier adds, removes or reweights vertices.
+    if vertex_weights is None or not len(vertex_weights[0]) == len(evaluated_geo.vertices):
+        return False
+
+    if apply_modifiers:
+        for modifier in original_geo.modifiers:
+            if modifier.show_viewport and not modifier.type in WEIGHT_PRESERVING_MODIFIERS:
+                return False
+
+    return True
+
+def get_mesh_export_rows(context, original_geo, original_geo_matrix, loop_normals, triangulate, apply_modifiers, game_version, default_permutation, default_region, vertex_weights=None):
+    evaluation_stage = export_profiler.begin_stage("Mesh evaluation")
+    evaluted_mesh = get_evaluated_mesh(context, original_geo, apply_modifiers)
+    if (4, 1, 0) > bpy.app.version:
+        evaluted_mesh.calc_normals_split()
+
+    export_profiler.end_stage(evaluation_stage, 1)
+
+    extraction_stage = export_profiler.begin_stage("Mesh extraction")
+    region_count = len(original_geo.data.region_list)
+    use_region_attribute = not original_geo.data.active_region == -1 and region_count > 0
+    mesh_data = get_mesh_export_data(evaluted_mesh, original_geo_matrix, loop_normals, use_region_attribute, triangulate)
+    mesh_data.region_indices[mesh_data.region_indices >= region_count] = -1
+    if not can_reuse_vertex_weights(original_geo, evaluted_mesh, apply_modifiers, vertex_weights):
+        vertex_weights = get_vertex_weight_data(evaluted_mesh, original_geo)
+
+    mesh_data.vertex_weights = vertex_weights
+
+    mesh_data.face_sets = {}
+    for region_idx in np.unique(mesh_data.region_indices).tolist():
+        if not region_idx == -1:
+            mesh_data.face_sets[region_idx] = process_mesh_export_face_set(default_permutation, default_region, game_version, original_geo, region_idx)
+
+    mesh_data.face_materials = {}
+    face_keys = np.stack((mesh_data.material_indices, mesh_data.region_indices), axis=1)
+    unique_face_keys, face_indices = np.unique(face_keys, axis=0, return_index=True)
+    for (material_idx, region_idx), face_idx in zip(unique_face_keys.tolist(), face_indices.tolist()):
+        lod, permutation, region = mesh_data.face_sets.get(region_idx, (None, default_permutation, default_region))
+        face = evaluted_mesh.polygons[int(mesh_data.polygon_indices[face_idx])]
+        mesh_data.face_materials[(material_idx, region_idx)] = global_functions.get_material(game_version, original_geo, face, evaluted_mesh, lod, region, permutation)
+
+    original_geo.to_mesh_clear()
+    export_profiler.end_stage(extraction_stage, len(mesh_data.loop_vertices))
+
+    validation_stage = export_profiler.begin_stage("Mesh validation")
+    mesh_data.validation_warnings = scene_validation.get_mesh_export_warnings(mesh_data, original_geo.name)
+    export_profiler.end_stage(validation_stage, len(mesh_data.loop_totals))
+
+    return mesh_data
+
 def get_default_region_permutation_name(game_version):
     default_name = None
     if game_version == "halo1":
@@ -1003,6 +1193,21 @@ def get_bone_distance(import_file_prerelease, import_file_main, current_idx, fil
 
     return bone_distance
 
+def set_uv_layer_from_vertices(mesh, uv_name, vertex_uvs, triangles, flip_v=False):
+    layer_uv = mesh.uv_layers.get(uv_name)
+    if layer_uv is None:
+        layer_uv = mesh.uv_layers.new(name=uv_name)
+
+    if len(triangles) > 0:
+        uv_array = np.asarray(vertex_uvs, dtype=np.float32).reshape(-1, 2)
+        loop_uvs = uv_array[np.asarray(triangles, dtype=np.int32).ravel()]
+        if flip_v:
+            loop_uvs[:, 1] = 1.0 - loop_uvs[:, 1]
+
+        layer_uv.data.foreach_set("uv", loop_uvs.ravel())
+
+    return layer_uv
+
 def get_mesh_data(ASSET, section_data, mesh, material_count, materials, random_color_gen, part_flags):
     for section_data in section_data:
         triangles = []
@@ -1046,44 +1251,29 @@ def get_mesh_data(ASSET, section_data, mesh, material_count, materials, random_c
                     triangles.append(tri)
 
         mesh.from_pydata(vertices, [], triangles)
-        for tri_idx, poly in enumerate(mesh.polygons):
-            poly.use_smooth = True
+        mesh.polygons.foreach_set("use_smooth", [True] * len(mesh.polygons))
 
         mesh.normals_split_custom_set_from_vertices(vertex_normals)
-        for triangle_idx, triangle in enumerate(triangles):
-            triangle_material_index = triangle_mat_indices[triangle_idx]
-            if not triangle_material_index == -1 and triangle_material_index < material_count:
-                mat = ASSET.materials[triangle_material_index]
-
+        material_slots = {}
+        for triangle_material_index in dict.fromkeys(triangle_mat_indices):
             if not triangle_material_index == -1:
                 if triangle_material_index < material_count:
                     mat = materials[triangle_material_index]
-
-                    if not mat in mesh.materials.values():
-                        mesh.materials.append(mat)
-
-                    mat.diffuse_color = random_color_gen.next()
-                    material_index = mesh.materials.values().index(mat)
-                    mesh.polygons[triangle_idx].material_index = material_index
                 else:
                     material_name = "invalid_material_%s" % triangle_material_index
                     mat = bpy.data.materials.get(material_name)
                     if mat is None:
                         mat = bpy.data.materials.new(name=material_name)
 
-                    if not mat in mesh.materials.values():
-                        mesh.materials.append(mat)
+                if not mat in mesh.materials.values():
+                    mesh.materials.append(mat)
 
-                    mat.diffuse_color = random_color_gen.next()
-                    material_index = mesh.materials.values().index(mat)
-                    mesh.polygons[triangle_idx].material_index = material_index
-
-            vertex_list = [section_data.raw_vertices[triangle[0]], section_data.raw_vertices[triangle[1]], section_data.raw_vertices[triangle[2]]]
-            for vertex_idx, vertex in enumerate(vertex_list):
-                loop_index = (3 * triangle_idx) + vertex_idx
-                uv_name = "UVMap_Render"
-                layer_uv = mesh.uv_layers.get(uv_name)
-                if layer_uv is None:
-                    layer_uv = mesh.uv_layers.new(name=uv_name)
+                mat.diffuse_color = random_color_gen.next()
+                material_slots[triangle_material_index] = mesh.materials.values().index(mat)
+
+        if len(material_slots) > 0:
+            polygon_material_indices = [material_slots.get(triangle_material_index, 0) for triangle_material_index in triangle_mat_indices]
+            mesh.polygons.foreach_set("material_index", polygon_material_indices)
 
-                layer_uv.data[loop_index].uv = (vertex.texcoord[0], 1 - vertex.texcoord[1])
+        texcoords = [raw_vertex.texcoord for raw_vertex in section_data.raw_vertices]
+        set_uv_layer_from_vertices(mesh, "UVMap_Render", texcoords, triangles, True)
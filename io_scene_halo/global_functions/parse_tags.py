@@ -94,7 +94,7 @@ from ..file_tag.h2.file_scenario_trigger_volumes_resource.process_file import pr
 from ..file_tag.h2.file_scenario_vehicles_resource.process_file import process_file as process_h2_scenario_vehicles_resource
 from ..file_tag.h2.file_scenario_weapons_resource.process_file import process_file as process_h2_scenario_weapons_resource
 
-def parse_tag(tagref, report, game_title, game_version):
+def parse_tag(tagref, report, game_title, game_version, header_only=False):
     ASSET = None
     if game_title == "halo1":
         if tagref.tag_group == "actv":
@@ -120,7 +120,7 @@ def parse_tag(tagref, report, game_title, game_version):
             if os.path.exists(input_file):
                 try:
                     with open(input_file, 'rb') as input_stream:
-                        ASSET = process_bitmap(input_stream, report)
+                        ASSET = process_bitmap(input_stream, report, header_only)
                 except Exception as e:
                     report({'WARNING'}, f"Failed to process {tagref.name}: {e}")
 
@@ -24,46 +24,29 @@
 #
 # ##### END MIT LICENSE BLOCK #####
 
-def build_layer_collection_parent_map(layer_collection, parent=None, parent_map=None):
-    if parent_map is None:
-        parent_map = {}
+def build_layer_collection_tree(root_layer_collection):
+    parent_map = {}
+    collection_lookup = {}
+    hidden_from_render = {}
 
-    parent_map[layer_collection] = parent
-    for child in layer_collection.children:
-        build_layer_collection_parent_map(child, layer_collection, parent_map)
+    layer_collection_stack = [(root_layer_collection, None, False)]
+    while layer_collection_stack:
+        layer_collection, parent, parent_hidden = layer_collection_stack.pop()
+        is_hidden = parent_hidden or layer_collection.collection.hide_render
 
-    return parent_map
-
-def is_collection_hidden_from_render(layer_collection, parent_map):
-    current = layer_collection
-    while current:
-        if current.collection.hide_render:
-            return True
-
-        current = parent_map.get(current)
-
-    return False
-
-def build_collection_lookup(layer_collection, lookup=None):
-    if lookup is None:
-        lookup = {}
-
-    lookup[layer_collection.collection] = layer_collection
-    for child in layer_collection.children:
-        build_collection_lookup(child, lookup)
-
-    return lookup
+        parent_map[layer_collection] = parent
+        collection_lookup[layer_collection.collection] = layer_collection
+        hidden_from_render[layer_collection] = is_hidden
+        for child in layer_collection.children:
+            layer_collection_stack.append((child, layer_collection, is_hidden))
 
+    return parent_map, collection_lookup, hidden_from_render
 
 def gather_scene_resources(context, layer_collection_list, object_list, hidden_geo, nonrender_geo):
-    view_layer = context.view_layer
-    scene_objects = list(context.scene.objects)
-
-    parent_map = build_layer_collection_parent_map(view_layer.layer_collection)
-    collection_lookup = build_collection_lookup(view_layer.layer_collection)
+    parent_map, collection_lookup, hidden_from_render = build_layer_collection_tree(context.view_layer.layer_collection)
     layer_collection_seen = set()
 
-    for obj in scene_objects:
+    for obj in context.scene.objects:
         include_object = True
 
         layer_collections_for_obj = [collection_lookup[collection] for collection in obj.users_collection if collection in collection_lookup]
@@ -76,7 +59,7 @@ def gather_scene_resources(context, layer_collection_list, object_list, hidden_g
                 include_object = False
             else:
                 for layer_collection in layer_collections_for_obj:
-                    if is_collection_hidden_from_render(layer_collection, parent_map):
+                    if hidden_from_render[layer_collection]:
                         include_object = False
                         break
 
@@ -88,6 +71,76 @@ def gather_scene_resources(context, layer_collection_list, object_list, hidden_g
         if include_object:
             object_list.append(obj)
 
+    return parent_map, collection_lookup
+
+class SceneSnapshot():
+    def __init__(self, context, hidden_geo, nonrender_geo):
+        self.layer_collection_list = []
+        self.object_list = []
+        self.parent_map, self.collection_lookup = gather_scene_resources(context, self.layer_collection_list, self.object_list, hidden_geo, nonrender_geo)
+        self.collection_visibility = {}
+        self.object_visibility = {}
+        self.modifier_visibility = {}
+        self.users = 0
+
+        for layer_collection in self.layer_collection_list:
+            self.collection_visibility[layer_collection] = (layer_collection.exclude,
+                                                            layer_collection.hide_viewport,
+                                                            layer_collection.collection.hide_render,
+                                                            layer_collection.collection.hide_viewport)
+
+        for obj in self.object_list:
+            self.object_visibility[obj] = (obj.hide_get(), obj.hide_render, obj.hide_viewport)
+            for modifier in obj.modifiers:
+                self.modifier_visibility[modifier] = (modifier.show_render, modifier.show_viewport, modifier.show_in_editmode)
+
+    def unhide(self):
+        unhide_relevant_resources(self.layer_collection_list, self.object_list)
+
+    def restore(self):
+        for layer_collection, (exclude, hide_viewport, collection_hide_render, collection_hide_viewport) in self.collection_visibility.items():
+            layer_collection.exclude = exclude
+            layer_collection.hide_viewport = hide_viewport
+            layer_collection.collection.hide_render = collection_hide_render
+            layer_collection.collection.hide_viewport = collection_hide_viewport
+
+        for obj, (hide_get, hide_render, hide_viewport) in self.object_visibility.items():
+            obj.hide_set(hide_get)
+            obj.hide_render = hide_render
+            obj.hide_viewport = hide_viewport
+
+        for modifier, (show_render, show_viewport, show_in_editmode) in self.modifier_visibility.items():
+            modifier.show_render = show_render
+            modifier.show_viewport = show_viewport
+            modifier.show_in_editmode = show_in_editmode
+
+active_scene_snapshots = {}
+
+def acquire_scene_snapshot(context, hidden_geo, nonrender_geo):
+    snapshot_key = (context.scene.name, context.view_layer.name, hidden_geo, nonrender_geo)
+    snapshot = active_scene_snapshots.get(snapshot_key)
+    if snapshot is None:
+        snapshot = SceneSnapshot(context, hidden_geo, nonrender_geo)
+        snapshot.unhide()
+        active_scene_snapshots[snapshot_key] = snapshot
+
+    snapshot.users += 1
+
+    return snapshot
+
+def release_scene_snapshot(snapshot):
+    snapshot.users -= 1
+    if snapshot.users <= 0:
+        snapshot.restore()
+        for snapshot_key, active_snapshot in list(active_scene_snapshots.items()):
+            if active_snapshot is snapshot:
+                del active_scene_snapshots[snapshot_key]
+
+def release_all_scene_snapshots():
+    for snapshot in list(active_scene_snapshots.values()):
+        snapshot.users = 0
+        release_scene_snapshot(snapshot)
+
 def filter_root_nodes(node_list, is_jmi = False):
     ''' Takes a set of objects and returns all that are root nodes '''
 
@@ -122,70 +175,6 @@ def filter_objects_from_root_object(object_set, root_object, include_root: bool
 
     return filtered_children
 
-def store_collection_visibility(layer_collection_list):
-    collection_visibility_list = list()
-
-    for layer_collection in layer_collection_list:
-        collection_visibility_list.append({
-            'layer_collection': layer_collection,
-            'exclude': layer_collection.exclude,
-            'hide_viewport': layer_collection.hide_viewport,
-            'collection_hide_render': layer_collection.collection.hide_render,
-            'collection_hide_viewport': layer_collection.collection.hide_viewport,
-        })
-
-    return collection_visibility_list
-
-def restore_collection_visibility(collection_visibility_list):
-    for state in collection_visibility_list:
-        layer_collection = state['layer_collection']
-
-        layer_collection.exclude = state['exclude']
-        layer_collection.hide_viewport = state['hide_viewport']
-        layer_collection.collection.hide_render = state['collection_hide_render']
-        layer_collection.collection.hide_viewport = state['collection_hide_viewport']
-
-def store_object_visibility(object_list):
-    object_visibility_list = list()
-
-    for obj in object_list:
-        object_visibility_list.append({
-            'object': obj,
-            'hide_get': obj.hide_get(),
-            'hide_render': obj.hide_render,
-            'hide_viewport': obj.hide_viewport,
-        })
-
-    return object_visibility_list
-
-def restore_object_visibility(object_visibility_list):
-    for state in object_visibility_list:
-        obj = state['object']
-        obj.hide_set(state['hide_get'])
-        obj.hide_render = state['hide_render']
-        obj.hide_viewport = state['hide_viewport']
-
-def store_modifier_visibility(object_list):
-    modifier_visibility_list = list()
-
-    for obj in object_list:
-        for modifier in obj.modifiers:
-            modifier_visibility_list.append({
-                'modifier': modifier,
-                'show_render': modifier.show_render,
-                'show_viewport': modifier.show_viewport,
-                'show_in_editmode': modifier.show_in_editmode,
-            })
-
-    return modifier_visibility_list
-
-def restore_modifier_visibility(modifier_visibility_list):
-    for state in modifier_visibility_list:
-        modifier = state['modifier']
-        modifier.show_render = state['show_render']
-        modifier.show_viewport = state['show_viewport']
-        modifier.show_in_editmode = state['show_in_editmode']
-
 def unhide_relevant_resources(layer_collection_set, object_set):
     for layer_collection in layer_collection_set:
         layer_collection.exclude = False
@@ -24,9 +24,13 @@
 #
 # ##### END MIT LICENSE BLOCK #####
 
+import numpy as np
+
 from ..global_functions.global_functions import ParseError
 from ..global_functions import resource_management
 
+DEGENERATE_AREA_LIMIT = 1e-10
+
 def validate_halo_jms_scene(game_version, version, blend_scene, object_list, is_jmi):
     node_count = len(blend_scene.node_list)
     root_nodes = resource_management.filter_root_nodes(blend_scene.node_list, is_jmi)
@@ -100,3 +104,58 @@ def validate_halo_jma_scene(game_title, jma_version, blend_scene, object_set, ex
 
         elif node_count > 255:
             raise ParseError("This model has more nodes than Halo 3 supports. Please limit your node count to 255 nodes")
+
+def get_max_vertex_influences(jms_version):
+    max_influences = None
+    if jms_version <= 8201:
+        max_influences = 2
+
+    elif jms_version <= 8204:
+        max_influences = 4
+
+    return max_influences
+
+def get_mesh_export_warnings(mesh_data, object_name):
+    warnings = []
+    if len(mesh_data.loop_totals) == 0:
+        return warnings
+
+    face_starts = np.cumsum(mesh_data.loop_totals) - mesh_data.loop_totals
+    face_ends = face_starts + mesh_data.loop_totals - 1
+    next_loops = np.arange(1, len(mesh_data.loop_vertices) + 1)
+    next_loops[face_ends] = face_starts
+
+    # Newell's method sums every edge of the polygon so n-gons are measured in full.
+    translations = mesh_data.translations - np.repeat(mesh_data.translations[face_starts], mesh_data.loop_totals, axis=0)
+    area_vectors = np.add.reduceat(np.cross(translations, translations[next_loops]), face_starts, axis=0)
+    doubled_areas = np.linalg.norm(area_vectors, axis=1)
+    degenerate_count = int(np.count_nonzero(doubled_areas <= DEGENERATE_AREA_LIMIT))
+    if degenerate_count > 0:
+        warnings.append("Object %s has %s degenerate faces with no area." % (object_name, degenerate_count))
+
+    edges = np.sort(np.stack((mesh_data.loop_vertices, mesh_data.loop_vertices[next_loops]), axis=1), axis=1)
+    unique_edges, edge_users = np.unique(edges, axis=0, return_counts=True)
+    non_manifold_count = int(np.count_nonzero(edge_users > 2))
+    if non_manifold_count > 0:
+        warnings.append("Object %s has %s non-manifold edges shared by more than two faces." % (object_name, non_manifold_count))
+
+    return warnings
+
+def get_vertex_influence_warning(mesh_data, vertex_group_table, max_influences, object_name):
+    group_counts, group_indices, group_weights = mesh_data.vertex_weights
+    vertex_count = len(group_counts)
+    vertex_group_table = np.asarray(vertex_group_table + [-1], dtype=np.int32)
+    entry_vertices = np.repeat(np.arange(vertex_count), group_counts)
+    node_indices = vertex_group_table[np.minimum(group_indices, len(vertex_group_table) - 1)]
+    influence_mask = (node_indices != -1) & (np.asarray(group_weights) > 0.0)
+    influence_counts = np.bincount(entry_vertices[influence_mask], minlength=vertex_count)
+
+    used_vertices = np.zeros(vertex_count, dtype=bool)
+    used_vertices[mesh_data.loop_vertices] = True
+    overweight_count = int(np.count_nonzero(used_vertices & (influence_counts > max_influences)))
+
+    warning = None
+    if overweight_count > 0:
+        warning = "Object %s has %s vertices weighted to more than %s nodes. Clean up the vertex groups so each vertex has at most %s influences." % (object_name, overweight_count, max_influences, max_influences)
+
+    return warning
@@ -28,6 +28,7 @@ import os
 import bpy
 
 from mathutils import Vector
+from bpy.app.handlers import persistent
 from .shader_helper import (
     get_h2_bitmap, 
     get_output_material_node, 
@@ -37,7 +38,7 @@ from .shader_helper import (
     set_image_scale,
     get_bitmap, 
     get_linked_node,
-    get_fallback_shader_node,
+    get_fallback_group_name,
     is_group_valid
     )
 
@@ -56,6 +57,67 @@ class ParameterSettings():
         self.color = color
         self.value = value
 
+class CompiledTemplate():
+    def __init__(self, name="", parameters=None, group_name=None, socket_bindings=None):
+        self.name = name
+        self.parameters = parameters
+        self.group_name = group_name
+        self.socket_bindings = socket_bindings
+
+compiled_templates = {}
+
+def clear_compiled_templates():
+    compiled_templates.clear()
+
+@persistent
+def clear_compiled_templates_on_load(dummy):
+    clear_compiled_templates()
+
+def get_template_mtime(template_ref):
+    template_mtime = None
+    input_file = os.path.join(bpy.context.preferences.addons["io_scene_halo"].preferences.halo_2_tag_path, "%s.shader_template" % template_ref.name)
+    if os.path.isfile(input_file):
+        template_mtime = os.path.getmtime(input_file)
+
+    return template_mtime
+
+def compile_shader_template(shader_template, template_name):
+    parameters = {}
+    for category in shader_template.categories:
+        for parameter in category.parameters:
+            if parameter.name in parameters:
+                continue
+
+            image_scale = 1.0
+            if not parameter.bitmap_scale == 0.0:
+                image_scale = parameter.bitmap_scale
+
+            parameters[parameter.name] = (parameter.parameter_type, 
+                                          parameter.default_bitmap, 
+                                          parameter.default_const_value, 
+                                          global_functions.convert_color_space(parameter.default_const_color , False), 
+                                          image_scale)
+
+    group_name = template_name
+    if not is_group_valid(template_name):
+        group_name = get_fallback_group_name(template_name)
+
+    return CompiledTemplate(template_name, parameters, group_name, {})
+
+def get_compiled_template(template_ref, report):
+    # The tag mtime is part of the key so edits to a shader_template on disk are picked up without a restart.
+    template_key = (template_ref.name, get_template_mtime(template_ref))
+    compiled_template = compiled_templates.get(template_key)
+    if compiled_template is None:
+        shader_template = parse_tag(template_ref, report, "halo2", "retail")
+        if shader_template is None:
+            return None
+
+        compiled_template = compile_shader_template(shader_template, os.path.basename(template_ref.name))
+        compiled_templates[template_key] = compiled_template
+
+    return compiled_template
+
 def get_lightmap_factor(lightmap_type):
     lightmap_factor = 0
     if lightmap_type == 1:
@@ -78,49 +140,42 @@ def place_node(node, col=0, row=0, spacing=100):
 
     node.location = (x, y)
 
-def get_shader_parameters(shader, shader_template):
-    parameters = []
-    for category in shader_template.categories:
-        for parameter in category.parameters:
-            parameter_settings = ParameterSettings()
-            parameter_settings.name = parameter.name
-            parameter_settings.parameter_type = parameter.parameter_type
-            parameter_settings.bitmap = parameter.default_bitmap
-            parameter_settings.value = parameter.default_const_value
-            parameter_settings.color = global_functions.convert_color_space(parameter.default_const_color , False)
-            image_scale = 1.0
-            if not parameter.bitmap_scale == 0.0:
-                image_scale = parameter.bitmap_scale
-
-            parameter_settings.scale = Vector((image_scale, image_scale, image_scale))
+def get_shader_parameters(shader, compiled_template):
+    parameters = {}
+    for parameter_name, (parameter_type, bitmap, value, color, image_scale) in compiled_template.parameters.items():
+        parameter_settings = ParameterSettings()
+        parameter_settings.name = parameter_name
+        parameter_settings.parameter_type = parameter_type
+        parameter_settings.bitmap = bitmap
+        parameter_settings.value = value
+        parameter_settings.color = color
+        parameter_settings.scale = Vector((image_scale, image_scale, image_scale))
 
-            parameters.append(parameter_settings)
+        parameters[parameter_name] = parameter_settings
 
     for parameter in shader.parameters:
-        for default_parameter in parameters:
-            if default_parameter.name == parameter.name:
-                default_parameter.parameter_type = parameter.type
-                default_parameter.bitmap = parameter.bitmap
-                default_parameter.value = parameter.const_value
-                default_parameter.color = global_functions.convert_color_space(parameter.const_color , False)
-                for animation_property in parameter.animation_properties:
-                    property_type = AnimationTypeEnum(animation_property.type)
-                    if property_type == AnimationTypeEnum.bitmap_scale_uniform and not animation_property.lower_bound == 0.0:
-                        default_parameter.scale = Vector((animation_property.lower_bound, animation_property.lower_bound, animation_property.lower_bound))
-
-                    elif property_type == AnimationTypeEnum.bitmap_scale_x and not animation_property.lower_bound == 0.0:
-                        default_parameter.scale[0] = animation_property.lower_bound
+        default_parameter = parameters.get(parameter.name)
+        if default_parameter:
+            default_parameter.parameter_type = parameter.type
+            default_parameter.bitmap = parameter.bitmap
+            default_parameter.value = parameter.const_value
+            default_parameter.color = global_functions.convert_color_space(parameter.const_color , False)
+            for animation_property in parameter.animation_properties:
+                property_type = AnimationTypeEnum(animation_property.type)
+                if property_type == AnimationTypeEnum.bitmap_scale_uniform and not animation_property.lower_bound == 0.0:
+                    default_parameter.scale = Vector((animation_property.lower_bound, animation_property.lower_bound, animation_property.lower_bound))
 
-                    elif property_type == AnimationTypeEnum.bitmap_scale_y and not animation_property.lower_bound == 0.0:
-                        default_parameter.scale[1] = animation_property.lower_bound
+                elif property_type == AnimationTypeEnum.bitmap_scale_x and not animation_property.lower_bound == 0.0:
+                    default_parameter.scale[0] = animation_property.lower_bound
 
-                    elif property_type == AnimationTypeEnum.bitmap_scale_z and not animation_property.lower_bound == 0.0:
-                        default_parameter.scale[2] = animation_property.lower_bound
+                elif property_type == AnimationTypeEnum.bitmap_scale_y and not animation_property.lower_bound == 0.0:
+                    default_parameter.scale[1] = animation_property.lower_bound
 
-                    elif property_type == AnimationTypeEnum.color:
-                        default_parameter.color = global_functions.convert_color_space(animation_property.color_a , False)
+                elif property_type == AnimationTypeEnum.bitmap_scale_z and not animation_property.lower_bound == 0.0:
+                    default_parameter.scale[2] = animation_property.lower_bound
 
-                break
+                elif property_type == AnimationTypeEnum.color:
+                    default_parameter.color = global_functions.convert_color_space(animation_property.color_a , False)
 
     return parameters
 
@@ -166,11 +221,11 @@ def generate_shader_simple(mat, shader, report):
 
     connect_inputs(mat.node_tree, base_node, "Color", bdsf_principled, "Base Color")
 
-def generate_shader(mat, shader, shader_template, report):
+def generate_shader(mat, shader, compiled_template, report):
     mat.use_nodes = True
 
-    shader_parameters = get_shader_parameters(shader, shader_template)
-    shader_template_name = os.path.basename(shader.template.name)
+    shader_parameters = get_shader_parameters(shader, compiled_template)
+    shader_template_name = compiled_template.name
 
     texture_root = bpy.context.preferences.addons["io_scene_halo"].preferences.halo_2_data_path
     for node in mat.node_tree.nodes:
@@ -179,10 +234,9 @@ def generate_shader(mat, shader, shader_template, report):
     output_material_node = get_output_material_node(mat)
     place_node(output_material_node)
 
-    if is_group_valid(shader_template_name):
-        shader_node = get_shader_node(mat.node_tree, shader_template_name)
-    else:
-        shader_node = get_fallback_shader_node(mat.node_tree, shader_template_name)
+    shader_node = None
+    if compiled_template.group_name:
+        shader_node = get_shader_node(mat.node_tree, compiled_template.group_name)
 
     if shader_node:
         shader_node.name = shader_template_name.replace('_', ' ').title()
@@ -190,65 +244,75 @@ def generate_shader(mat, shader, shader_template, report):
         connect_inputs(mat.node_tree, shader_node, "Shader", output_material_node, "Surface")
         shader_node.inputs["Lightmap Factor"].default_value = get_lightmap_factor(shader.lightmap_type)
 
+        # Bindings are resolved per node group since the fallback group or a reloaded resource can expose different sockets.
+        socket_bindings = compiled_template.socket_bindings.get(shader_node.node_tree.session_uid)
+        if socket_bindings is None:
+            socket_bindings = []
+            for input_idx, input_socket in enumerate(shader_node.inputs):
+                halo_name = input_socket.name.replace(' ', '_').lower()
+                if halo_name in compiled_template.parameters:
+                    socket_bindings.append((input_idx, halo_name))
+
+            compiled_template.socket_bindings[shader_node.node_tree.session_uid] = socket_bindings
+
         row = 0
-        for input_socket in shader_node.inputs:
+        for input_idx, halo_name in socket_bindings:
+            input_socket = shader_node.inputs[input_idx]
             input_socket_name = input_socket.name
-            halo_name = input_socket_name.replace(' ', '_').lower()
-            for parameter in shader_parameters:
-                if halo_name == parameter.name:
-                    parameter_type = TypeEnum(parameter.parameter_type)
-                    if parameter_type == TypeEnum.bitmap:
-                        parameter_map, parameter_name, parameter_bitmap = get_h2_bitmap(parameter.bitmap, texture_root, report)
-                        bitmap_node = generate_image_node(mat, parameter_map, parameter_bitmap, parameter_name)
-                        bitmap_node.name = input_socket_name
-                        place_node(bitmap_node, 2, row)
-
-                        is_bump = False
-                        is_detail = False
-                        is_noise = False
-                        if input_socket_name == "Bump Map":
-                            is_bump = True
-
-                        if "Detail" in input_socket_name:
-                            is_detail = True
-
-                        if "Noise" in input_socket_name:
-                            is_noise = True
-
-                        if is_bump:    
-                            bitmap_node.interpolation = 'Cubic'
-
-                        if not bitmap_node.image == None:
-                            if is_bump or is_detail:
-                                bitmap_node.image.colorspace_settings.name = 'Non-Color'
-                            elif is_noise:
-                                bitmap_node.image.colorspace_settings.name = 'Linear Rec.709'
-
-                            bitmap_node.image.alpha_mode = 'CHANNEL_PACKED'
-
-                        connect_inputs(mat.node_tree, bitmap_node, "Color", shader_node, input_socket_name)
-                        connect_inputs(mat.node_tree, bitmap_node, "Alpha", shader_node, "%s Alpha" % input_socket_name)
-
-                        set_image_scale(mat, bitmap_node, parameter.scale)
-
-                        if is_bump and parameter_bitmap:
-                            height_value = 0.0
-                            if not parameter_bitmap.bump_height == 0.0:
-                                height_value = parameter_bitmap.bump_height
-
-                            shader_node.inputs["Bump Map Repeat"].default_value = height_value
-
-                        row += 1
-
-                    elif parameter_type == TypeEnum._value:
-                        input_socket.default_value = parameter.value
-                        if "emissive_power" in parameter.name:
-                            input_socket.default_value *= 100
-
-                    elif parameter_type == TypeEnum.color:
-                        input_socket.default_value = parameter.color
-                    elif parameter_type == TypeEnum.switch:
-                        print("IF THIS APPEARS LET GENERAL KNOW.")
+            parameter = shader_parameters[halo_name]
+            parameter_type = TypeEnum(parameter.parameter_type)
+            if parameter_type == TypeEnum.bitmap:
+                parameter_map, parameter_name, parameter_bitmap = get_h2_bitmap(parameter.bitmap, texture_root, report)
+                bitmap_node = generate_image_node(mat, parameter_map, parameter_bitmap, parameter_name)
+                bitmap_node.name = input_socket_name
+                place_node(bitmap_node, 2, row)
+
+                is_bump = False
+                is_detail = False
+                is_noise = False
+                if input_socket_name == "Bump Map":
+                    is_bump = True
+
+                if "Detail" in input_socket_name:
+                    is_detail = True
+
+                if "Noise" in input_socket_name:
+                    is_noise = True
+
+                if is_bump:    
+                    bitmap_node.interpolation = 'Cubic'
+
+                if not bitmap_node.image == None:
+                    if is_bump or is_detail:
+                        bitmap_node.image.colorspace_settings.name = 'Non-Color'
+                    elif is_noise:
+                        bitmap_node.image.colorspace_settings.name = 'Linear Rec.709'
+
+                    bitmap_node.image.alpha_mode = 'CHANNEL_PACKED'
+
+                connect_inputs(mat.node_tree, bitmap_node, "Color", shader_node, input_socket_name)
+                connect_inputs(mat.node_tree, bitmap_node, "Alpha", shader_node, "%s Alpha" % input_socket_name)
+
+                set_image_scale(mat, bitmap_node, parameter.scale)
+
+                if is_bump and parameter_bitmap:
+                    height_value = 0.0
+                    if not parameter_bitmap.bump_height == 0.0:
+                        height_value = parameter_bitmap.bump_height
+
+                    shader_node.inputs["Bump Map Repeat"].default_value = height_value
+
+                row += 1
+
+            elif parameter_type == TypeEnum._value:
+                input_socket.default_value = parameter.value
+                if "emissive_power" in parameter.name:
+                    input_socket.default_value *= 100
+
+            elif parameter_type == TypeEnum.color:
+                input_socket.default_value = parameter.color
+            elif parameter_type == TypeEnum.switch:
+                print("IF THIS APPEARS LET GENERAL KNOW.")
 
     else:
         generate_shader_simple(mat, shader, report)
@@ -34,16 +34,13 @@ from .shader_helper import (
     get_output_material_node, 
     connect_inputs, 
     generate_image_node, 
+    get_shader_resource_group,
     HALO_1_SHADER_RESOURCES
     )
 
 def get_shader_environment_node(tree):
-    if not bpy.data.node_groups.get("shader_environment"):
-        with bpy.data.libraries.load(HALO_1_SHADER_RESOURCES) as (data_from, data_to):
-            data_to.node_groups.append(data_from.node_groups[data_from.node_groups.index('shader_environment')])
-
     shader_environment_node = tree.nodes.new('ShaderNodeGroup')
-    shader_environment_node.node_tree = bpy.data.node_groups.get("shader_environment")
+    shader_environment_node.node_tree = get_shader_resource_group(HALO_1_SHADER_RESOURCES, "shader_environment")
 
     return shader_environment_node
 
@@ -230,14 +227,13 @@ def generate_shader_environment(mat, shader, permutation_index, report):
     illum_map, illum_map_name = get_bitmap(shader.map, texture_root)
     reflection_map, reflection_map_name = get_bitmap(shader.reflection_cube_map, texture_root)
 
-    base_bitmap = parse_tag(shader.base_map, report, "halo1", "retail")
-    primary_detail_bitmap = parse_tag(shader.primary_detail_map, report, "halo1", "retail")
-    secondary_detail_bitmap = parse_tag(shader.secondary_detail_map, report, "halo1", "retail")
-    micro_detail_bitmap = parse_tag(shader.micro_detail_map, report, "halo1", "retail")
-    base_bitmap = parse_tag(shader.base_map, report, "halo1", "retail")
-    bump_bitmap = parse_tag(shader.bump_map, report, "halo1", "retail")
-    illum_bitmap = parse_tag(shader.map, report, "halo1", "retail")
-    reflection_bitmap = parse_tag(shader.reflection_cube_map, report, "halo1", "retail")
+    base_bitmap = parse_tag(shader.base_map, report, "halo1", "retail", header_only=True)
+    primary_detail_bitmap = parse_tag(shader.primary_detail_map, report, "halo1", "retail", header_only=True)
+    secondary_detail_bitmap = parse_tag(shader.secondary_detail_map, report, "halo1", "retail", header_only=True)
+    micro_detail_bitmap = parse_tag(shader.micro_detail_map, report, "halo1", "retail", header_only=True)
+    bump_bitmap = parse_tag(shader.bump_map, report, "halo1", "retail", header_only=True)
+    illum_bitmap = parse_tag(shader.map, report, "halo1", "retail", header_only=True)
+    reflection_bitmap = parse_tag(shader.reflection_cube_map, report, "halo1", "retail", header_only=True)
 
     rescale_detail = DiffuseFlags.rescale_detail_maps in DiffuseFlags(shader.diffuse_flags)
     rescale_bump_maps = DiffuseFlags.rescale_bump_maps in DiffuseFlags(shader.diffuse_flags)
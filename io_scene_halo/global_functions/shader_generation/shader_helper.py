@@ -26,22 +26,23 @@
 
 import os
 import bpy
-import zlib
-import numpy as np
 
 from mathutils import Vector
 from ...global_functions.parse_tags import parse_tag
-from ...global_functions import global_functions
+from ...global_functions import global_functions, bitmap_decoding, texture_cache, texture_loading
 from ...file_tag.h1.file_shader_model.format import ModelFlags, DetailFumctionEnum, DetailMaskEnum, FunctionEnum
-try:
-    from PIL import Image
-except ModuleNotFoundError:
-    print("PIL not found. Unable to create image node.")
-    Image = None
 
 HALO_1_SHADER_RESOURCES = os.path.join(os.path.dirname(os.path.realpath(__file__)), "halo_1_shader_resources.blend")
 HALO_2_SHADER_RESOURCES = os.path.join(os.path.dirname(os.path.realpath(__file__)), "halo_2_shader_resources.blend")
 
+# Groups that are loaded together the first time anything is requested from a resource file.
+SHADER_RESOURCE_PRELOADS = {
+    HALO_1_SHADER_RESOURCES: ("shader_environment", "shader_model"),
+    HALO_2_SHADER_RESOURCES: ()
+}
+
+shader_resource_groups = {}
+
 from ...file_tag.h2.file_shader.format import AnimationTypeEnum
 from ...file_tag.h2.file_shader_template.format import TypeEnum
 
@@ -127,32 +128,51 @@ def get_linked_node(node, input_name, search_type):
 def connect_inputs(tree, output_node, output_name, input_node, input_name):
     tree.links.new(output_node.outputs[output_name], input_node.inputs[input_name])
 
+def generate_decoded_image(BITMAP, bitmap_name, fallback_filepath=None):
+    image = bpy.data.images.get(bitmap_name)
+    if not image:
+        image = texture_cache.load_cached_image(BITMAP, bitmap_name)
+
+    if not image and texture_loading.use_background_decoding():
+        if len(BITMAP.bitmaps) == 0 or bitmap_decoding.get_format_name(BITMAP.bitmaps[0].bitmap_format) is None or BITMAP.processed_pixel_data.size == 0:
+            return None
+
+        bitmap_element = BITMAP.bitmaps[0]
+        image = texture_loading.queue_texture(BITMAP, bitmap_name, bitmap_element.width, bitmap_element.height, bitmap_decoding.get_bitmap_surface_pixels, fallback_filepath)
+
+    if not image:
+        pixels = bitmap_decoding.get_bitmap_surface_pixels(BITMAP)
+        if pixels is None:
+            return None
+
+        bitmap_element = BITMAP.bitmaps[0]
+        image = bpy.data.images.new(bitmap_name, bitmap_element.width, bitmap_element.height, alpha = True)
+        image.pixels.foreach_set(pixels)
+        texture_cache.store_cached_image(image, BITMAP, bitmap_name)
+
+    return image
+
 def generate_image_node(mat, texture, BITMAP=None, bitmap_name="White", is_env=False, pixel_data=None):
     if is_env:
         image_node = mat.node_tree.nodes.new("ShaderNodeTexEnvironment")
     else:
         image_node = mat.node_tree.nodes.new("ShaderNodeTexImage")
 
-    if BITMAP and Image and BITMAP.compressed_color_plate_data.size > 0:
+    if BITMAP and BITMAP.compressed_color_plate_data.size > 0:
         image = bpy.data.images.get(bitmap_name)
+        if not image:
+            image = texture_cache.load_cached_image(BITMAP, bitmap_name)
+
         if not image:
             x = BITMAP.color_plate_width
             y = BITMAP.color_plate_height
+            if texture_loading.use_background_decoding():
+                image = texture_loading.queue_texture(BITMAP, bitmap_name, x, y, bitmap_decoding.get_bitmap_color_plate_pixels)
 
-            image = bpy.data.images.new(bitmap_name, x, y, alpha = True)
-            decompressed_data = zlib.decompress(BITMAP.compressed_color_plate)
-            pil_image = Image.frombuffer("RGBA", (x, y), decompressed_data, 'raw', "BGRA").transpose(method=Image.Transpose.FLIP_TOP_BOTTOM)
-            pixels = list(pil_image.getdata())
-            background_color = pixels[0][:3]
-            divider_color = pixels[1][:3]
-            dummy_color = pixels[2][:3]
-
-            normalized = 1.0 / 255.0
-            
-            blender_pixels = (np.asarray(pil_image.convert('RGBA'),dtype=np.float32) * normalized).ravel()
-
-            image.pixels[:] = blender_pixels
-            image.pack()
+            else:
+                image = bpy.data.images.new(bitmap_name, x, y, alpha = True)
+                image.pixels.foreach_set(bitmap_decoding.get_bitmap_color_plate_pixels(BITMAP))
+                texture_cache.store_cached_image(image, BITMAP, bitmap_name)
 
         image_node.image = image
 
@@ -162,20 +182,29 @@ def generate_image_node(mat, texture, BITMAP=None, bitmap_name="White", is_env=F
             image = bpy.data.images.load(texture, check_existing=True)
             image_node.image = image
 
-        elif not pixel_data == None:
-            print("No color plate found. Loading texture dumped from pixel data. Expect quality loss.")
-            image = bpy.data.images.load(pixel_data, check_existing=True)
-            image_node.image = image
-
         else:
-            print("No color plate found. Generating white image.")
-            image = bpy.data.images.get(bitmap_name)
-            if not image:
-                image = bpy.data.images.new(bitmap_name, 2, 2)
-                image.generated_color = (1, 1, 1, 1)
-                image.pack()
+            image = None
+            if BITMAP:
+                image = generate_decoded_image(BITMAP, bitmap_name, pixel_data)
 
-            image_node.image = image
+            if image:
+                print("No color plate found. Decoding texture from the bitmap tag pixel data.")
+                image_node.image = image
+
+            elif not pixel_data == None:
+                print("No color plate found. Loading texture dumped from pixel data. Expect quality loss.")
+                image = bpy.data.images.load(pixel_data, check_existing=True)
+                image_node.image = image
+
+            else:
+                print("No color plate found. Generating white image.")
+                image = bpy.data.images.get(bitmap_name)
+                if not image:
+                    image = bpy.data.images.new(bitmap_name, 2, 2)
+                    image.generated_color = (1, 1, 1, 1)
+                    image.pack()
+
+                image_node.image = image
 
         print(" ")
 
@@ -797,25 +826,42 @@ def generate_detail_logic_node(tree, shader):
 
     return detail_logic_node
 
+def load_shader_resources(resource_path, group_names, link=None):
+    if link is None:
+        link = bpy.context.preferences.addons["io_scene_halo"].preferences.link_shader_resources
+
+    if not resource_path in shader_resource_groups:
+        group_names = tuple(group_names) + SHADER_RESOURCE_PRELOADS.get(resource_path, ())
+
+    missing_groups = [group_name for group_name in group_names if bpy.data.node_groups.get(group_name) is None]
+    if len(missing_groups) > 0 or not resource_path in shader_resource_groups:
+        with bpy.data.libraries.load(resource_path, link=link) as (data_from, data_to):
+            shader_resource_groups[resource_path] = tuple(data_from.node_groups)
+            data_to.node_groups = [group_name for group_name in dict.fromkeys(missing_groups) if group_name in shader_resource_groups[resource_path]]
+
+def get_resource_group_names(resource_path):
+    if not resource_path in shader_resource_groups:
+        load_shader_resources(resource_path, ())
+
+    return shader_resource_groups[resource_path]
+
+def get_shader_resource_group(resource_path, group_name, link=None):
+    node_group = bpy.data.node_groups.get(group_name)
+    if node_group is None and (not resource_path in shader_resource_groups or group_name in shader_resource_groups[resource_path]):
+        load_shader_resources(resource_path, (group_name,), link)
+        node_group = bpy.data.node_groups.get(group_name)
+
+    return node_group
+
 def add_shader_group(shader_name):
-    if not bpy.data.node_groups.get(shader_name):
-        with bpy.data.libraries.load(HALO_2_SHADER_RESOURCES) as (data_from, data_to):
-            if shader_name in data_from.node_groups:
-                data_to.node_groups.append(data_from.node_groups[data_from.node_groups.index(shader_name)])
+    get_shader_resource_group(HALO_2_SHADER_RESOURCES, shader_name)
 
 def is_group_valid(shader_name):
-    found_group = False
-    with bpy.data.libraries.load(HALO_2_SHADER_RESOURCES) as (data_from, data_to):
-        if shader_name in data_from.node_groups:
-            found_group = True
-
-    return found_group
+    return shader_name in get_resource_group_names(HALO_2_SHADER_RESOURCES)
 
 def get_shader_node(tree, shader_name):
     shader_node = None
-    add_shader_group(shader_name)
-
-    template_node = bpy.data.node_groups.get(shader_name)
+    template_node = get_shader_resource_group(HALO_2_SHADER_RESOURCES, shader_name)
     if template_node:
         shader_node = tree.nodes.new('ShaderNodeGroup')
         shader_node.node_tree = template_node
@@ -823,37 +869,37 @@ def get_shader_node(tree, shader_name):
 
     return shader_node
 
-def get_fallback_shader_node(tree, shader_name):
-    shader_node = None
+def get_fallback_group_name(shader_name):
     best_score = (-1, float('inf'))
     node_group = None
 
     blacklist = ("Lightmapper Postprocessing", "Halo Time")
 
-    with bpy.data.libraries.load(HALO_2_SHADER_RESOURCES) as (data_from, data_to):
-        shader_features = set(shader_name.lower().split("_"))
-        valid_groups = []
-        for node_group in data_from.node_groups:
-            if not node_group in blacklist:
-                valid_groups.append(node_group)
+    shader_features = set(shader_name.lower().split("_"))
+    valid_groups = []
+    for node_group in get_resource_group_names(HALO_2_SHADER_RESOURCES):
+        if not node_group in blacklist:
+            valid_groups.append(node_group)
 
-        for node_group_name in valid_groups:
-            group_features = set(node_group_name.lower().split("_"))
+    for node_group_name in valid_groups:
+        group_features = set(node_group_name.lower().split("_"))
 
-            matches = len(shader_features & group_features)
-            extras = len(group_features - shader_features)
-            score = (matches, -extras)
+        matches = len(shader_features & group_features)
+        extras = len(group_features - shader_features)
+        score = (matches, -extras)
 
-            if score > best_score:
-                best_score = score
-                node_group = node_group_name
+        if score > best_score:
+            best_score = score
+            node_group = node_group_name
 
-        if node_group and not node_group in bpy.data.node_groups:
-            data_to.node_groups.append(node_group)
+    return node_group
 
+def get_fallback_shader_node(tree, shader_name):
+    shader_node = None
+    node_group = get_fallback_group_name(shader_name)
     if node_group:
         shader_node = tree.nodes.new("ShaderNodeGroup")
-        shader_node.node_tree = bpy.data.node_groups[node_group]
+        shader_node.node_tree = get_shader_resource_group(HALO_2_SHADER_RESOURCES, node_group)
 
     return shader_node
 
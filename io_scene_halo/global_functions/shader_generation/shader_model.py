@@ -35,16 +35,13 @@ from .shader_helper import (
     get_output_material_node, 
     connect_inputs, 
     generate_image_node,
+    get_shader_resource_group,
     HALO_1_SHADER_RESOURCES
     )
 
 def get_shader_model_node(tree):
-    if not bpy.data.node_groups.get("shader_model"):
-        with bpy.data.libraries.load(HALO_1_SHADER_RESOURCES) as (data_from, data_to):
-            data_to.node_groups.append(data_from.node_groups[data_from.node_groups.index('shader_model')])
-
     shader_model_node = tree.nodes.new('ShaderNodeGroup')
-    shader_model_node.node_tree = bpy.data.node_groups.get("shader_model")
+    shader_model_node.node_tree = get_shader_resource_group(HALO_1_SHADER_RESOURCES, "shader_model")
 
     return shader_model_node
 
@@ -201,10 +198,10 @@ def generate_shader_model(mat, shader, report):
     detail_map, detail_map_name = get_bitmap(shader.detail_map, texture_root)
     reflection_map, reflection_map_name = get_bitmap(shader.reflection_cube_map, texture_root)
 
-    base_bitmap = parse_tag(shader.base_map, report, "halo1", "retail")
-    multipurpose_bitmap = parse_tag(shader.multipurpose_map, report, "halo1", "retail")
-    detail_bitmap = parse_tag(shader.detail_map, report, "halo1", "retail")
-    reflection_bitmap = parse_tag(shader.reflection_cube_map, report, "halo1", "retail")
+    base_bitmap = parse_tag(shader.base_map, report, "halo1", "retail", header_only=True)
+    multipurpose_bitmap = parse_tag(shader.multipurpose_map, report, "halo1", "retail", header_only=True)
+    detail_bitmap = parse_tag(shader.detail_map, report, "halo1", "retail", header_only=True)
+    reflection_bitmap = parse_tag(shader.reflection_cube_map, report, "halo1", "retail", header_only=True)
 
     for node in mat.node_tree.nodes:
         mat.node_tree.nodes.remove(node)
@@ -66,13 +66,7 @@ from .shader_generation.shader_helper import (
 
 from .shader_generation.shader_environment import generate_shader_environment
 from .shader_generation.shader_model import generate_shader_model
-from .shader_generation.halo_2_shader import generate_shader, generate_shader_simple
-
-try:
-    from PIL import Image
-except ModuleNotFoundError:
-    print("PIL not found. Unable to create image node.")
-    Image = None
+from .shader_generation.halo_2_shader import generate_shader, generate_shader_simple, get_compiled_template
 
 try:
     import lxml.etree as ET
@@ -86,7 +80,7 @@ def generate_shader_environment_simple(mat, shader, permutation_index, report):
 
     texture_root = bpy.context.preferences.addons["io_scene_halo"].preferences.halo_1_data_path
     base_map, base_bitmap_name = get_bitmap(shader.base_map, texture_root)
-    base_bitmap = parse_tag(shader.base_map, report, "halo1", "retail")
+    base_bitmap = parse_tag(shader.base_map, report, "halo1", "retail", header_only=True)
 
     output_material_node = get_output_material_node(mat)
     output_material_node.location = Vector((0.0, 0.0))
@@ -118,7 +112,7 @@ def generate_shader_model_simple(mat, shader, report):
 
     texture_root = bpy.context.preferences.addons["io_scene_halo"].preferences.halo_1_data_path
     base_map, base_map_name = get_bitmap(shader.base_map, texture_root)
-    base_bitmap = parse_tag(shader.base_map, report, "halo1", "retail")
+    base_bitmap = parse_tag(shader.base_map, report, "halo1", "retail", header_only=True)
 
     output_material_node = get_output_material_node(mat)
     output_material_node.location = Vector((0.0, 0.0))
@@ -192,7 +186,7 @@ def generate_shader_transparent_chicago_simple(mat, shader, report):
     first_map_name = "White"
     if len(shader.maps) > 0:
         first_map, first_map_name = get_bitmap(shader.maps[0].map, texture_root)
-        first_map_bitmap = parse_tag(shader.maps[0].map, report, "halo1", "retail")
+        first_map_bitmap = parse_tag(shader.maps[0].map, report, "halo1", "retail", header_only=True)
 
     output_material_node = get_output_material_node(mat)
     output_material_node.location = Vector((0.0, 0.0))
@@ -216,7 +210,7 @@ def generate_shader_transparent_chicago_extended_simple(mat, shader, report):
     first_map_name = "White"
     if len(shader._4_stage_maps) > 0:
         first_map, first_map_name = get_bitmap(shader._4_stage_maps[0].map, texture_root)
-        first_map_bitmap = parse_tag(shader._4_stage_maps[0].map, report, "halo1", "retail")
+        first_map_bitmap = parse_tag(shader._4_stage_maps[0].map, report, "halo1", "retail", header_only=True)
 
     output_material_node = get_output_material_node(mat)
     output_material_node.location = Vector((0.0, 0.0))
@@ -240,7 +234,7 @@ def generate_shader_transparent_generic_simple(mat, shader, report):
     first_map_name = "White"
     if len(shader.maps) > 0:
         first_map, first_map_name = get_bitmap(shader.maps[0].map, texture_root)
-        first_map_bitmap = parse_tag(shader.maps[0].map, report, "halo1", "retail")
+        first_map_bitmap = parse_tag(shader.maps[0].map, report, "halo1", "retail", header_only=True)
 
     output_material_node = get_output_material_node(mat)
     output_material_node.location = Vector((0.0, 0.0))
@@ -260,7 +254,7 @@ def generate_shader_transparent_glass_simple(mat, shader, report):
 
     texture_root = bpy.context.preferences.addons["io_scene_halo"].preferences.halo_1_data_path
     diffuse_map, diffuse_map_name = get_bitmap(shader.diffuse_map, texture_root)
-    diffuse_bitmap = parse_tag(shader.diffuse_map, report, "halo1", "retail")
+    diffuse_bitmap = parse_tag(shader.diffuse_map, report, "halo1", "retail", header_only=True)
 
     output_material_node = get_output_material_node(mat)
     output_material_node.location = Vector((0.0, 0.0))
@@ -282,7 +276,7 @@ def generate_shader_transparent_meter_simple(mat, shader, report):
 
     texture_root = bpy.context.preferences.addons["io_scene_halo"].preferences.halo_1_data_path
     meter_map, meter_map_name = get_bitmap(shader.meter_map, texture_root)
-    meter_bitmap = parse_tag(shader.meter_map, report, "halo1", "retail")
+    meter_bitmap = parse_tag(shader.meter_map, report, "halo1", "retail", header_only=True)
 
     output_material_node = get_output_material_node(mat)
     output_material_node.location = Vector((0.0, 0.0))
@@ -304,7 +298,7 @@ def generate_shader_transparent_plasma_simple(mat, shader, report):
 
     texture_root = bpy.context.preferences.addons["io_scene_halo"].preferences.halo_1_data_path
     primary_noise_map, primary_noise_map_name = get_bitmap(shader.primary_noise_map, texture_root)
-    primary_noise_bitmap = parse_tag(shader.primary_noise_map, report, "halo1", "retail")
+    primary_noise_bitmap = parse_tag(shader.primary_noise_map, report, "halo1", "retail", header_only=True)
 
     output_material_node = get_output_material_node(mat)
     output_material_node.location = Vector((0.0, 0.0))
@@ -324,7 +318,7 @@ def generate_shader_transparent_water_simple(mat, shader, report):
 
     texture_root = bpy.context.preferences.addons["io_scene_halo"].preferences.halo_1_data_path
     base_map, base_map_name = get_bitmap(shader.base_map, texture_root)
-    base_bitmap = parse_tag(shader.base_map, report, "halo1", "retail")
+    base_bitmap = parse_tag(shader.base_map, report, "halo1", "retail", header_only=True)
 
     output_material_node = get_output_material_node(mat)
     output_material_node.location = Vector((0.0, 0.0))
@@ -344,7 +338,7 @@ def generate_shader_transparent_meter(mat, shader, report):
 
     texture_root = bpy.context.preferences.addons["io_scene_halo"].preferences.halo_1_data_path
     meter_map, meter_map_name = get_bitmap(shader.meter_map, texture_root)
-    meter_bitmap = parse_tag(shader.meter_map, report, "halo1", "retail")
+    meter_bitmap = parse_tag(shader.meter_map, report, "halo1", "retail", header_only=True)
 
     output_material_node = get_output_material_node(mat)
     output_material_node.location = Vector((0.0, 0.0))
@@ -397,13 +391,13 @@ def generate_shader_transparent_glass(mat, shader, report):
     specular_map, specular_map_name = get_bitmap(shader.specular_map, texture_root)
     specular_detail_map, specular_detail_map_name = get_bitmap(shader.specular_detail_map, texture_root)
 
-    background_tint_bitmap = parse_tag(shader.background_tint_map, report, "halo1", "retail")
-    reflection_bitmap = parse_tag(shader.reflection_map, report, "halo1", "retail")
-    bump_bitmap = parse_tag(shader.bump_map, report, "halo1", "retail")
-    diffuse_bitmap = parse_tag(shader.diffuse_map, report, "halo1", "retail")
-    diffuse_detail_bitmap = parse_tag(shader.diffuse_detail_map, report, "halo1", "retail")
-    specular_bitmap = parse_tag(shader.specular_map, report, "halo1", "retail")
-    specular_detail_bitmap = parse_tag(shader.specular_detail_map, report, "halo1", "retail")
+    background_tint_bitmap = parse_tag(shader.background_tint_map, report, "halo1", "retail", header_only=True)
+    reflection_bitmap = parse_tag(shader.reflection_map, report, "halo1", "retail", header_only=True)
+    bump_bitmap = parse_tag(shader.bump_map, report, "halo1", "retail", header_only=True)
+    diffuse_bitmap = parse_tag(shader.diffuse_map, report, "halo1", "retail", header_only=True)
+    diffuse_detail_bitmap = parse_tag(shader.diffuse_detail_map, report, "halo1", "retail", header_only=True)
+    specular_bitmap = parse_tag(shader.specular_map, report, "halo1", "retail", header_only=True)
+    specular_detail_bitmap = parse_tag(shader.specular_detail_map, report, "halo1", "retail", header_only=True)
 
     output_material_node = get_output_material_node(mat)
     output_material_node.location = Vector((0.0, 0.0))
@@ -550,11 +544,44 @@ def generate_shader_transparent_glass(mat, shader, report):
     combine_xyz_node.inputs[1].default_value = scale
     combine_xyz_node.inputs[2].default_value = 1
 
+shader_registry = {}
+
+def get_shader_key(game_title, tag_ref, shader_permutation_index):
+    shader_gen = bpy.context.preferences.addons["io_scene_halo"].preferences.shader_gen
+
+    return "%s:%s:%s:%s:%s" % (game_title, tag_ref.tag_group, tag_ref.name, shader_permutation_index, shader_gen)
+
+def get_registered_material(mat, shader_key):
+    # The key is also stored on the material so a stale entry left behind by loading another blend file is never reused.
+    source_mat = None
+    source_name = shader_registry.get(shader_key)
+    if source_name:
+        source_mat = bpy.data.materials.get(source_name)
+
+    if source_mat is None or source_mat == mat or not source_mat.get("halo_shader_key") == shader_key:
+        return None
+
+    material_name = mat.name
+    registered_mat = source_mat.copy()
+    bpy.data.materials.remove(mat)
+    registered_mat.name = material_name
+
+    return registered_mat
+
+def register_material(mat, shader_key):
+    mat["halo_shader_key"] = shader_key
+    shader_registry[shader_key] = mat.name
+
 def generate_h1_shader(mat, tag_ref, shader_permutation_index, report):
     # 0 = Shader generation is disabled
     # 1 = Simple shader generation. Only the base map is generated
     # 2 = Full Shader generation
     if not int(bpy.context.preferences.addons["io_scene_halo"].preferences.shader_gen) == 0:
+        shader_key = get_shader_key("halo1", tag_ref, shader_permutation_index)
+        registered_mat = get_registered_material(mat, shader_key)
+        if registered_mat:
+            return registered_mat
+
         shader = parse_tag(tag_ref, report, "halo1", "retail")
         if not shader == None:
             if shader.header.tag_group == "senv":
@@ -616,12 +643,16 @@ def generate_h1_shader(mat, tag_ref, shader_permutation_index, report):
                     print("Skipping shader_transparent_water")
                     #generate_shader_transparent_water(mat, shader, report)
 
+            register_material(mat, shader_key)
+
         else:
             print("Halo 1 parsed shader tag returned as none. Something went horribly wrong")
 
     else:
         print("Shader generation is disabled. Skipping")
 
+    return mat
+
 
 
 def generate_h2_shader(mat, tag_ref, report):
@@ -629,6 +660,11 @@ def generate_h2_shader(mat, tag_ref, report):
     # 1 = Simple shader generation. Only the base map is generated
     # 2 = Full Shader generation
     if not int(bpy.context.preferences.addons["io_scene_halo"].preferences.shader_gen) == 0:
+        shader_key = get_shader_key("halo2", tag_ref, 0)
+        registered_mat = get_registered_material(mat, shader_key)
+        if registered_mat:
+            return registered_mat
+
         shader = parse_tag(tag_ref, report, "halo2", "retail")
         if not shader == None:
             if shader.header.tag_group == "shad":
@@ -636,9 +672,13 @@ def generate_h2_shader(mat, tag_ref, report):
                     generate_shader_simple(mat, shader, report)
                 else:
                     if not shader.template == None:
-                        shader_template = parse_tag(shader.template, report, "halo2", "retail")
-                        generate_shader(mat, shader, shader_template, report)
+                        compiled_template = get_compiled_template(shader.template, report)
+                        if compiled_template:
+                            generate_shader(mat, shader, compiled_template, report)
+                        else:
+                            generate_shader_simple(mat, shader, report)
 
+            register_material(mat, shader_key)
 
         else:
             print("Halo 2 parsed shader tag returned as none. Something went horribly wrong")
@@ -646,6 +686,8 @@ def generate_h2_shader(mat, tag_ref, report):
     else:
         print("Shader generation is disabled. Skipping")
 
+    return mat
+
 def config_is_valid(data_directory, tags_directory):
     is_valid = True
     if ET == None:
@@ -0,0 +1,78 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+#
+# MIT License
+#
+# Copyright (c) 2023 Steven Garcia & Jadeon Sheppard
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# ##### END MIT LICENSE BLOCK #####
+
+import os
+import bpy
+
+from . import global_functions
+
+def get_preferences():
+    return bpy.context.preferences.addons["io_scene_halo"].preferences
+
+def get_cache_filepath(BITMAP, bitmap_name):
+    cache_directory = get_preferences().texture_cache_path
+    if global_functions.string_empty_check(cache_directory) or BITMAP.header is None:
+        return None
+
+    # The bitmap name already carries the tag path checksum. The header checksum and payload sizes catch tags that were rebuilt since.
+    cache_name = "%s_%s_%s_%s.png" % (bitmap_name, BITMAP.header.checksum, BITMAP.compressed_color_plate_data.size, BITMAP.processed_pixel_data.size)
+
+    return os.path.join(bpy.path.abspath(cache_directory), cache_name)
+
+def set_image_storage(image):
+    if get_preferences().pack_cached_textures:
+        image.pack()
+
+def load_cached_image(BITMAP, bitmap_name):
+    image = None
+    cache_filepath = get_cache_filepath(BITMAP, bitmap_name)
+    if cache_filepath and os.path.isfile(cache_filepath):
+        image = bpy.data.images.load(cache_filepath, check_existing=True)
+        image.name = bitmap_name
+        set_image_storage(image)
+
+    return image
+
+def store_cached_image(image, BITMAP, bitmap_name):
+    cache_filepath = get_cache_filepath(BITMAP, bitmap_name)
+    if cache_filepath is None:
+        image.pack()
+        return
+
+    try:
+        os.makedirs(os.path.dirname(cache_filepath), exist_ok=True)
+        image.filepath_raw = cache_filepath
+        image.file_format = 'PNG'
+        image.save()
+
+    except (OSError, RuntimeError) as error:
+        # An unwritable cache directory should not lose the decoded texture, so keep it in the blend file instead.
+        print("Could not write texture cache file %s: %s" % (cache_filepath, error))
+        image.filepath_raw = ""
+        image.pack()
+        return
+
+    set_image_storage(image)
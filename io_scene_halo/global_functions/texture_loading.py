@@ -0,0 +1,128 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+#
+# MIT License
+#
+# Copyright (c) 2023 Steven Garcia & Jadeon Sheppard
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# ##### END MIT LICENSE BLOCK #####
+
+
+import os
+import bpy
+
+from concurrent.futures import ThreadPoolExecutor
+from bpy.app.handlers import persistent
+from . import texture_cache
+
+# Decoding only touches numpy and zlib so it can run off the main thread. Anything that touches bpy stays in apply_finished_textures.
+POLL_INTERVAL = 0.1
+
+decoding_pool = None
+pending_textures = {}
+
+def use_background_decoding():
+    return bpy.context.preferences.addons["io_scene_halo"].preferences.background_texture_decoding and not bpy.app.background
+
+def get_decoding_pool():
+    global decoding_pool
+    if decoding_pool is None:
+        decoding_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+
+    return decoding_pool
+
+def queue_texture(BITMAP, bitmap_name, width, height, decode_function, fallback_filepath=None):
+    image = bpy.data.images.new(bitmap_name, width, height, alpha = True)
+    image.generated_color = (1, 1, 1, 1)
+
+    # Keyed by session_uid since image names can be reused or renamed before the decode lands.
+    pending_textures[image.session_uid] = (get_decoding_pool().submit(decode_function, BITMAP), BITMAP, fallback_filepath)
+    if not bpy.app.timers.is_registered(apply_decoded_textures):
+        bpy.app.timers.register(apply_decoded_textures, first_interval=POLL_INTERVAL)
+
+    return image
+
+def apply_finished_textures(wait=False):
+    finished_textures = []
+    for image_uid, (future, BITMAP, fallback_filepath) in list(pending_textures.items()):
+        if wait or future.done():
+            del pending_textures[image_uid]
+            finished_textures.append((image_uid, future, BITMAP, fallback_filepath))
+
+    if len(finished_textures) == 0:
+        return
+
+    images = {image.session_uid: image for image in bpy.data.images}
+    for image_uid, future, BITMAP, fallback_filepath in finished_textures:
+        image = images.get(image_uid)
+        if image is None:
+            continue
+
+        try:
+            pixels = future.result()
+
+        except Exception as error:
+            print("Failed to decode %s: %s" % (image.name, error))
+            pixels = None
+
+        if pixels is None:
+            if not fallback_filepath == None:
+                # Same fallback as the synchronous path. The placeholder is repointed so nodes already using it pick up the file.
+                print("Loading texture dumped from pixel data for %s. Expect quality loss." % image.name)
+                image.source = 'FILE'
+                image.filepath = fallback_filepath
+                image.reload()
+
+            continue
+
+        image.pixels.foreach_set(pixels)
+        texture_cache.store_cached_image(image, BITMAP, image.name)
+
+def apply_decoded_textures():
+    apply_finished_textures()
+    if len(pending_textures) > 0:
+        return POLL_INTERVAL
+
+    return None
+
+def cancel_pending_textures():
+    if bpy.app.timers.is_registered(apply_decoded_textures):
+        bpy.app.timers.unregister(apply_decoded_textures)
+
+    for future, BITMAP, fallback_filepath in pending_textures.values():
+        future.cancel()
+
+    pending_textures.clear()
+
+@persistent
+def cancel_pending_textures_on_load(dummy):
+    cancel_pending_textures()
+
+@persistent
+def finish_pending_textures_on_save(dummy):
+    # Placeholders are plain white until their decode lands so finish them before they get written out.
+    apply_finished_textures(True)
+
+def shutdown_decoding_pool():
+    global decoding_pool
+    cancel_pending_textures()
+    if decoding_pool is not None:
+        decoding_pool.shutdown(cancel_futures=True)
+        decoding_pool = None
@@ -1468,7 +1468,7 @@ class Bulk_Reset_Bones(Operator):
         return global_functions.run_code("rotate_bones.reset_bones(context)")
 
 class Cull_Materials(Operator):
-    """Sets unused material slots to none for the selected object"""
+    """Sets unused material slots to none for the selected objects"""
     bl_idname = 'halo_bulk.cull_materials'
     bl_label = 'Cull Materials'
     bl_options = {"REGISTER", "UNDO"}
@@ -26,18 +26,26 @@
 
 import bpy
 
+from ..global_functions import global_functions
+
 def cull_materials(context):
-    used_materials = []
+    object_list = list(context.selected_objects)
     active_object = context.view_layer.objects.active
-    if active_object.type== 'MESH':
-        for face in active_object.data.polygons:
-            material = face.material_index
-            if material not in used_materials:
-                used_materials.append(material)
+    if active_object and not active_object in object_list:
+        object_list.append(active_object)
+
+    used_material_indices = {}
+    for object in object_list:
+        if object.type == 'MESH':
+            material_count = len(object.material_slots)
+            cache_key = (object.data, material_count)
+            used_materials = used_material_indices.get(cache_key)
+            if used_materials is None:
+                used_materials = used_material_indices[cache_key] = set(global_functions.get_used_material_indices(object.data, material_count))
 
-        for idx, material_slot in enumerate(active_object.material_slots):
-            if idx not in used_materials:
-                material_slot.material = None
+            for idx, material_slot in enumerate(object.material_slots):
+                if idx not in used_materials:
+                    material_slot.material = None
 
     return {'FINISHED'}
 
@@ -183,10 +183,8 @@ def convert_tag(context, input_file, source_game_title, target_game_title, tag_a
                             continue
 
                         if tag_group == "bitm":
-                            input_file = os.path.join(bitmap_directory, file_item)
-                            input_stream = open(input_file, 'rb')
-
-                            H1_ASSET = process_h1_bitmap(input_stream, report)
+                            # The upgraded tag does not carry pixel data so skip reading it. Only one bitmap's header is held at a time.
+                            H1_ASSET = process_h1_bitmap(input_stream, report, header_only=True)
 
                             file_name = file_item.rsplit('.', 1)[0].replace(" ", "_")
                             new_path = os.path.join(output_path, "%s.bitmap" % file_name)
@@ -197,7 +195,8 @@ def convert_tag(context, input_file, source_game_title, target_game_title, tag_a
                             build_h2_bitmap(output_stream, H2_ASSET, report)
 
                             output_stream.close()
-                            input_stream.close()
+
+                        input_stream.close()
 
             else:
                 input_stream.close()
@@ -56,7 +56,7 @@ from ..file_tag.h2.file_scenario.process_file import process_file as process_h2_
 from ..file_tag.h2.file_scenario_structure_lightmap.build_asset import build_asset as build_h2_lightmap
 from ..file_tag.h2.file_scenario_structure_lightmap.format import GeometryBucketFlags
 from ..global_functions import global_functions
-from ..global_functions.shader_generation.shader_helper import HALO_2_SHADER_RESOURCES
+from ..global_functions.shader_generation.shader_helper import HALO_2_SHADER_RESOURCES, get_shader_resource_group
 from ..global_functions.shader_generation.shader_helper import connect_inputs
 from ..global_functions.mesh_processing import gather_parameters
 
@@ -190,10 +190,7 @@ def run_lightmap_postprocessing(image_texture):
     NODE_GROUP = "Postprocessing Group"
     NODE_VIEWER = "Lightmap Viewer"
 
-    if GROUP_NAME not in bpy.data.node_groups:
-        with bpy.data.libraries.load(HALO_2_SHADER_RESOURCES, link=False) as (data_from, data_to):
-            if GROUP_NAME in data_from.node_groups:
-                data_to.node_groups.append(GROUP_NAME)
+    get_shader_resource_group(HALO_2_SHADER_RESOURCES, GROUP_NAME, link=False)
 
     scene = bpy.context.scene
     scene.use_nodes = True
@@ -29,61 +29,64 @@ import bpy
 from mathutils import Vector
 from ..global_functions import global_functions
 
+def get_material_nodes(mat, material_nodes):
+    node_lookup = material_nodes.get(mat)
+    if node_lookup is None:
+        image_nodes = {}
+        bsdf_node = None
+        for node in mat.node_tree.nodes:
+            if node.type == 'TEX_IMAGE':
+                image_nodes[node.name] = node
+
+            elif node.type == 'BSDF_PRINCIPLED':
+                bsdf_node = node
+
+        node_lookup = material_nodes[mat] = [image_nodes, bsdf_node]
+
+    return node_lookup
+
 def lightmap_bulk(context, res_x, res_y):
     object_list = list(context.scene.objects)
 
+    node_spacing = 20.0
+    material_nodes = {}
     for object in object_list:
-        node_spacing = 20.0
-        assigned_material_id = []
         if object.type == 'MESH':
-            for polygon in object.data.polygons:
-                material_id = global_functions.get_face_material(object, polygon)
-                if not material_id in assigned_material_id:
-                    assigned_material_id.append(material_id)
-
-            for material_id in assigned_material_id:
+            lightmap_name = "lightmap_%s" % object.name
+            lightmap_image = None
+            for material_id in global_functions.get_used_material_indices(object.data, len(object.material_slots)):
                 mat = object.material_slots[material_id].material
-                mat.use_nodes = True
-                lightmap_tex_node = None
-                diffuse_tex_node = None
-                normal_tex_node = None
-                bsdf_node = None
-                for node in mat.node_tree.nodes:
-                    if node.type == 'TEX_IMAGE' and node.name == "lightmap_%s" % object.name:
-                        lightmap_tex_node = node
-
-                    elif node.type == 'TEX_IMAGE' and node.name == "diffuse_%s" % mat.name:
-                        diffuse_tex_node = node
-
-                    elif node.type == 'TEX_IMAGE' and node.name == "normal_%s" % mat.name:
-                        normal_tex_node = node
-
-                    elif node.type == 'BSDF_PRINCIPLED':
-                        bsdf_node = node
+                if mat is None:
+                    continue
 
+                mat.use_nodes = True
+                node_lookup = get_material_nodes(mat, material_nodes)
+                image_nodes, bsdf_node = node_lookup
                 if bsdf_node is None:
-                    bsdf_node = mat.node_tree.nodes.new('ShaderNodeBsdfPrincipled')
+                    bsdf_node = node_lookup[1] = mat.node_tree.nodes.new('ShaderNodeBsdfPrincipled')
 
-                lightmap_image = bpy.data.images.get(object.name)
                 if lightmap_image is None:
-                    lightmap_image = bpy.data.images.new(object.name, res_x, res_y)
+                    lightmap_image = bpy.data.images.get(object.name)
+                    if lightmap_image is None:
+                        lightmap_image = bpy.data.images.new(object.name, res_x, res_y)
 
-                if diffuse_tex_node is None:
-                    diffuse_tex_node = mat.node_tree.nodes.new('ShaderNodeTexImage')
-                    diffuse_tex_node.name = "diffuse_%s" % mat.name
+                diffuse_name = "diffuse_%s" % mat.name
+                if image_nodes.get(diffuse_name) is None:
+                    diffuse_tex_node = image_nodes[diffuse_name] = mat.node_tree.nodes.new('ShaderNodeTexImage')
+                    diffuse_tex_node.name = diffuse_name
                     mat.node_tree.links.new(bsdf_node.inputs['Base Color'], diffuse_tex_node.outputs['Color'])
                     diffuse_tex_node.location = Vector((bsdf_node.location.x + -250 + (-1 * node_spacing), bsdf_node.location.y))
-                    diffuse_tex_node = mat.node_tree.nodes.new('ShaderNodeTexImage')
 
-                if normal_tex_node is None:
-                    normal_tex_node = mat.node_tree.nodes.new('ShaderNodeTexImage')
-                    normal_tex_node.name = "normal_%s" % mat.name
+                normal_name = "normal_%s" % mat.name
+                if image_nodes.get(normal_name) is None:
+                    normal_tex_node = image_nodes[normal_name] = mat.node_tree.nodes.new('ShaderNodeTexImage')
+                    normal_tex_node.name = normal_name
                     mat.node_tree.links.new(bsdf_node.inputs['Normal'], normal_tex_node.outputs['Color'])
                     normal_tex_node.location = Vector((bsdf_node.location.x + -250 + (-1 * node_spacing), bsdf_node.location.y + -250))
 
-                if lightmap_tex_node is None:
-                    lightmap_tex_node = mat.node_tree.nodes.new('ShaderNodeTexImage')
-                    lightmap_tex_node.name = "lightmap_%s" % object.name
+                if image_nodes.get(lightmap_name) is None:
+                    lightmap_tex_node = image_nodes[lightmap_name] = mat.node_tree.nodes.new('ShaderNodeTexImage')
+                    lightmap_tex_node.name = lightmap_name
                     lightmap_tex_node.location = Vector((bsdf_node.location.x, bsdf_node.location.y + -600 + (-1 * node_spacing)))
 
     return {'FINISHED'}